@@ -13,7 +13,7 @@ First, create the egg (in Test/dist) using Test/setup.py:
     >>> import zipfile
     >>> with contextlib.closing(zipfile.PyZipFile('CanNotProve.egg', 'w')) as z:
     ...     z.writepy('CanNotProve')
-    ...     z.write('CanNotProve/compiled_krb/facts.fbc')
+    ...     z.write('CanNotProve/compiled_krb/facts.fbm')
 
 Now, move up another level (so that 'CanNotProve' is not a subdirectory)
 
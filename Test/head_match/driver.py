@@ -0,0 +1,31 @@
+# driver.py
+
+import os
+
+from pyke import knowledge_engine
+
+engine = knowledge_engine.engine(__file__)
+
+def prove(goal, **args):
+    engine.reset()
+    engine.activate('head_match')
+    with engine.prove_goal('head_match.' + goal, **args) as gen:
+        return [vars for vars, plan in gen]
+
+def head_match_conditions(rule_name):
+    r'''Returns the conditions of the generated "if" statement matching the
+    rule's head.
+    '''
+    with open(os.path.join(os.path.dirname(__file__), 'compiled_krb',
+                           'head_match_bc.py')) as f:
+        lines = iter(f)
+        for line in lines:
+            if line.startswith('def %s(' % rule_name): break
+        for line in lines:
+            if line.strip() == 'try:': break
+        ans = []
+        for line in lines:
+            line = line.strip()
+            if line.startswith('if '): line = line[3:]
+            if line.endswith(':'): return ans + [line[:-1]]
+            ans.append(line[:-len(' and \\')])
@@ -0,0 +1,69 @@
+# head_match.tst
+
+    >>> from Test.head_match import driver
+
+Tuples in the rule heads are matched inline, element by element:
+
+    >>> driver.prove('first_two((1, 2, 3), $a, $b)')
+    [{'a': 1, 'b': 2}]
+    >>> driver.prove('first_two((1,), $a, $b)')
+    []
+    >>> driver.prove('nested(((1, 2), 3, 4, 5), $a, $b, $c)')
+    [{'a': 1, 'b': 3, 'c': (4, 5)}]
+    >>> driver.prove('nested(((1, 2, 3), 3), $a, $b, $c)')
+    []
+    >>> driver.prove('kind((line, (0, 0), (1, 2)), $k)')
+    [{'k': 'line'}]
+    >>> driver.prove('kind((line, (0, 0), 1), $k)')
+    []
+    >>> driver.prove('kind((point, 1), $k)'), driver.prove('kind(abc, $k)')
+    ([], [])
+
+whether the goal passes them as data or as patterns:
+
+    >>> driver.prove('first_two($t, $a, $b)', t=(1, 2))
+    [{'t': (1, 2), 'a': 1, 'b': 2}]
+    >>> driver.prove('nested(((1, 2), $y), $a, 7, $c)')
+    [{'y': 7, 'a': 1, 'c': ()}]
+    >>> driver.prove('same((1, 1), $a)'), driver.prove('same((1, 2), $a)')
+    ([{'a': 1}], [])
+    >>> driver.prove('same(($x, 2), $a)')
+    [{'x': 2, 'a': 2}]
+
+Rest variables get the elements left over:
+
+    >>> driver.prove('cons_length((1, 2, 3), $n)')
+    [{'n': 3}]
+    >>> driver.prove('cons_length($t, $n)', t=[1, 2])
+    [{'t': [1, 2], 'n': 2}]
+    >>> driver.prove('cons_length($t, $n)', t=tuple(range(20)))[0]['n']
+    20
+
+A goal's own tuple with a rest variable goes through the general
+match_pattern:
+
+    >>> driver.prove('same((1, *$r), $a)')
+    [{'r': (1,), 'a': 1}]
+
+The generated code:
+
+    >>> for condition in driver.head_match_conditions('nested'):
+    ...     print(condition.replace(' and ', ' and\n    ')
+    ...                    .replace(' or ', '\n or '))
+    ((tuple_0 := pattern.open_tuple(arg_patterns[0], arg_context)) is None and
+        patterns[0].match_pattern(context, context, arg_patterns[0], arg_context)
+     or tuple_0 is not None and
+        len(tuple_0[0]) >= 2 and
+        ((tuple_0_0 := pattern.open_tuple(tuple_0[0][0], tuple_0[1])) is None and
+        pattern.match_arg(context, patterns[0].elements[0], context, tuple_0[0][0], tuple_0[1])
+     or tuple_0_0 is not None and
+        len(tuple_0_0[0]) == 2 and
+        (context.bind('a', context, tuple_0_0[0][0], tuple_0_0[1])
+     or True)) and
+        (context.bind('b', context, tuple_0[0][1], tuple_0[1])
+     or True) and
+        (context.bind('rest', context, *pattern.tuple_rest(tuple_0, 2))
+     or True))
+    patterns[1].match_pattern(context, context, arg_patterns[1], arg_context)
+    patterns[2].match_pattern(context, context, arg_patterns[2], arg_context)
+    patterns[3].match_pattern(context, context, arg_patterns[3], arg_context)
@@ -0,0 +1,34 @@
+# driver.py
+
+from pyke import knowledge_engine, contexts
+
+engine = knowledge_engine.engine(__file__)
+
+def run(range_index):
+    engine.reset()
+    if range_index: engine.add_range_index('data', 'price', 1)
+    engine.add_case_specific_facts('data', 'price',
+                                   (('ab%d' % i if i % 3 else 'x%d' % i, i)
+                                    for i in range(10000)))
+    engine.activate('prices')
+    return facts('expensive'), facts('ab_item'), cheap()
+
+def facts(fact_name):
+    return sorted(engine.get_kb('data').get_entity_list(fact_name)
+                                       .case_specific_facts)
+
+def cheap(sort = True):
+    with engine.prove_goal('prices.cheap($item, $p)') \
+      as gen:
+        ans = [(vars['item'], vars['p']) for vars, plan in gen]
+        return sorted(ans) if sort else ans
+
+def scanned(ranges):
+    r'''Returns the number of price facts looked up for ranges.
+    '''
+    context = contexts.simple_context()
+    with engine.lookup('data', 'price', context,
+                       (contexts.variable('item'), contexts.variable('p')),
+                       ranges) \
+      as gen:
+        return sum(1 for dummy in gen)
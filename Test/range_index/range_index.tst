@@ -0,0 +1,40 @@
+# range_index.tst
+
+    >>> from Test.range_index import driver
+
+The check premises find the same facts with or without a range index:
+
+    >>> expensive, ab_items, cheap = driver.run(False)
+    >>> len(expensive), expensive[:2]
+    (99, [('ab9901', 9901), ('ab9902', 9902)])
+    >>> len(ab_items), ab_items[:3]
+    (34, [('ab1',), ('ab10',), ('ab11',)])
+    >>> cheap
+    [('ab1', 1), ('ab2', 2), ('x0', 0)]
+    >>> driver.run(True) == (expensive, ab_items, cheap)
+    True
+
+But with the range index, only the facts in range are looked up:
+
+    >>> driver.scanned(None)
+    10000
+    >>> driver.scanned(((1, '>', 9900),))
+    99
+    >>> driver.scanned(((1, '<', 3), (0, 'prefix', 'ab')))
+    2
+
+Facts added after the index is built are kept in it:
+
+    >>> driver.engine.add_case_specific_fact('data', 'price', ('big', 20000))
+    >>> driver.scanned(((1, '>=', 20000),))
+    1
+
+The facts found through the range index are matched in the order that they
+were added, as without the index:
+
+    >>> driver.engine.add_case_specific_fact('data', 'price', ('z', 1.5))
+    >>> driver.engine.add_case_specific_fact('data', 'price', ('y', 0.5))
+    >>> driver.cheap(False)
+    [('x0', 0), ('ab1', 1), ('ab2', 2), ('z', 1.5), ('y', 0.5)]
+    >>> driver.scanned(((1, '<', 3),))
+    5
@@ -0,0 +1,23 @@
+# driver.py
+
+from pyke import knowledge_engine
+
+engine = knowledge_engine.engine(__file__)
+
+def run(reorder_premises, semi_naive = False):
+    engine.reset()
+    engine.add_case_specific_facts('data', 'big',
+                                   ((i % 500, i % 700) for i in range(3000)))
+    engine.add_case_specific_facts('data', 'small',
+                                   ((i * 7,) for i in range(10)))
+    engine.add_case_specific_fact('data', 'tiny', (21,))
+    engine.activate('select', reorder_premises=reorder_premises,
+                    semi_naive=semi_naive)
+    return facts('hit'), facts('link')
+
+def facts(fact_name):
+    return sorted(engine.get_kb('data').get_entity_list(fact_name)
+                                       .case_specific_facts)
+
+def premise_order(rule_name, index = None):
+    return engine.get_rb('select').rules[rule_name].premise_order(index)
@@ -0,0 +1,40 @@
+# reorder_premises.tst
+
+    >>> from Test.reorder_premises import driver
+
+Reordering the premises finds the same facts:
+
+    >>> hits, links = driver.run(False)
+    >>> len(hits), links
+    (30, [(21, 21)])
+    >>> driver.run(True) == (hits, links)
+    True
+    >>> driver.run(True, semi_naive=True) == (hits, links)
+    True
+
+The small fact_lists are looked up first, and then the premises that are
+joined to them:
+
+    >>> driver.engine.get_kb('data').get_cardinality('big')
+    (3000, (500, 700))
+    >>> driver.premise_order('hits')
+    (1, 0)
+    >>> driver.premise_order('chain')
+    (3, 2, 1, 0)
+
+A new fact is joined starting from the premise that it matches:
+
+    >>> driver.premise_order('chain', 1)
+    (0, 3, 2)
+    >>> driver.premise_order('chain', 2)
+    (3, 1, 0)
+
+Adding new facts only changes the order once the cardinality statistics
+are recomputed:
+
+    >>> driver.engine.add_case_specific_facts('data', 'tiny',
+    ...                                       ((i,) for i in range(100)))
+    >>> driver.premise_order('chain')
+    (0, 1, 2, 3)
+    >>> len(driver.facts('link'))
+    10
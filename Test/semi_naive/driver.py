@@ -0,0 +1,28 @@
+# driver.py
+
+import sys
+
+from pyke import knowledge_engine
+
+engine = knowledge_engine.engine(__file__)
+
+# The recursion limit for the runs without semi-naive rounds, so that they
+# don't depend on the interpreter's default.
+Recursion_limit = 1000
+
+def run(length, semi_naive):
+    engine.reset()
+    engine.add_case_specific_fact('links', 'start', (0,))
+    for i in range(length):
+        engine.add_case_specific_fact('links', 'next', (i, i + 1))
+    old_limit = sys.getrecursionlimit()
+    if not semi_naive: sys.setrecursionlimit(Recursion_limit)
+    try:
+        engine.activate('chain', semi_naive=semi_naive)
+    finally:
+        sys.setrecursionlimit(old_limit)
+    return len(engine.get_kb('links').get_entity_list('reach')
+                                     .case_specific_facts)
+
+def stats():
+    engine.get_rb('chain').print_stats(sys.stdout)
@@ -0,0 +1,31 @@
+# semi_naive.tst
+
+    >>> from Test.semi_naive import driver
+
+Asserting one fact at a time nests a Python call for each step of the
+chain:
+
+    >>> driver.run(3000, False) # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+        ...
+    RecursionError: maximum recursion depth exceeded...
+
+But the semi-naive rounds don't:
+
+    >>> driver.run(3000, True)
+    3001
+    >>> driver.stats()
+    chain: 2 fc_rules, 3001 triggered, 3001 rerun
+           3001 semi-naive rounds, 3001 delta facts
+    chain: 0 bc_rules, 0 goals, 0 rules matched
+           0 successes, 0 failures
+
+Without semi-naive rounds, the lookup of reach($a) in reach_next also sees
+the facts that are added while it's running, so each of them is used twice:
+
+    >>> driver.run(10, False)
+    11
+    >>> driver.stats()
+    chain: 2 fc_rules, 20 triggered, 10 rerun
+    chain: 0 bc_rules, 0 goals, 0 rules matched
+           0 successes, 0 failures
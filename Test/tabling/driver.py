@@ -0,0 +1,13 @@
+# driver.py
+
+from pyke import knowledge_engine
+
+engine = knowledge_engine.engine(__file__)
+engine.table('tabling', 'path')
+
+def add_edges(*edges):
+    for edge in edges: engine.add_universal_fact('graph', 'edge', edge)
+
+def paths(start):
+    with engine.prove_goal('tabling.path($start, $to)', start=start) as gen:
+        return sorted(vars['to'] for vars, plan in gen)
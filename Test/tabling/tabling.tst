@@ -0,0 +1,51 @@
+# tabling.tst
+
+    >>> from Test.tabling import driver
+    >>> driver.add_edges(('a', 'b'), ('b', 'c'), ('c', 'a'), ('c', 'd'))
+    >>> driver.engine.activate('tabling')
+
+The left recursive path rule finds each answer once, even with the cycle:
+
+    >>> driver.paths('a')
+    ['a', 'b', 'c', 'd']
+    >>> driver.paths('d')
+    []
+
+Asking again uses the table:
+
+    >>> rb = driver.engine.get_rb('tabling')
+    >>> hits = rb.num_table_hits
+    >>> driver.paths('a')
+    ['a', 'b', 'c', 'd']
+    >>> rb.num_table_hits - hits
+    1
+
+Adding facts clears the tables:
+
+    >>> driver.add_edges(('d', 'e'))
+    >>> driver.paths('a')
+    ['a', 'b', 'c', 'd', 'e']
+    >>> driver.paths('d')
+    ['e']
+
+And so does engine.reset:
+
+    >>> driver.engine.reset()
+    >>> rb.tables
+    {}
+
+Whether a goal is tabled is only decided once, on its first call:
+
+    >>> driver.engine.activate('tabling')
+    >>> driver.paths('a')
+    ['a', 'b', 'c', 'd', 'e']
+    >>> rb.tabled
+    {'path': True}
+
+And adding facts only clears the tables if some were kept:
+
+    >>> driver.engine.tables_filled
+    True
+    >>> driver.add_edges(('e', 'f'))
+    >>> rb.tables, driver.engine.tables_filled
+    ({}, False)
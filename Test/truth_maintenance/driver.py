@@ -0,0 +1,43 @@
+# driver.py
+
+from pyke import knowledge_engine
+
+engine = knowledge_engine.engine(__file__)
+
+def run(edges, starts, semi_naive = False):
+    engine.reset()
+    for start in starts:
+        engine.add_case_specific_fact('graph', 'start', (start,))
+    engine.add_case_specific_facts('graph', 'edge', edges)
+    engine.activate('reach', semi_naive=semi_naive, truth_maintenance=True)
+    return reached()
+
+def reached():
+    return sorted(args[0] for args in engine.get_kb('graph')
+                                            .get_entity_list('reach')
+                                            .case_specific_facts)
+
+def retract(fact_name, *args):
+    num_retracted = engine.retract('graph', fact_name, args)
+    return num_retracted, reached()
+
+def fresh():
+    r'''The facts reached by running the rules from scratch on the facts
+    left.
+    '''
+    graph = engine.get_kb('graph')
+    def facts(fact_name):
+        return list(graph.get_entity_list(fact_name).case_specific_facts)
+    starts = [args[0] for args in facts('start')]
+    return run(facts('edge'), starts)
+
+def wrap(starts):
+    engine.reset()
+    for start in starts:
+        engine.add_case_specific_fact('graph', 'start', (start,))
+    engine.activate('wrap', truth_maintenance=True)
+    return facts('path'), facts('end')
+
+def facts(fact_name):
+    return list(engine.get_kb('graph').get_entity_list(fact_name)
+                                      .case_specific_facts)
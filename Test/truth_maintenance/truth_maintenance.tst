@@ -0,0 +1,67 @@
+# truth_maintenance.tst
+
+    >>> from Test.truth_maintenance import driver
+
+A graph with a cycle (2 -> 3 -> 4 -> 2) reached from 1:
+
+    >>> edges = [(1, 2), (2, 3), (3, 4), (4, 2), (4, 5), (6, 7)]
+    >>> driver.run(edges, (1,))
+    [1, 2, 3, 4, 5]
+
+Retracting an edge of the cycle leaves everything reachable:
+
+    >>> driver.retract('edge', 4, 2)
+    (1, [1, 2, 3, 4, 5])
+
+But retracting the edge into the cycle doesn't leave 2, 3 and 4 justified
+by each other:
+
+    >>> driver.run(edges, (1,))
+    [1, 2, 3, 4, 5]
+    >>> driver.retract('edge', 1, 2)
+    (5, [1])
+    >>> driver.fresh()
+    [1]
+
+A node reached two ways is kept until both are gone.  Here 3 is both a start
+and reached from 1:
+
+    >>> driver.run(edges, (1, 6, 3))
+    [1, 2, 3, 4, 5, 6, 7]
+    >>> driver.retract('start', 3)
+    (1, [1, 2, 3, 4, 5, 6, 7])
+    >>> driver.run(edges, (1, 6, 3))
+    [1, 2, 3, 4, 5, 6, 7]
+    >>> driver.retract('edge', 1, 2)
+    (1, [1, 2, 3, 4, 5, 6, 7])
+    >>> driver.retract('start', 3)
+    (5, [1, 6, 7])
+    >>> driver.fresh()
+    [1, 6, 7]
+
+The semi-naive rounds record the same justifications:
+
+    >>> driver.run(edges, (1,), semi_naive=True)
+    [1, 2, 3, 4, 5]
+    >>> driver.retract('edge', 2, 3)
+    (4, [1, 2])
+
+Restoring a snapshot taken before the retract brings the facts back:
+
+    >>> driver.run(edges, (1,))
+    [1, 2, 3, 4, 5]
+    >>> snapshot = driver.engine.snapshot()
+    >>> driver.retract('edge', 3, 4)
+    (3, [1, 2, 3])
+    >>> driver.engine.restore(snapshot)
+    >>> driver.reached()
+    [1, 2, 3, 4, 5]
+
+Facts with unhashable args are retracted too:
+
+    >>> driver.wrap((1, 2, 3))
+    ([([1], 1), ([2], 2), ([3], 3)], [(1,), (2,), (3,)])
+    >>> driver.engine.retract('graph', 'start', (2,))
+    3
+    >>> driver.facts('path'), driver.facts('end')
+    ([([1], 1), ([3], 3)], [(1,), (3,)])
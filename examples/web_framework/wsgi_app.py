@@ -52,8 +52,9 @@ class trace_cursor(object):
         return getattr(self.cursor, attr)
 
 def init(db_connection, trace_sql=False):
-    global Engine, Db_connection, Db_cursor
+    global Engine, Snapshot, Db_connection, Db_cursor
     Engine = knowledge_engine.engine(sqlgen, __file__)
+    Snapshot = None
     Db_connection = db_connection
     Db_cursor = db_connection.cursor()
     if trace_sql: Db_cursor = trace_cursor(Db_cursor)
@@ -64,7 +65,15 @@ Debug = 0
 Web_framework_dir = os.path.dirname(__file__)
 
 def gen_plan(environ, starting_tables, template_name):
-    Engine.reset()
+    global Snapshot
+    if Snapshot is None:
+        # The rule bases are activated once.  After that, restoring the
+        # snapshot only removes the facts added for the last request.
+        Engine.reset()
+        Engine.activate('database', 'web')
+        Snapshot = Engine.snapshot()
+    else:
+        Engine.restore(Snapshot)
 
     def add_fact(fb_name, env_var):
         fact_name = env_var.split('.')[-1].lower()
@@ -115,8 +124,6 @@ def gen_plan(environ, starting_tables, template_name):
         Engine.add_case_specific_fact("request", "body",
                                       (request_file.read(length),))
 
-    Engine.activate('database', 'web')
-
     try:
         no_vars, plan = \
             Engine.prove_1_goal('web.process($starting_tables, $template_name)',
@@ -4,4 +4,4 @@ version = '1.1.1'
 
 compiler_version = 1
 
-target_pkg_version = 1
+target_pkg_version = 2
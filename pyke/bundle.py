@@ -0,0 +1,218 @@
+# bundle.py
+# coding=utf-8
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+r'''
+    Frozen bundles of compiled knowledge bases.
+
+    A bundle is a single python module holding everything in the compiled_krb
+    directories for a set of search paths: the source of the generated
+    _fc, _bc and _plans modules, the compiled fact bases and question bases
+    and the saved goal cache.  An engine created from a bundle doesn't look
+    at the source files or the compiled_krb directories, or import
+    compiled_pyke_files.py, so it starts faster and the bundle is all that
+    needs to be shipped.
+
+    The bundle is written by bundle.write, and an engine is created from it
+    by passing ('*direct*', bundle_module) to knowledge_engine.engine:
+
+        >>> import os, sys, shutil, tempfile, importlib
+        >>> from pyke import knowledge_engine
+        >>> source_dir = os.path.dirname(os.path.dirname(__file__))
+        >>> family_relations_dir = \
+        ...   os.path.join(source_dir, 'examples/family_relations')
+        >>> sys.path.insert(0, family_relations_dir)
+        >>> temp_dir = tempfile.mkdtemp()
+        >>> bundle_path = os.path.join(temp_dir, 'family_bundle.py')
+        >>> write(bundle_path, family_relations_dir)
+        >>> sys.path.insert(0, temp_dir)
+        >>> family_bundle = importlib.import_module('family_bundle')
+        >>> engine = knowledge_engine.engine(('*direct*', family_bundle))
+        >>> sorted(engine.rule_bases.keys())
+        ['bc2_example', 'bc_example', 'example', 'fc_example']
+        >>> engine.activate('bc_example')
+        >>> engine.prove_1_goal(
+        ...   'bc_example.how_related(bruce, thomas, $ans)')[0]['ans']
+        ('son', 'father')
+
+    The generated modules are given names within the bundle:
+
+        >>> sys.modules['family_bundle.example_bc'].__name__
+        'family_bundle.example_bc'
+
+    Sessions of the engine work as usual:
+
+        >>> session = engine.session()
+        >>> session.activate('bc_example')
+        >>> session.prove_1_goal(
+        ...   'bc_example.how_related(bruce, thomas, $ans)')[0]['ans']
+        ('son', 'father')
+
+        >>> del sys.path[:2]
+        >>> shutil.rmtree(temp_dir)
+'''
+
+import os
+import sys
+import types
+import io
+import pyke
+from pyke import target_pkg
+
+def write(filename, *search_paths):
+    r'''Writes a bundle of the compiled knowledge bases for search_paths
+    (compiling the sources first, if needed) to the python module filename.
+    '''
+    global knowledge_engine, goal
+    try:
+        knowledge_engine
+    except NameError:
+        from pyke import knowledge_engine, goal
+    # A lazy engine compiles, but doesn't load anything.
+    engine = knowledge_engine.engine(*search_paths, lazy = True)
+    modules = []            # [(target_module, package_name, filename, source)]
+    pickles = []            # [(target_filename, data)]
+    mapped_fact_bases = []  # [(target_filename, data)]
+    goal_caches = []        # [data]
+    target_pkgs = []
+    for kb_name, targets in engine.lazy_targets.items():
+        for tp, target_filename in targets:
+            if tp not in target_pkgs: target_pkgs.append(tp)
+            full_path = os.path.join(tp.directory, target_filename)
+            if tp.loader:
+                data = tp.loader.get_data(full_path)
+            else:
+                with open(full_path, 'rb') as f:
+                    data = f.read()
+            ext = os.path.splitext(target_filename)[1]
+            if ext == '.py':
+                modules.append((target_filename[:-3], tp.package_name,
+                                full_path, data.decode('utf-8')))
+            elif ext == '.fbm':
+                mapped_fact_bases.append((target_filename, data))
+            else:
+                pickles.append((target_filename, data))
+    for tp in target_pkgs:
+        full_path = os.path.join(tp.directory, goal.Cache_filename)
+        if tp.loader:
+            try:
+                goal_caches.append(tp.loader.get_data(full_path))
+            except IOError:
+                pass
+        elif os.path.exists(full_path):
+            with open(full_path, 'rb') as f:
+                goal_caches.append(f.read())
+
+    # The _plans modules must be there before the _bc modules import them.
+    modules.sort(key = lambda module: not module[0].endswith('_plans'))
+    sys.stderr.write("writing %s\n" % filename)
+    temp_filename = '%s.%d.tmp' % (filename, os.getpid())
+    with open(temp_filename, 'w', encoding = 'utf-8') as f:
+        f.write("# %s\n\n" % os.path.basename(filename))
+        f.write("from pyke import bundle\n\n")
+        f.write("pyke_version = %r\n" % pyke.version)
+        f.write("compiler_version = %r\n\n" % pyke.compiler_version)
+        f.write("Modules = (\n")
+        for module in modules:
+            f.write("  %r,\n" % (module,))
+        f.write(")\n\n")
+        f.write("Pickles = (\n")
+        for pickled in pickles:
+            f.write("  %r,\n" % (pickled,))
+        f.write(")\n\n")
+        f.write("Mapped_fact_bases = (\n")
+        for mapped in mapped_fact_bases:
+            f.write("  %r,\n" % (mapped,))
+        f.write(")\n\n")
+        f.write("Goal_caches = (\n")
+        for data in goal_caches:
+            f.write("  %r,\n" % (data,))
+        f.write(")\n\n")
+        f.write("def populate(engine):\n")
+        f.write("    bundle.populate(engine, __name__)\n\n")
+        f.write("def load(engine):\n")
+        f.write("    bundle.load(engine, __name__)\n")
+    os.replace(temp_filename, filename)
+
+def populate(engine, bundle_name):
+    r'''Creates the rules of the bundle's generated modules in engine.
+
+    This is called (through the bundle's populate function) by engine.populate,
+    so it's also called for each session of the engine.
+    '''
+    bundle_module = sys.modules[bundle_name]
+    if bundle_module.compiler_version != pyke.compiler_version:
+        raise AssertionError("%s: incorrect pyke version: running "
+                             "%s, expected %s" %
+                               (bundle_name, pyke.version,
+                                bundle_module.pyke_version))
+    for target_module, package_name, filename, source in bundle_module.Modules:
+        module = getattr(bundle_module, target_module, None)
+        if module is None:
+            module = import_module(bundle_module, target_module, package_name,
+                                   filename, source)
+        if hasattr(module, 'populate'): module.populate(engine)
+
+def import_module(bundle_module, target_module, package_name, filename,
+                  source):
+    r'''Creates the module target_module within bundle_module from its
+    source.
+
+    The _bc modules import their _plans module from the compiled_krb
+    package, so that import is changed to import it from the bundle.
+    '''
+    module_name = bundle_module.__name__ + '.' + target_module
+    if target_module.endswith('_bc'):
+        source = source.replace(
+                   "\nfrom %s import %s_plans\n" % (package_name,
+                                                    target_module[:-3]),
+                   "\nfrom %s import %s_plans\n" % (bundle_module.__name__,
+                                                    target_module[:-3]),
+                   1)
+    module = types.ModuleType(module_name)
+    module.__file__ = filename
+    sys.modules[module_name] = module
+    try:
+        exec(compile(source, filename, 'exec'), module.__dict__)
+    except:
+        del sys.modules[module_name]
+        raise
+    setattr(bundle_module, target_module, module)
+    return module
+
+def load(engine, bundle_name):
+    r'''Registers the bundle's fact bases and question bases with engine,
+    and loads its saved goals.
+
+    This is only called for the engine (by engine.__init__); its sessions
+    copy these from the engine.
+    '''
+    global mapped_fact_base, goal
+    try:
+        mapped_fact_base
+    except NameError:
+        from pyke import mapped_fact_base, goal
+    bundle_module = sys.modules[bundle_name]
+    for filename, data in bundle_module.Pickles:
+        target_pkg.load_pickled(io.BytesIO(data), filename, engine)
+    for filename, data in bundle_module.Mapped_fact_bases:
+        mapped_fact_base.load(data, engine, filename)
+    for data in bundle_module.Goal_caches:
+        goal.load_cache(io.BytesIO(data))
@@ -0,0 +1,493 @@
+# columnar_fact_base.py
+# coding=utf-8
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+r'''
+    A columnar_fact_base is a fact_base that stores its facts by column,
+    rather than as one tuple per fact.  This is meant for large fact bases
+    (like reference data) where the memory used by all of the fact tuples
+    matters.
+
+    Integer and float columns are stored in arrays; other columns are stored
+    in lists, with their strings interned.  The indexes only store row
+    numbers.  The fact tuples are only built as they are looked up.
+
+    You create one before adding any facts to it:
+
+        >>> from pyke import knowledge_engine, contexts, pattern
+        >>> engine = knowledge_engine.engine()
+        >>> fb = columnar_fact_base(engine, 'prices')
+        >>> fb
+        <columnar_fact_base prices>
+        >>> engine.get_kb('prices') is fb
+        True
+
+    After that, it is used just like any other fact_base:
+
+        >>> engine.add_universal_fact('prices', 'price', ('bread', 4, 2.5))
+        >>> engine.add_universal_fact('prices', 'price', ('pasta', 2, 1.25))
+        >>> engine.add_universal_fact('prices', 'price', ('pasta', 2, 1.25))
+        >>> engine.assert_('prices', 'price', ('jam', 4, 3.0))
+        >>> fb.dump_universal_facts()
+        price('bread', 4, 2.5)
+        price('pasta', 2, 1.25)
+        >>> fb.dump_specific_facts()
+        price('jam', 4, 3.0)
+        >>> fb.get_stats()
+        (1, 2, 1)
+
+        >>> c = contexts.simple_context()
+        >>> with fb.lookup(c, c, 'price',
+        ...                (contexts.variable('item'),
+        ...                 pattern.pattern_literal(4),
+        ...                 contexts.variable('cost'))) as gen:
+        ...     for dummy in gen:
+        ...         print(c.lookup_data('item'), c.lookup_data('cost'))
+        bread 2.5
+        jam 3.0
+
+    Range indexes hold row numbers too:
+
+        >>> fb.add_range_index('price', 2)
+        >>> with fb.lookup(c, c, 'price',
+        ...                (contexts.variable('item'),
+        ...                 contexts.anonymous('_qty'),
+        ...                 contexts.variable('cost')),
+        ...                ranges = ((2, '<', 3.0),)) as gen:
+        ...     for dummy in gen:
+        ...         print(c.lookup_data('item'), c.lookup_data('cost'))
+        bread 2.5
+        pasta 1.25
+
+        >>> fb.reset()
+        >>> fb.dump_specific_facts()
+        >>> fb.dump_universal_facts()
+        price('bread', 4, 2.5)
+        price('pasta', 2, 1.25)
+'''
+
+import sys
+import array
+import itertools
+
+from pyke import fact_base
+
+Int_min = -2**63
+Int_max = 2**63 - 1
+
+class columnar_fact_base(fact_base.fact_base):
+    def __init__(self, engine, name, register = True):
+        super(columnar_fact_base, self).__init__(engine, name, register)
+        self.entity_list_type = columnar_fact_list
+
+class column_store(object):
+    r'''
+        A sequence of fact tuples, stored by column.
+
+        Facts of different lengths may be mixed.  Each length gets its own
+        set of columns.
+
+            >>> cs = column_store()
+            >>> cs.append(('a', 1, 2.0))
+            >>> cs.append(('b', 2**70, None))
+            >>> cs.append(())
+            >>> cs.append((True,))
+            >>> len(cs)
+            4
+            >>> list(cs)
+            [('a', 1, 2.0), ('b', 1180591620717411303424, None), (), (True,)]
+            >>> cs[1], cs[-1]
+            (('b', 1180591620717411303424, None), (True,))
+            >>> ('a', 1, 2.0) in cs, ('a', 1, 3.0) in cs, (1,) in cs
+            (True, False, True)
+            >>> cs.get_args(0, (0, 2))
+            ('a', 2.0)
+    '''
+    def __init__(self):
+        self.columns = {}       # {length: [column...]}
+        self.counts = {}        # {length: num_rows}
+        self.length = None      # length of all rows, until there are two
+        self.directory = None   # array of (length << 32 | row_in_length)
+                                #   once there are rows of different lengths
+        self.num_rows = 0
+
+    def __len__(self): return self.num_rows
+
+    def __iter__(self):
+        for row in range(self.num_rows): yield self[row]
+
+    def __getitem__(self, row):
+        if row < 0: row += self.num_rows
+        if not 0 <= row < self.num_rows:
+            raise IndexError("column_store index out of range")
+        length, row = self._locate(row)
+        return tuple(column[row] for column in self.columns[length])
+
+    def get_args(self, row, indices):
+        length, row = self._locate(row)
+        columns = self.columns[length]
+        return tuple(columns[i][row] for i in indices)
+
+    def _locate(self, row):
+        if self.directory is None: return self.length, row
+        ref = self.directory[row]
+        return ref >> 32, ref & 0xffffffff
+
+    def __contains__(self, args):
+        length = len(args)
+        if not self.counts.get(length): return False
+        columns = self.columns[length]
+        if self.directory is None:
+            rows = range(self.counts[length])
+        else:
+            rows = (ref & 0xffffffff for ref in self.directory
+                                      if ref >> 32 == length)
+        return any(all(column[row] == arg
+                       for column, arg in zip(columns, args))
+                   for row in rows)
+
+    def append(self, args):
+        length = len(args)
+        columns = self.columns.get(length)
+        if columns is None:
+            columns = self.columns[length] = [None] * length
+            self.counts[length] = 0
+        for i, arg in enumerate(args):
+            columns[i] = self._add_to_column(columns[i], arg)
+        row_in_length = self.counts[length]
+        self.counts[length] += 1
+        if self.length is None and self.directory is None:
+            self.length = length
+        elif self.directory is None and length != self.length:
+            self.directory = \
+                array.array('q', ((self.length << 32) | row
+                                  for row in range(self.num_rows)))
+            self.length = None
+        if self.directory is not None:
+            self.directory.append((length << 32) | row_in_length)
+        self.num_rows += 1
+
+    def pop(self):
+        r'''Removes and returns the last row.
+
+            >>> cs = column_store()
+            >>> for args in ((1, 'a'), (2,), (3, 'c')): cs.append(args)
+            >>> cs.pop(), cs.pop(), list(cs)
+            ((3, 'c'), (2,), [(1, 'a')])
+            >>> cs.append((4, 'd'))
+            >>> list(cs)
+            [(1, 'a'), (4, 'd')]
+        '''
+        ans = self[-1]
+        length = len(ans)
+        self.counts[length] -= 1
+        for column in self.columns[length]: del column[-1]
+        if self.directory is not None: del self.directory[-1]
+        self.num_rows -= 1
+        return ans
+
+    @staticmethod
+    def _add_to_column(column, arg):
+        r'''Returns the column, which may have to be replaced by a list to
+        hold arg.
+        '''
+        if column is None:
+            if type(arg) is int and Int_min <= arg <= Int_max:
+                return array.array('q', (arg,))
+            if type(arg) is float:
+                return array.array('d', (arg,))
+            column = []
+        elif isinstance(column, array.array):
+            if column.typecode == 'q' and type(arg) is int and \
+               Int_min <= arg <= Int_max or \
+               column.typecode == 'd' and type(arg) is float:
+                column.append(arg)
+                return column
+            column = list(column)
+        if type(arg) is str: arg = sys.intern(arg)
+        column.append(arg)
+        return column
+
+    def get_size(self):
+        r'''Returns the approximate number of bytes used by the columns.
+        '''
+        return sum(sys.getsizeof(column)
+                   for columns in self.columns.values()
+                   for column in columns)
+
+class row_view(object):
+    r'''
+        The "other" arguments of the facts whose row codes are in an index
+        entry.  The tuples are built as they are iterated over.
+    '''
+    def __init__(self, fact_list, other_indices, row_codes):
+        self.fact_list = fact_list
+        self.other_indices = other_indices
+        self.row_codes = row_codes
+
+    def __len__(self):
+        if isinstance(self.row_codes, int): return 1
+        return len(self.row_codes)
+
+    def __iter__(self):
+        universal = self.fact_list.universal_facts
+        case_specific = self.fact_list.case_specific_facts
+        other_indices = self.other_indices
+        row_codes = self.row_codes
+        if isinstance(row_codes, int): row_codes = (row_codes,)
+        for code in row_codes:
+            yield (case_specific if code & 1 else universal) \
+                    .get_args(code >> 1, other_indices)
+
+class columnar_fact_list(fact_base.fact_list):
+    r'''
+        The indexes map the selected args to a row code, or an array of row
+        codes if there is more than one.  Each row code is the row number
+        times 2, plus 1 for case specific facts.
+
+        An index on the first argument is always declared.  It is used to
+        check for duplicate facts.
+
+        Facts whose indexed args aren't hashable are left out of that index,
+        and are found by scanning for the (unhashable) args that they match:
+
+            >>> fl = columnar_fact_list('f')
+            >>> fl.store_case_specific_fact(([1], 2))
+            True
+            >>> fl.store_case_specific_fact(([1], 2))
+            False
+            >>> fl.store_case_specific_fact((3, 4))
+            True
+            >>> fl.has_fact(([1], 2)), fl._get_hashed(2, (0,), ([1],))
+            (True, ((1,), [(2,)]))
+            >>> fl.pop_case_specific_fact(); fl.pop_case_specific_fact()
+            >>> fl.has_fact(([1], 2))
+            False
+    '''
+    def __init__(self, name):
+        super(columnar_fact_list, self).__init__(name)
+        self.universal_facts = column_store()
+        self.case_specific_facts = column_store()
+        self.add_index((0,))
+
+    def reset(self):
+        super(columnar_fact_list, self).reset()
+        self.case_specific_facts = column_store()
+
+    def _get_hashed(self, length, indices, args):
+        try:
+            other_indices, rows = \
+                super(columnar_fact_list, self)._get_hashed(length, indices,
+                                                            args)
+        except TypeError:
+            # Unhashable args, see _add_row_to_index.
+            return self._scan(length, indices, args)
+        if isinstance(rows, (int, array.array)):
+            return other_indices, row_view(self, other_indices, rows)
+        return other_indices, rows
+
+    def _hash(self, length, indices):
+        args_hash = {}
+        new_entry = (tuple(i for i in range(length) if i not in indices),
+                     args_hash)
+        self.hashes[length, indices] = new_entry
+        self.index_sizes[length, indices] = 0
+        self.num_indexes_built += 1
+        for flag, facts in ((0, self.universal_facts),
+                            (1, self.case_specific_facts)):
+            for row, args in enumerate(facts):
+                if len(args) == length:
+                    self._add_row_to_index(length, indices, args_hash,
+                                           (row << 1) | flag, args)
+        self._check_budget((length, indices))
+        return new_entry
+
+    def _add_row_to_index(self, length, indices, arg_map, code, args):
+        selected_args = tuple(args[i] for i in indices)
+        try:
+            rows = arg_map.get(selected_args)
+        except TypeError:
+            # Found by scanning instead, see _find and _get_hashed.
+            return
+        if rows is None:
+            arg_map[selected_args] = code
+            size = sys.getsizeof(selected_args) + sys.getsizeof(code) + \
+                   3 * fact_base.Pointer_size   # for the dict entry
+        elif isinstance(rows, int):
+            arg_map[selected_args] = array.array('q', (rows, code))
+            size = sys.getsizeof(arg_map[selected_args]) - \
+                   sys.getsizeof(rows)
+        else:
+            rows.append(code)
+            size = rows.itemsize
+        self.index_sizes[length, indices] += size
+        if indices not in self.declared_indexes: self.index_bytes += size
+
+    def _find(self, args):
+        r'''Returns None if args is not present, else 0 if args is a
+        universal fact and 1 if args is a case specific fact.
+        '''
+        length = len(args)
+        if length == 0:
+            if self.universal_facts.counts.get(0): return 0
+            if self.case_specific_facts.counts.get(0): return 1
+            return None
+        entry = self.hashes.get((length, (0,)))
+        if entry is None: entry = self._hash(length, (0,))
+        try:
+            rows = entry[1].get((args[0],))
+        except TypeError:
+            # Unhashable, so these facts aren't in the index.
+            if args in self.universal_facts: return 0
+            if args in self.case_specific_facts: return 1
+            return None
+        if rows is None: return None
+        if isinstance(rows, int): rows = (rows,)
+        for code in rows:
+            if (self.case_specific_facts if code & 1
+                                         else self.universal_facts) \
+                 [code >> 1] == args:
+                return code & 1
+        return None
+
+    def add_universal_fact(self, args):
+        found = self._find(args)
+        assert found != 1, \
+               "add_universal_fact: fact already present as specific fact"
+        if found is None:
+            self.universal_facts.append(args)
+            self._add_row((len(self.universal_facts) - 1) << 1, args)
+
+    def add_universal_facts(self, facts):
+        # The duplicates are found through the index on the first argument,
+        # as for store_case_specific_facts.
+        new_facts = []
+        for args in facts:
+            num_facts = len(self.universal_facts)
+            self.add_universal_fact(args)
+            if len(self.universal_facts) > num_facts: new_facts.append(args)
+        return new_facts
+
+    def store_case_specific_fact(self, args):
+        if self._find(args) is None:
+            self.case_specific_facts.append(args)
+            self._add_row(((len(self.case_specific_facts) - 1) << 1) | 1,
+                          args)
+            return True
+        return False
+
+    def store_case_specific_facts(self, facts):
+        # The duplicates are found through the index on the first argument,
+        # which is kept up to date as each fact is added.
+        return [args for args in facts if self.store_case_specific_fact(args)]
+
+    def retract_facts(self, facts):
+        r'''
+            >>> fl = columnar_fact_list('f')
+            >>> for args in ((1, 2), ([3], 4), (5, 6)):
+            ...     fl.store_case_specific_fact(args)
+            True
+            True
+            True
+            >>> fl.retract_facts({(5, 6)})
+            [(5, 6)]
+            >>> fl.retract_facts([([3], 4)])
+            [([3], 4)]
+            >>> list(fl.case_specific_facts)
+            [(1, 2)]
+        '''
+        if not isinstance(facts, fact_base.fact_set):
+            facts = fact_base.fact_set(facts)
+        removed = [args for args in self.case_specific_facts if args in facts]
+        if removed:
+            self.replace_case_specific_facts(
+              [args for args in self.case_specific_facts if args not in facts])
+        return removed
+
+    def replace_case_specific_facts(self, facts):
+        # The indexes hold row numbers, which change; so they are rebuilt as
+        # they are needed.
+        self.case_specific_facts = column_store()
+        self.hashes.clear()
+        self.index_sizes.clear()
+        self.index_bytes = 0
+        self.range_indexes.clear()
+        for args in facts: self.store_case_specific_fact(args)
+
+    def has_fact(self, args):
+        return self._find(args) is not None
+
+    def pop_case_specific_fact(self):
+        code = ((len(self.case_specific_facts) - 1) << 1) | 1
+        args = self.case_specific_facts.pop()
+        for (length, indices), (other_indices, arg_map) in self.hashes.items():
+            if length == len(args):
+                self._remove_row_from_index(length, indices, arg_map, code,
+                                            args)
+        if self.range_indexes: self._remove_from_ranges(((code, args),))
+
+    def _remove_row_from_index(self, length, indices, arg_map, code, args):
+        selected_args = tuple(args[i] for i in indices)
+        try:
+            rows = arg_map[selected_args]
+        except TypeError:
+            return      # not in the index, see _add_row_to_index
+        if isinstance(rows, int):
+            del arg_map[selected_args]
+            size = sys.getsizeof(selected_args) + sys.getsizeof(code) + \
+                   3 * fact_base.Pointer_size
+        else:
+            # Normally the last one, unless universal facts were added since.
+            del rows[len(rows) - 1 - rows[::-1].index(code)]
+            size = rows.itemsize
+        self.index_sizes[length, indices] -= size
+        if indices not in self.declared_indexes: self.index_bytes -= size
+
+    def _add_row(self, code, args):
+        if self.hashes:
+            for (length, indices), (other_indices, arg_map) \
+             in self.hashes.items():
+                if length == len(args):
+                    self._add_row_to_index(length, indices, arg_map, code,
+                                           args)
+            self._check_budget()
+        if self.range_indexes: self._add_to_ranges(((code, args),))
+
+    def _range_rows(self):
+        # The range indexes hold row codes, like the other indexes.
+        for flag, facts in ((0, self.universal_facts),
+                            (1, self.case_specific_facts)):
+            for row, args in enumerate(facts):
+                yield (row << 1) | flag, args
+
+    def _range_fact(self, code):
+        return (self.case_specific_facts if code & 1
+                                         else self.universal_facts)[code >> 1]
+
+    def _range_position(self, code):
+        return code & 1, code >> 1
+
+    def _is_range_row(self, range_code, code):
+        return range_code == code
+
+    def add_args(self, args):
+        raise AssertionError("columnar_fact_list.add_args: "
+                             "facts must be added through "
+                             "add_universal_fact or add_case_specific_fact")
@@ -167,10 +167,47 @@ _Not_found = unique.unique('Not_found')
 # Set to a sequence (or frozenset) of variable names to trace their bindings:
 debug = ()
 
+# Shared by all contexts until they bind their first variable or save their
+# first undo.  These are never changed.
+_No_bindings = {}
+_No_undos = ()
+
 class simple_context(object):
+    r'''
+        Contexts are created for every rule tried (whether its head matches
+        or not), so they are kept small: they have no instance dict, and the
+        bindings dict and undo_list aren't created until they are needed.
+
+        The bindings are kept by variable name, not in arrays indexed by
+        variable numbers.  Variables are bound and looked up by name from the
+        other contexts (the caller's patterns, the plans and the python
+        premises), so each of those would still need a name to number map.
+
+            >>> c = simple_context()
+            >>> c.bindings is _No_bindings, c.undo_list is _No_undos
+            (True, True)
+            >>> c2 = simple_context()
+            >>> c.bind('a', c2, 1)
+            True
+            >>> c.bindings is _No_bindings, c.undo_list == [('a', c2)]
+            (True, True)
+            >>> c2.bindings
+            {'a': (1, None)}
+            >>> c.undo_to_mark(0)
+            >>> c2.bindings
+            {}
+            >>> _No_bindings, _No_undos
+            ({}, ())
+            >>> c.foo = 1
+            Traceback (most recent call last):
+                ...
+            AttributeError: 'simple_context' object has no attribute 'foo'
+    '''
+    __slots__ = ('bindings', 'undo_list', 'save_all_undo_count')
+
     def __init__(self):
-        self.bindings = {}
-        self.undo_list = []
+        self.bindings = _No_bindings
+        self.undo_list = _No_undos
         self.save_all_undo_count = 0
 
     def dump(self):
@@ -200,14 +237,22 @@ class simple_context(object):
                 else:
                     sys.stderr.write("binding %s in %s to %s\n" %
                         (var_name, var_context, val))
-            self.bindings[var_name] = (val, val_context)
-            if self.save_all_undo_count:
-                self.undo_list.append((var_name, self))
+            if self.bindings is _No_bindings:
+                self.bindings = {var_name: (val, val_context)}
+            else:
+                self.bindings[var_name] = (val, val_context)
+            if self.save_all_undo_count: self._add_undo(var_name, self)
             return True
         ans = var_context.bind(var_name, var_context, val, val_context)
-        if ans: self.undo_list.append((var_name, var_context))
+        if ans: self._add_undo(var_name, var_context)
         return ans
 
+    def _add_undo(self, var_name, var_context):
+        if self.undo_list is _No_undos:
+            self.undo_list = [(var_name, var_context)]
+        else:
+            self.undo_list.append((var_name, var_context))
+
     def is_bound(self, var):
         val, where = var, self
         while where is not None and isinstance(val, variable):
@@ -232,6 +277,10 @@ class simple_context(object):
         val, context = binding
         if context is not None:
             val = val.as_data(context, allow_vars, final)
+        elif isinstance(val, pattern.tuple_slice):
+            # Copied once, when first needed as data.
+            val = tuple(val)
+            self.bindings[var_name] = val, None
         if isinstance(val, bc_context): val = val.create_plan(final)
         if final is not None: final[var_name, self] = val
         return val
@@ -262,9 +311,10 @@ class simple_context(object):
         self.save_all_undo_count -= 1
 
     def undo_to_mark(self, mark, *var_names_to_undo):
-        for var_name, var_context in self.undo_list[mark:]:
-            var_context._unbind(var_name)
-        del self.undo_list[mark:]
+        if len(self.undo_list) > mark:
+            for var_name, var_context in self.undo_list[mark:]:
+                var_context._unbind(var_name)
+            del self.undo_list[mark:]
         for var_name in var_names_to_undo:
             self._unbind(var_name)
 
@@ -280,8 +330,12 @@ class simple_context(object):
         del self.bindings[var_name]
 
 class bc_context(simple_context):
+    __slots__ = ('rule',)
+
     def __init__(self, rule):
-        super(bc_context, self).__init__()
+        self.bindings = _No_bindings
+        self.undo_list = _No_undos
+        self.save_all_undo_count = 0
         self.rule = rule
 
     def name(self): return self.rule.name
@@ -309,6 +363,10 @@ class variable(pattern.pattern):
     def __init__(self, name):
         self.name = name
 
+    def __getnewargs__(self):
+        # So that unpickling goes through __new__ too.
+        return (self.name,)
+
     def __repr__(self): return '$' + self.name
 
     def lookup(self, my_context, allow_variable_in_ans = False):
@@ -345,7 +403,35 @@ class variable(pattern.pattern):
             return True
         if var_context is None:
             return pattern_b.match_data(bindings, b_context, var)
-        return var.match_pattern(bindings, var_context, pattern_b, b_context)
+        return pattern.unify(bindings, var, var_context, pattern_b, b_context)
+
+    def _match_data_step(self, bindings, my_context, data, stack):
+        var, var_context = my_context.lookup(self, True)
+        if isinstance(var, variable):
+            bindings.bind(var.name, var_context, data)
+            return True
+        if var_context is None: return var == data
+        stack.append((var, var_context, data, None))
+        return True
+
+    def _match_pattern_step(self, bindings, my_context, pattern_b, b_context,
+                            stack):
+        var, var_context = my_context.lookup(self, True)
+        if isinstance(var, variable):
+            bindings.bind(var.name, var_context, pattern_b, b_context)
+            return True
+        if var_context is None:
+            stack.append((pattern_b, b_context, var, None))
+        else:
+            stack.append((var, var_context, pattern_b, b_context))
+        return True
+
+    def _tuple_value(self, my_context, final):
+        if final is None:
+            val, where = my_context.lookup(self, True)
+            if where is not None and isinstance(val, pattern.pattern_tuple):
+                return val, where
+        return None, None
 
     def as_data(self, my_context, allow_vars = False, final = None):
         return my_context.lookup_data(self.name, allow_vars, final)
@@ -369,6 +455,13 @@ class anonymous(variable):
     def match_pattern(self, bindings, my_context, pattern_b, b_context):
         return True
 
+    def _match_data_step(self, bindings, my_context, data, stack):
+        return True
+
+    def _match_pattern_step(self, bindings, my_context, pattern_b, b_context,
+                            stack):
+        return True
+
     def as_data(self, my_context, allow_vars = False, final = None):
         if allow_vars: return "$%s" % self.name
         raise KeyError("$%s not bound" % self.name)
@@ -84,17 +84,82 @@
         some_fact('a', 3, ('hi', 'mom'))
         some_other_fact()
 
+    Each fact_list builds an index the first time it sees a new lookup
+    shape (the number of arguments and which of them are bound).  These
+    indexes are maintained as new facts are added.  An index may also be
+    declared ahead of time, by the argument positions that will be bound.
+    Declared indexes are never discarded (see Index_budget, below).
+
+        >>> from pyke import pattern
+        >>> fb.add_index('some_fact', (0,))
+        >>> c = contexts.simple_context()
+        >>> with fb.lookup(c, c, 'some_fact',
+        ...                (pattern.pattern_literal('a'),
+        ...                 contexts.variable('n'),
+        ...                 contexts.anonymous('_x'))) as gen:
+        ...     for dummy in gen: print(c.lookup_data('n'))
+        2
+        3
+        >>> num_indexes, index_bytes, num_built, num_evicted, num_scans = \\
+        ...   fb.get_stats(indexes=True)[3]
+        >>> num_indexes, num_built, num_evicted, num_scans
+        (1, 1, 0, 0)
+
 '''
 
+import sys
+import bisect
+import operator
 import itertools
 import contextlib
+import collections
 from pyke import knowledge_base, contexts
 
+# The approximate number of bytes that each fact_list may use for the
+# indexes that it builds on its own for new lookup shapes.  When this is
+# exceeded, the least recently used of these indexes are discarded (to be
+# rebuilt if they are needed again).  Declared indexes (see
+# fact_base.add_index) are not counted and are never discarded.  None means
+# no limit.
+Index_budget = None
+
+# The number of lookups of a new shape before an index is built for it.
+# Until then, the facts are simply scanned.  This saves building (and
+# maintaining) an index for shapes that are rarely used.  Declared indexes
+# are built on their first lookup.
+Index_threshold = 1
+
+# The cardinality statistics of a fact_list (see fact_list.get_cardinality)
+# are recomputed once the number of facts has changed by more than this
+# fraction since they were last computed.
+Stats_drift = 0.1
+
+Pointer_size = sys.getsizeof((None,)) - sys.getsizeof(())
+
+# The tests for the ranges passed to fact_list.lookup, by op.
+Range_tests = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    'prefix': lambda arg, prefix: arg.startswith(prefix),
+}
+
 class fact_base(knowledge_base.knowledge_base):
     ''' Not much to fact_bases.  The real work is done in fact_list! '''
     def __init__(self, engine, name, register = True):
         super(fact_base, self).__init__(engine, name, fact_list, register)
 
+    def copy_for(self, engine):
+        r'''Returns a copy of this fact_base for engine (a session) that
+        shares the universal facts, but not the case specific facts.
+        '''
+        ans = self.__class__(engine, self.name)
+        for fl_name, fact_list in self.entity_lists.items():
+            ans.entity_lists[fl_name] = fact_list.shared_copy()
+        return ans
+
     def dump_universal_facts(self):
         for fl_name in sorted(self.entity_lists.keys()):
             self.entity_lists[fl_name].dump_universal_facts()
@@ -103,22 +168,174 @@ class fact_base(knowledge_base.knowledge_base):
         for fl_name in sorted(self.entity_lists.keys()):
             self.entity_lists[fl_name].dump_specific_facts()
 
+    def get_cardinality(self, fact_name):
+        r'''Returns num_facts, (num_distinct_args...) for fact_name (see
+        fact_list.get_cardinality).
+        '''
+        return self.get_entity_list(fact_name).get_cardinality()
+
+    def add_range_index(self, fact_name, arg_position):
+        r'''Declares a sorted index on the arg_position of fact_name, for
+        the range lookups done for check premises.
+        '''
+        self.get_entity_list(fact_name).add_range_index(arg_position)
+
+    def lookup(self, bindings, pat_context, entity_name, patterns,
+               matched = None, ranges = None):
+        fact_list = self.entity_lists.get(entity_name)
+        if fact_list is None: return knowledge_base.Gen_empty
+        return fact_list.lookup(bindings, pat_context, patterns, matched,
+                                ranges)
+
     def add_universal_fact(self, fact_name, args):
         self.get_entity_list(fact_name).add_universal_fact(args)
+        if self.engine is not None: self.engine.clear_tables()
+
+    def add_universal_facts(self, fact_name, facts):
+        self.get_entity_list(fact_name).add_universal_facts(facts)
+        if self.engine is not None: self.engine.clear_tables()
 
     def add_case_specific_fact(self, fact_name, args):
-        self.get_entity_list(fact_name).add_case_specific_fact(args)
+        fact_list = self.get_entity_list(fact_name)
+        self.changing(fact_list)
+        if self.engine is not None and self.engine.justifications is not None:
+            self.engine.justifications.add(fact_list, args)
+        if self.engine is not None and self.engine.fc_batch is not None:
+            # Semi-naive forward-chaining, see fc_rule.delta_batch
+            self.engine.fc_batch.add(fact_list, args)
+        else:
+            fact_list.add_case_specific_fact(args)
+        if self.engine is not None: self.engine.clear_tables()
+
+    def add_case_specific_facts(self, fact_name, facts):
+        r'''Adds each of the facts (tuples of args) as a case specific fact.
+
+        Within a batch (see engine.bulk_load), the facts are only added at
+        the end of the batch.  Otherwise, they are all added, with the
+        indexes updated once for all of them, before any fc_rules are
+        triggered.
+        '''
+        fact_list = self.get_entity_list(fact_name)
+        self.changing(fact_list)
+        if self.engine is not None and self.engine.justifications is not None:
+            facts = self.engine.justifications.adding(fact_list, facts)
+        if self.engine is not None and self.engine.fc_batch is not None:
+            add = self.engine.fc_batch.add
+            for args in facts: add(fact_list, args)
+        else:
+            for args in fact_list.store_case_specific_facts(facts):
+                fact_list.trigger_fc_rules(args)
+        if self.engine is not None: self.engine.clear_tables()
 
     def assert_(self, fact_name, args):
         self.add_case_specific_fact(fact_name, args)
 
-    def get_stats(self):
+    def retract(self, fact_name, args):
+        r'''Retracts the case specific fact args (see retract_facts).
+        '''
+        fact_list = self.entity_lists.get(fact_name)
+        if fact_list is None or args not in fact_list.case_specific_facts:
+            return 0
+        return self.retract_facts(((fact_list, args),))
+
+    def retract_where(self, fact_name, test):
+        r'''Retracts the case specific facts for which test(args) is True
+        (see retract_facts).
+        '''
+        fact_list = self.entity_lists.get(fact_name)
+        if fact_list is None: return 0
+        return self.retract_facts([(fact_list, args)
+                                   for args in fact_list.case_specific_facts
+                                    if test(args)])
+
+    def retract_facts(self, facts):
+        r'''Retracts facts, a sequence of (fact_list, args), along with the
+        facts derived from them that are no longer justified, if the engine
+        is doing truth maintenance (see pyke.truth_maintenance).  Returns
+        the number of facts retracted.
+
+        The indexes are updated as the facts are removed.  The fc_rules are
+        not rerun, so the facts derived from notany premises aren't added
+        back.
+
+            >>> from pyke import knowledge_engine
+            >>> engine = knowledge_engine.engine()
+            >>> fb = fact_base(engine, 'fb')
+            >>> for i in range(5): fb.assert_('f', (i, i % 2))
+            >>> fb.retract('f', (2, 0)), fb.retract('f', (2, 0))
+            (1, 0)
+            >>> fb.retract_where('f', lambda args: args[1] == 1)
+            2
+            >>> fb.dump_specific_facts()
+            f(0, 0)
+            f(4, 0)
+
+        Facts with unhashable args are matched by ==:
+
+            >>> fb.assert_('f', ([3], 4))
+            >>> fb.retract('f', (4, 0)), fb.retract('f', ([3], 4))
+            (1, 1)
+            >>> fb.dump_specific_facts()
+            f(0, 0)
+        '''
+        if not facts: return 0
+        engine = self.engine
+        if engine is not None and engine.fc_network is not None:
+            raise AssertionError("fact_base.retract: facts can't be "
+                                 "retracted with the fc_network")
+        if engine is not None and engine.justifications is not None:
+            removing = engine.justifications.retract(facts)
+        else:
+            removing = {}
+            for fact_list, args in facts:
+                removing.setdefault(fact_list, fact_set()).add(args)
+        ans = 0
+        for fact_list, args in removing.items():
+            self.changing(fact_list)
+            ans += len(fact_list.retract_facts(args))
+        if engine is not None: engine.clear_tables()
+        return ans
+
+    def add_fc_rule_ref(self, fact_name, fc_rule, foreach_index):
+        fact_list = self.get_entity_list(fact_name)
+        self.changing(fact_list)
+        fact_list.add_fc_rule_ref(fc_rule, foreach_index)
+
+    def changing(self, fact_list):
+        r'''Called before fact_list's case specific facts or fc_rule refs
+        are changed, so that the engine's snapshot (if any) can save it.
+        '''
+        if self.engine is not None and self.engine.cur_snapshot is not None:
+            self.engine.cur_snapshot.save(fact_list)
+
+    def add_index(self, fact_name, arg_positions):
+        r'''Declares an index on the arg_positions of fact_name.
+
+        The index is built the first time that it's used, and is kept up to
+        date from then on.
+        '''
+        self.get_entity_list(fact_name).add_index(arg_positions)
+
+    def get_stats(self, indexes = False):
+        r'''Returns num_fact_lists, num_universal, num_case_specific.
+
+        If indexes is True, a fourth value is added which is a tuple of:
+        num_indexes, index_bytes, num_built, num_evicted, num_scans summed
+        over all of the fact_lists.
+        '''
         num_fact_lists = num_universal = num_case_specific = 0
+        index_stats = (0, 0, 0, 0, 0)
         for fact_list in self.entity_lists.values():
             universal, case_specific = fact_list.get_stats()
             num_universal += universal
             num_case_specific += case_specific
             num_fact_lists += 1
+            if indexes:
+                index_stats = tuple(map(lambda a, b: a + b, index_stats,
+                                        fact_list.get_index_stats()))
+        if indexes:
+            return num_fact_lists, num_universal, num_case_specific, \
+                   index_stats
         return num_fact_lists, num_universal, num_case_specific
 
     def print_stats(self, f):
@@ -127,19 +344,415 @@ class fact_base(knowledge_base.knowledge_base):
                 "%d case_specific facts\n" %
                 (self.name, num_fact_lists, num_universal, num_case_specific))
 
+def _range_bounds(keys, op, value):
+    r'''Returns lo, hi of the keys (a sorted list) in range.
+
+        >>> keys = [1, 2, 2, 3]
+        >>> [_range_bounds(keys, op, 2) for op in ('<', '<=', '>', '>=', '==')]
+        [(0, 1), (0, 3), (3, 4), (1, 4), (1, 3)]
+        >>> _range_bounds(['pa', 'pb', 'pb\U0010ffff', 'pc', 'q'],
+        ...               'prefix', 'pb')
+        (1, 3)
+    '''
+    if op == '<': return 0, bisect.bisect_left(keys, value)
+    if op == '<=': return 0, bisect.bisect_right(keys, value)
+    if op == '>': return bisect.bisect_right(keys, value), len(keys)
+    if op == '>=': return bisect.bisect_left(keys, value), len(keys)
+    if op == '==':
+        return bisect.bisect_left(keys, value), \
+               bisect.bisect_right(keys, value)
+    assert op == 'prefix'
+    if not isinstance(value, str):
+        raise TypeError("prefix range on %s" % type(value).__name__)
+    lo = bisect.bisect_left(keys, value)
+    # The first string after all of those starting with value.
+    end = value.rstrip(chr(sys.maxunicode))
+    if not end: return lo, len(keys)
+    end = end[:-1] + chr(ord(end[-1]) + 1)
+    return lo, bisect.bisect_left(keys, end)
+
+def _may_pass(test, arg, value):
+    try:
+        return bool(test(arg, value))
+    except Exception:
+        # Left for the check premise to decide.
+        return True
+
+class fact_set(object):
+    r'''
+        A set of facts (or of tuples holding facts) that may have
+        unhashable args.  These are kept in a list and found by ==.
+
+            >>> s = fact_set([(1,), ([2],), (1,), ([2],)])
+            >>> len(s), (1,) in s, ([2],) in s, ([3],) in s, (3,) in s
+            (2, True, True, False, False)
+            >>> s.discard(([2],)); s.discard(([3],)); s.add((4,))
+            >>> sorted(s)
+            [(1,), (4,)]
+    '''
+    def __init__(self, facts = ()):
+        self.hashed = set()
+        self.unhashable = []
+        for args in facts: self.add(args)
+
+    def add(self, args):
+        try:
+            self.hashed.add(args)
+        except TypeError:
+            if args not in self.unhashable: self.unhashable.append(args)
+
+    def discard(self, args):
+        try:
+            self.hashed.discard(args)
+        except TypeError:
+            if args in self.unhashable: self.unhashable.remove(args)
+
+    def remove(self, args):
+        if args not in self: raise KeyError(args)
+        self.discard(args)
+
+    def __contains__(self, args):
+        try:
+            if args in self.hashed: return True
+        except TypeError:
+            pass
+        return bool(self.unhashable) and args in self.unhashable
+
+    def __iter__(self):
+        return itertools.chain(self.hashed, self.unhashable)
+
+    def __len__(self):
+        return len(self.hashed) + len(self.unhashable)
+
+class fact_dict(object):
+    r'''
+        A dict keyed by facts (or by tuples holding facts) that may have
+        unhashable args.  These are kept in a list and found by ==.
+
+            >>> d = fact_dict()
+            >>> d[(1,)] = 'a'; d[([2],)] = 'b'; d[([2],)] = 'c'
+            >>> d[([2],)], d.get(([3],)), ([2],) in d, (1,) in d
+            ('c', None, True, True)
+            >>> d.pop(([2],)), d.pop(([2],), None), ([2],) in d
+            ('c', None, False)
+    '''
+    def __init__(self):
+        self.hashed = {}
+        self.unhashable = []    # [(key, value)]
+
+    def _find(self, key):
+        for i, (k, value) in enumerate(self.unhashable):
+            if k == key: return i
+        return None
+
+    def get(self, key, default = None):
+        try:
+            if key in self.hashed: return self.hashed[key]
+        except TypeError:
+            pass
+        if self.unhashable:
+            i = self._find(key)
+            if i is not None: return self.unhashable[i][1]
+        return default
+
+    def __getitem__(self, key):
+        ans = self.get(key, self)
+        if ans is self: raise KeyError(key)
+        return ans
+
+    def __contains__(self, key):
+        return self.get(key, self) is not self
+
+    def __setitem__(self, key, value):
+        try:
+            self.hashed[key] = value
+        except TypeError:
+            i = self._find(key)
+            if i is None: self.unhashable.append((key, value))
+            else: self.unhashable[i] = key, value
+
+    def pop(self, key, default = None):
+        try:
+            if key in self.hashed: return self.hashed.pop(key)
+        except TypeError:
+            pass
+        i = self._find(key) if self.unhashable else None
+        if i is None: return default
+        return self.unhashable.pop(i)[1]
+
 class fact_list(knowledge_base.knowledge_entity_list):
+    r'''
+        Undeclared indexes are only built once their shape has been looked
+        up Index_threshold times, and are discarded, least recently used
+        first, when they grow beyond the index_budget (which defaults to
+        Index_budget).
+
+            >>> from pyke import pattern, fact_base
+            >>> fl = fact_list('f')
+            >>> for i in range(10): fl.add_universal_fact((i, i % 3))
+            >>> def count(*patterns):
+            ...     c = contexts.simple_context()
+            ...     with fl.lookup(c, c, patterns) as gen:
+            ...         return len(tuple(gen))
+            >>> x = contexts.variable('x')
+            >>> one = pattern.pattern_literal(1)
+            >>> two = pattern.pattern_literal(2)
+            >>> fact_base.Index_threshold = 2
+            >>> count(one, x), fl.get_index_stats()[2:]
+            (1, (0, 0, 1))
+            >>> count(x, one), fl.get_index_stats()[2:]
+            (3, (0, 0, 2))
+            >>> count(two, x), fl.get_index_stats()[2:]
+            (1, (1, 0, 2))
+            >>> fl.index_budget = fl.get_index_stats()[1]
+            >>> count(x, two), fl.get_index_stats()[2:]
+            (3, (2, 1, 2))
+            >>> fl.get_index_stats()[0]
+            1
+            >>> fact_base.Index_threshold = 1
+    '''
     def __init__(self, name):
         super(fact_list, self).__init__(name)
         self.universal_facts = []               # [(arg...)...]
         self.case_specific_facts = []           # [(arg...)...]
-        self.hashes = {}        # (len, (index...)): (other_indices,
+        self.hashes = collections.OrderedDict()
+                                # (len, (index...)): (other_indices,
                                 #       {(arg...): [other_args_from_factn...]})
+                                # in least recently used order.
+        self.declared_indexes = set()   # {(index...)}
+        self.index_sizes = {}   # (len, (index...)): approx bytes
+        self.index_bytes = 0    # approx bytes used by undeclared indexes
+        self.shape_lookups = {} # (len, (index...)): num_lookups, for shapes
+                                #   that haven't been indexed yet.
+        self.index_budget = None        # None means use Index_budget
         self.fc_rule_refs = []  # (fc_rule, foreach_index)
+        self.cardinality = None # (num_facts, (num_distinct_args...)), as of
+                                #   the last get_cardinality.
+        self.range_positions = set()    # {position} of declared range indexes
+        self.range_indexes = {} # (len, position): ([key...], [row...]) in key
+                                #   order, or None if the keys can't be
+                                #   sorted.
+        self.range_seq = 0      # the number of the next row in the range
+                                #   indexes, see _range_rows.
+        self.reset_index_stats()
+
+    def __setstate__(self, state):
+        # fact_lists pickled by earlier versions don't have all of the
+        # index attributes.
+        self.__init__(state['name'])
+        self.__dict__.update(state)
+        self.hashes = collections.OrderedDict(self.hashes)
 
     def reset(self):
         self.case_specific_facts = []
         self.hashes.clear()
+        self.index_sizes.clear()
+        self.index_bytes = 0
+        self.shape_lookups.clear()
         self.fc_rule_refs = []
+        self.cardinality = None
+        self.range_indexes.clear()
+        self.reset_index_stats()
+
+    def shared_copy(self):
+        r'''Returns a new fact_list sharing self's universal facts (which
+        must not be changed after this), with no case specific facts or
+        indexes.
+        '''
+        ans = self.__class__(self.name)
+        ans.universal_facts = self.universal_facts
+        ans.declared_indexes = set(self.declared_indexes)
+        ans.range_positions = set(self.range_positions)
+        ans.index_budget = self.index_budget
+        return ans
+
+    def mark(self):
+        r'''Returns the state to pass to undo_to.
+        '''
+        return len(self.case_specific_facts), len(self.fc_rule_refs), \
+               self.case_specific_facts
+
+    def undo_to(self, mark):
+        r'''Removes the case specific facts and fc_rule refs added since mark
+        was taken.  Universal facts and indexes are kept.
+
+            >>> from pyke import pattern
+            >>> fl = fact_list('f')
+            >>> fl.add_universal_fact((1, 'a'))
+            >>> fl.add_case_specific_fact((2, 'b'))
+            >>> fl.add_index((1,))
+            >>> def lookup(arg):
+            ...     c = contexts.simple_context()
+            ...     with fl.lookup(c, c, (contexts.variable('n'),
+            ...                           pattern.pattern_literal(arg))) \
+            ...       as gen:
+            ...         return [c.lookup_data('n') for dummy in gen]
+            >>> lookup('b')
+            [2]
+            >>> size = fl.get_index_stats()[1]
+            >>> mark = fl.mark()
+            >>> fl.add_case_specific_fact((3, 'b'))
+            >>> fl.add_universal_fact((4, 'b'))
+            >>> fl.add_case_specific_fact((5, 'c'))
+            >>> lookup('b'), lookup('c')
+            ([2, 3, 4], [5])
+            >>> fl.undo_to(mark)
+            >>> lookup('b'), lookup('c')
+            ([2, 4], [])
+            >>> fl.case_specific_facts
+            [(2, 'b')]
+
+        This also puts back the facts retracted since mark was taken:
+
+            >>> mark = fl.mark()
+            >>> fl.retract_facts({(2, 'b')})
+            [(2, 'b')]
+            >>> fl.add_case_specific_fact((6, 'b'))
+            >>> lookup('b')
+            [4, 6]
+            >>> fl.undo_to(mark)
+            >>> lookup('b')
+            [4, 2]
+            >>> fl.case_specific_facts
+            [(2, 'b')]
+        '''
+        num_specific, num_fc_rule_refs, facts = mark
+        del self.fc_rule_refs[num_fc_rule_refs:]
+        if facts is not self.case_specific_facts:
+            # Facts have been retracted since the mark (see retract_facts).
+            self.replace_case_specific_facts(
+              [facts[i] for i in range(num_specific)])
+        while len(self.case_specific_facts) > num_specific:
+            self.pop_case_specific_fact()
+
+    def pop_case_specific_fact(self):
+        self.remove_many_args((self.case_specific_facts.pop(),))
+
+    def retract_facts(self, facts):
+        r'''Removes the case specific facts that are in facts (a fact_set, or
+        an iterable of facts), along with their index entries.  Returns a
+        list of the facts removed.
+
+            >>> fl = fact_list('f')
+            >>> fl.add_universal_fact((1, 'a'))
+            >>> for i in range(2, 5): fl.add_case_specific_fact((i, 'b'))
+            >>> fl.add_index((1,))
+            >>> fl._get_hashed(2, (1,), ('b',))
+            ((0,), [(2,), (3,), (4,)])
+            >>> fl.retract_facts({(3, 'b'), (1, 'a'), (5, 'b')})
+            [(3, 'b')]
+            >>> fl._get_hashed(2, (1,), ('b',))
+            ((0,), [(2,), (4,)])
+            >>> fl.case_specific_facts
+            [(2, 'b'), (4, 'b')]
+
+        The index lists are replaced, rather than changed, so that lookups
+        already running aren't affected:
+
+            >>> arg_list = fl._get_hashed(2, (1,), ('b',))[1]
+            >>> fl.add_case_specific_fact(([5], 'b'))
+            >>> fl.retract_facts([(2, 'b'), ([5], 'b')])
+            [(2, 'b'), ([5], 'b')]
+            >>> arg_list, fl._get_hashed(2, (1,), ('b',))
+            ([(2,), (4,), ([5],)], ((0,), [(4,)]))
+        '''
+        if not isinstance(facts, fact_set): facts = fact_set(facts)
+        removed = [args for args in self.case_specific_facts if args in facts]
+        if removed:
+            # A new list, so that the marks taken before this can still be
+            # undone.
+            self.case_specific_facts = [args
+                                        for args in self.case_specific_facts
+                                         if args not in facts]
+            self.remove_many_args(removed)
+        return removed
+
+    def replace_case_specific_facts(self, facts):
+        r'''Replaces the case specific facts with facts (a list), updating
+        the indexes.
+        '''
+        old_facts = fact_set(self.case_specific_facts)
+        new_facts = fact_set(facts)
+        self.remove_many_args([args for args in self.case_specific_facts
+                                    if args not in new_facts])
+        self.case_specific_facts = facts
+        self.add_many_args([args for args in facts if args not in old_facts])
+
+    def has_fact(self, args):
+        r'''Is args a fact (universal or case specific)?
+
+        This uses an index on all of the arguments.
+        '''
+        length = len(args)
+        return bool(self._get_hashed(length, tuple(range(length)), args)[1])
+
+    def get_cardinality(self):
+        r'''Returns num_facts, (num_distinct_args...) by argument position.
+
+        These are only recomputed once the number of facts has changed by
+        more than Stats_drift since they were last computed.
+
+            >>> fl = fact_list('f')
+            >>> for i in range(20): fl.add_universal_fact((i, i % 4))
+            >>> fl.get_cardinality()
+            (20, (20, 4))
+            >>> fl.add_case_specific_fact((20, 0, 'extra'))
+            >>> fl.get_cardinality()
+            (20, (20, 4))
+            >>> fl.add_case_specific_fact((21, 1))
+            >>> fl.add_case_specific_fact((22, [2]))
+            >>> fl.get_cardinality()
+            (23, (23, 5, 1))
+        '''
+        num_facts = len(self.universal_facts) + len(self.case_specific_facts)
+        if self.cardinality is None or \
+           abs(num_facts - self.cardinality[0]) > \
+             Stats_drift * self.cardinality[0]:
+            distinct = []       # [{arg}] by position
+            for args in itertools.chain(self.universal_facts,
+                                        self.case_specific_facts):
+                while len(distinct) < len(args): distinct.append(set())
+                for values, arg in zip(distinct, args):
+                    try:
+                        values.add(arg)
+                    except TypeError:
+                        values.add(repr(arg))
+            self.cardinality = \
+              num_facts, tuple(len(values) for values in distinct)
+        return self.cardinality
+
+    def estimate(self, length, indices):
+        r'''Returns the expected number of facts matched by a lookup of
+        length args, with the args at indices bound.
+
+        This uses the index for the lookup's shape, if there is one, or else
+        assumes that the arguments are independent.
+
+            >>> fl = fact_list('f')
+            >>> for i in range(20): fl.add_universal_fact((i, i % 4, i % 2))
+            >>> fl.estimate(3, ()), fl.estimate(3, (0,)), fl.estimate(3, (1,))
+            (20, 1.0, 5.0)
+            >>> fl.estimate(3, (1, 2))
+            2.5
+            >>> fl.add_index((1, 2))
+            >>> fl._get_hashed(3, (1, 2), (0, 0))[1]
+            [(0,), (4,), (8,), (12,), (16,)]
+            >>> fl.estimate(3, (1, 2))
+            5.0
+        '''
+        num_facts, distinct = self.get_cardinality()
+        if not indices or not num_facts: return num_facts
+        entry = self.hashes.get((length, indices))
+        if entry is not None: return num_facts / max(len(entry[1]), 1)
+        ans = num_facts
+        for i in indices:
+            if i < len(distinct): ans /= max(distinct[i], 1)
+        return ans
+
+    def reset_index_stats(self):
+        self.num_indexes_built = 0
+        self.num_indexes_evicted = 0
+        self.num_scans = 0
 
     def dump_universal_facts(self):
         for args in self.universal_facts:
@@ -155,19 +768,74 @@ class fact_list(knowledge_base.knowledge_entity_list):
     def get_affected_fc_rules(self):
         return (fc_rule for fc_rule, foreach_index in self.fc_rule_refs)
 
-    def lookup(self, bindings, pat_context, patterns):
+    def add_index(self, arg_positions):
+        r'''Declares an index for lookups with arg_positions bound.
+
+            >>> fl = fact_list('foo')
+            >>> fl.add_index([2, 0, 2])
+            >>> fl.declared_indexes
+            {(0, 2)}
+            >>> fl.add_index(('a',))
+            Traceback (most recent call last):
+                ...
+            ValueError: fact_list foo: illegal index position: 'a'
+        '''
+        for i in arg_positions:
+            if not isinstance(i, int) or isinstance(i, bool) or i < 0:
+                raise ValueError("fact_list %s: illegal index position: %r" %
+                                   (self.name, i))
+        indices = tuple(sorted(set(arg_positions)))
+        if indices not in self.declared_indexes:
+            self.declared_indexes.add(indices)
+            for key, size in self.index_sizes.items():
+                if key[1] == indices: self.index_bytes -= size
+
+    def add_range_index(self, arg_position):
+        r'''Declares a sorted index on arg_position, for lookups with ranges.
+
+        The index is built the first time that it's used (for each number of
+        arguments), and is kept up to date from then on.
+
+            >>> fl = fact_list('foo')
+            >>> fl.add_range_index(1)
+            >>> fl.range_positions
+            {1}
+            >>> fl.add_range_index(-1)
+            Traceback (most recent call last):
+                ...
+            ValueError: fact_list foo: illegal range index position: -1
+        '''
+        if not isinstance(arg_position, int) or \
+           isinstance(arg_position, bool) or arg_position < 0:
+            raise ValueError("fact_list %s: illegal range index position: %r" %
+                               (self.name, arg_position))
+        self.range_positions.add(arg_position)
+
+    def lookup(self, bindings, pat_context, patterns, matched = None,
+               ranges = None):
         """ Returns a context manager for a generator that binds patterns to
             successive facts, yielding None for each successful match.
             Undoes bindings upon continuation, so that no bindings remain at
             StopIteration.
+
+            If matched is given (see truth_maintenance), (self, fact) is
+            appended to it for each fact while it's bound.
+
+            Ranges, if given, are (position, op, value) for the check
+            premises that follow (see _in_ranges).
         """
         indices = tuple(enum for enum in enumerate(patterns)
                              if enum[1].is_data(pat_context))
+        index_args = tuple(index[1].as_data(pat_context) for index in indices)
         other_indices, other_arg_lists = \
             self._get_hashed(len(patterns),
                              tuple(index[0] for index in indices),
-                             tuple(index[1].as_data(pat_context)
-                                   for index in indices))
+                             index_args)
+        if ranges:
+            other_arg_lists = \
+              self._in_ranges(len(patterns),
+                              tuple(index[0] for index in indices), index_args,
+                              other_indices, other_arg_lists, ranges)
         def gen():
             if other_arg_lists:
                 for args in other_arg_lists:
@@ -183,58 +851,416 @@ class fact_list(knowledge_base.knowledge_entity_list):
                                    args)):
                             bindings.end_save_all_undo()
                             end_done = True
-                            yield
+                            if matched is None:
+                                yield
+                            else:
+                                fact = [None] * len(patterns)
+                                for (i, pat), arg in zip(indices, index_args):
+                                    fact[i] = arg
+                                for i, arg in zip(other_indices, args):
+                                    fact[i] = arg
+                                matched.append((self, tuple(fact)))
+                                try:
+                                    yield
+                                finally:
+                                    matched.pop()
                     finally:
                         if not end_done: bindings.end_save_all_undo()
                         bindings.undo_to_mark(mark)
         return contextlib.closing(gen())
 
-    def _get_hashed(self, len, indices, args):
-        ans = self.hashes.get((len, indices))
-        if ans is None: ans = self._hash(len, indices)
+    def _in_ranges(self, length, indices, args, other_indices, arg_lists,
+                   ranges):
+        r'''Returns the arg_lists (the other_indices args of the facts with
+        args at indices) that may be in all of the ranges.
+
+        Each range is (position, op, value), where op is a key of
+        Range_tests.  These only filter out the facts that the check
+        premises would fail, so any fact that can't be tested (because the
+        test raises an exception) is kept for the check premise to decide.
+        Ranges on positions that are already bound are ignored.
+
+        If there's a range index for one of the positions, and it has fewer
+        facts in range than arg_lists, the facts are taken from the range
+        index instead.  They are put back in the order of arg_lists (the
+        universal facts, then the case specific facts, each in the order
+        that they were added), so that the range index doesn't change the
+        order of the answers.
+
+            >>> fl = fact_list('price')
+            >>> for i, item in enumerate(('apple', 'pear', 'plum', 'fig')):
+            ...     fl.add_universal_fact((item, i * 100, 'kg'))
+            >>> fl.add_universal_fact(('kiwi', None, 'kg'))
+            >>> fl._in_ranges(3, (2,), ('kg',), (0, 1),
+            ...               [('apple', 0), ('pear', 100), ('kiwi', None)],
+            ...               ((1, '>', 50), (2, '==', 'lb')))
+            [('pear', 100), ('kiwi', None)]
+            >>> fl.add_range_index(0)
+            >>> fl._in_ranges(3, (), (), (0, 1, 2), fl.universal_facts,
+            ...               ((0, 'prefix', 'p'), (1, '<', 200)))
+            [('pear', 100, 'kg')]
+            >>> fl.range_indexes[3, 0][0]
+            ['apple', 'fig', 'kiwi', 'pear', 'plum']
+
+        The facts found through the range index are in the same order as
+        the facts without it:
+
+            >>> fl.add_case_specific_fact(('banana', 150, 'kg'))
+            >>> fl.add_universal_fact(('date', 50, 'kg'))
+            >>> [args[0]
+            ...  for args in fl._in_ranges(3, (), (), (0, 1, 2),
+            ...                            fl.universal_facts,
+            ...                            ((0, '<', 'g'),))]
+            ['apple', 'fig', 'date', 'banana']
+        '''
+        tests = tuple((other_indices.index(position), Range_tests[op], value)
+                      for position, op, value in ranges
+                       if position in other_indices)
+        if not tests: return arg_lists
+        best = None     # (lo, hi, rows)
+        for position, op, value in ranges:
+            if position in self.range_positions and position in other_indices:
+                range_index = self._get_range_index(length, position)
+                if range_index is None: continue
+                keys, rows = range_index
+                try:
+                    lo, hi = _range_bounds(keys, op, value)
+                except TypeError:
+                    continue
+                if hi - lo < (len(arg_lists) if best is None
+                                              else best[1] - best[0]):
+                    best = lo, hi, rows
+        if best is not None:
+            lo, hi, rows = best
+            arg_lists = [tuple(fact[i] for i in other_indices)
+                         for fact in map(self._range_fact,
+                                         sorted(rows[lo:hi],
+                                                key=self._range_position))
+                          if tuple(fact[i] for i in indices) == args]
+        return [other_args for other_args in arg_lists
+                 if all(_may_pass(test, other_args[i], value)
+                        for i, test, value in tests)]
+
+    def _get_range_index(self, length, position):
+        key = length, position
+        if key in self.range_indexes: return self.range_indexes[key]
+        pairs = [(args[position], row) for row, args in self._range_rows()
+                                        if len(args) == length]
+        try:
+            pairs.sort(key = operator.itemgetter(0))
+        except TypeError:
+            ans = None
+        else:
+            ans = [pair[0] for pair in pairs], [pair[1] for pair in pairs]
+            # NaNs don't sort.
+            if any(key != key for key in ans[0]): ans = None
+        self.range_indexes[key] = ans
+        return ans
+
+    def _range_rows(self):
+        r'''Generates row, args for all of the facts.  The rows are what is
+        stored in the range indexes.
+
+        Here, each row is (0 for universal facts or 1 for case specific
+        facts, its number, args), numbered in the order that the facts are
+        added (see add_many_args).
+        '''
+        for band, facts in ((0, self.universal_facts),
+                            (1, self.case_specific_facts)):
+            for args in facts:
+                yield (band, self.range_seq, args), args
+                self.range_seq += 1
+
+    def _range_fact(self, row):
+        return row[2]
+
+    def _range_position(self, row):
+        r'''The sort key putting rows in the order of the facts.
+        '''
+        return row[0], row[1]
+
+    def _is_range_row(self, range_row, row):
+        r'''Is range_row (in a range index) the row passed to
+        _remove_from_ranges?  Here, that's just the args.
+        '''
+        return range_row[2] == row
+
+    def _add_to_ranges(self, rows):
+        for (length, position), range_index in self.range_indexes.items():
+            if range_index is not None:
+                keys, range_rows = range_index
+                for row, args in rows:
+                    if len(args) == length:
+                        key = args[position]
+                        try:
+                            i = bisect.bisect_right(keys, key)
+                        except TypeError:
+                            i = None
+                        if i is None or key != key:
+                            self.range_indexes[length, position] = None
+                            break
+                        keys.insert(i, key)
+                        range_rows.insert(i, row)
+
+    def _remove_from_ranges(self, rows):
+        for (length, position), range_index in self.range_indexes.items():
+            if range_index is not None:
+                keys, range_rows = range_index
+                for row, args in rows:
+                    if len(args) == length:
+                        key = args[position]
+                        i = bisect.bisect_left(keys, key)
+                        while i < len(keys) and keys[i] == key:
+                            if self._is_range_row(range_rows[i], row):
+                                del keys[i]
+                                del range_rows[i]
+                                break
+                            i += 1
+
+    def _get_hashed(self, length, indices, args):
+        key = length, indices
+        ans = self.hashes.get(key)
+        if ans is None:
+            if indices not in self.declared_indexes:
+                num_lookups = self.shape_lookups.get(key, 0) + 1
+                if num_lookups < Index_threshold:
+                    self.shape_lookups[key] = num_lookups
+                    return self._scan(length, indices, args)
+                self.shape_lookups.pop(key, None)
+            ans = self._hash(length, indices)
+        else:
+            self.hashes.move_to_end(key)
         other_indices, arg_map = ans
-        return other_indices, arg_map.get(args, ())
+        try:
+            return other_indices, arg_map.get(args, ())
+        except TypeError:
+            # Unhashable args, see _add_to_index.
+            return self._scan(length, indices, args)
+
+    def _scan(self, length, indices, args):
+        r'''Finds the matching facts without building an index.
+        '''
+        self.num_scans += 1
+        other_indices = tuple(i for i in range(length) if i not in indices)
+        return other_indices, \
+               [tuple(fact[i] for i in other_indices)
+                for fact in itertools.chain(self.universal_facts,
+                                            self.case_specific_facts)
+                 if len(fact) == length and
+                    tuple(fact[i] for i in indices) == args]
 
     def _hash(self, length, indices):
         args_hash = {}
         new_entry = (tuple(i for i in range(length) if i not in indices),
                      args_hash)
         self.hashes[length, indices] = new_entry
+        self.index_sizes[length, indices] = 0
+        self.num_indexes_built += 1
         for args in itertools.chain(self.universal_facts,
                                     self.case_specific_facts):
             if len(args) == length:
-                selected_args = tuple(arg for i, arg in enumerate(args)
-                                          if i in indices)
-                args_hash.setdefault(selected_args, []) \
-                         .append(tuple(arg for i, arg in enumerate(args)
-                                           if i not in indices))
+                self._add_to_index(length, indices, args_hash, args)
+        self._check_budget((length, indices))
         return new_entry
 
+    def _add_to_index(self, length, indices, arg_map, args):
+        selected_args = tuple(arg for i, arg in enumerate(args)
+                                  if i in indices)
+        other_args = tuple(arg for i, arg in enumerate(args)
+                               if i not in indices)
+        try:
+            arg_list = arg_map.get(selected_args)
+        except TypeError:
+            # Found by scanning instead, see _get_hashed.
+            return
+        size = sys.getsizeof(other_args) + Pointer_size
+        if arg_list is None:
+            arg_list = arg_map[selected_args] = []
+            size += sys.getsizeof(selected_args) + sys.getsizeof(arg_list) + \
+                    3 * Pointer_size    # for the dict entry
+        arg_list.append(other_args)
+        self.index_sizes[length, indices] += size
+        if indices not in self.declared_indexes: self.index_bytes += size
+
+    def _remove_from_index(self, length, indices, arg_map, args):
+        selected_args = tuple(arg for i, arg in enumerate(args)
+                                  if i in indices)
+        other_args = tuple(arg for i, arg in enumerate(args)
+                               if i not in indices)
+        try:
+            arg_list = arg_map[selected_args]
+        except TypeError:
+            return      # not in the index, see _add_to_index
+        # Normally the last one, unless universal facts were added since.
+        # The list is replaced, since lookups may be iterating over it.
+        for i in range(len(arg_list) - 1, -1, -1):
+            if arg_list[i] == other_args:
+                arg_map[selected_args] = arg_list[:i] + arg_list[i + 1:]
+                break
+        size = sys.getsizeof(other_args) + Pointer_size
+        if not arg_map[selected_args]:
+            del arg_map[selected_args]
+            size += sys.getsizeof(selected_args) + sys.getsizeof(arg_list) + \
+                    3 * Pointer_size
+        self.index_sizes[length, indices] -= size
+        if indices not in self.declared_indexes: self.index_bytes -= size
+
+    def _check_budget(self, keep = None):
+        r'''Discards the least recently used undeclared indexes (other than
+        keep) until self.index_bytes is within budget.
+        '''
+        budget = self.index_budget
+        if budget is None: budget = Index_budget
+        if budget is None or self.index_bytes <= budget: return
+        for key in tuple(self.hashes.keys()):
+            if key != keep and key[1] not in self.declared_indexes:
+                del self.hashes[key]
+                self.index_bytes -= self.index_sizes.pop(key)
+                self.num_indexes_evicted += 1
+                if self.index_bytes <= budget: break
+
     def add_universal_fact(self, args):
         assert args not in self.case_specific_facts, \
                "add_universal_fact: fact already present as specific fact"
         if args not in self.universal_facts:
             self.universal_facts.append(args)
-            self.add_args(args)
+            self.add_args(args, True)
+
+    def add_universal_facts(self, facts):
+        r'''Adds the facts as universal facts, updating each index once for
+        all of them.
+
+        Returns a list of the new facts (without the duplicates).
+
+            >>> fl = fact_list('f')
+            >>> fl.add_universal_fact((1, 'a'))
+            >>> fl.add_universal_facts([(2, 'b'), (1, 'a'), (2, 'b')])
+            [(2, 'b')]
+            >>> fl.universal_facts
+            [(1, 'a'), (2, 'b')]
+        '''
+        new_facts = self._new_facts(facts, self.universal_facts)
+        if self.case_specific_facts:
+            assert len(self._new_facts(new_facts, self.case_specific_facts)) \
+                     == len(new_facts), \
+                   "add_universal_facts: fact already present as specific fact"
+        self.universal_facts.extend(new_facts)
+        self.add_many_args(new_facts, True)
+        return new_facts
 
     def add_case_specific_fact(self, args):
+        if self.store_case_specific_fact(args): self.trigger_fc_rules(args)
+
+    def store_case_specific_fact(self, args):
+        r'''Adds args without triggering any fc_rules.
+
+        Returns True if args is a new fact.
+        '''
         if args not in self.universal_facts and \
            args not in self.case_specific_facts:
             self.case_specific_facts.append(args)
             self.add_args(args)
-            for fc_rule, foreach_index in self.fc_rule_refs:
-                fc_rule.new_fact(args, foreach_index)
-
-    def add_args(self, args):
-        for (length, indices), (other_indices, arg_map) \
-         in self.hashes.items():
-            if length == len(args):
-                selected_args = tuple(arg for i, arg in enumerate(args)
-                                          if i in indices)
-                arg_map.setdefault(selected_args, []) \
-                       .append(tuple(arg for i, arg in enumerate(args)
-                                         if i not in indices))
+            return True
+        return False
+
+    def store_case_specific_facts(self, facts):
+        r'''Adds the facts without triggering any fc_rules, updating each
+        index once for all of them.
+
+        Returns a list of the new facts (without the duplicates).
+
+            >>> fl = fact_list('f')
+            >>> fl.add_universal_fact((1, 'a'))
+            >>> fl.add_index((1,))
+            >>> fl.store_case_specific_facts([(2, 'b'), (1, 'a'), (3, 'b'),
+            ...                               (2, 'b')])
+            [(2, 'b'), (3, 'b')]
+            >>> fl.case_specific_facts
+            [(2, 'b'), (3, 'b')]
+            >>> fl._get_hashed(2, (1,), ('b',))
+            ((0,), [(2,), (3,)])
+        '''
+        new_facts = self._new_facts(facts, self.case_specific_facts,
+                                    self.universal_facts)
+        self.case_specific_facts.extend(new_facts)
+        self.add_many_args(new_facts)
+        return new_facts
+
+    @staticmethod
+    def _new_facts(facts, present, other_facts = ()):
+        r'''Returns a list of the facts that aren't in present or
+        other_facts, without duplicates.
+
+        The facts are only iterated once, so they may be generated as they
+        are needed.  They are found with sets, unless some fact isn't
+        hashable.
+
+            >>> fact_list._new_facts(iter([(1,), ([2],), (1,), ([2],), (3,)]),
+            ...                      [(3,)], [(4,)])
+            [(1,), ([2],)]
+        '''
+        facts = iter(facts)
+        new_facts = []
+        args = None     # None means that no fact has been taken from facts
+        try:
+            present_set = set(present)
+            other_set = other_facts
+            if isinstance(other_facts, list): other_set = set(other_facts)
+            for args in facts:
+                if args not in present_set and args not in other_set:
+                    present_set.add(args)
+                    new_facts.append(args)
+        except TypeError:
+            # Some fact isn't hashable, so the rest are found by scanning.
+            if args is not None: facts = itertools.chain((args,), facts)
+            for args in facts:
+                if args not in present and args not in other_facts and \
+                   args not in new_facts:
+                    new_facts.append(args)
+        return new_facts
+
+    def trigger_fc_rules(self, args):
+        for fc_rule, foreach_index in self.fc_rule_refs:
+            fc_rule.new_fact(args, foreach_index)
+
+    def add_args(self, args, universal = False):
+        self.add_many_args((args,), universal)
+
+    def add_many_args(self, facts, universal = False):
+        if self.hashes and facts:
+            for (length, indices), (other_indices, arg_map) \
+             in self.hashes.items():
+                for args in facts:
+                    if length == len(args):
+                        self._add_to_index(length, indices, arg_map, args)
+            self._check_budget()
+        if self.range_indexes:
+            band = 0 if universal else 1
+            rows = []
+            for args in facts:
+                rows.append(((band, self.range_seq, args), args))
+                self.range_seq += 1
+            self._add_to_ranges(rows)
+
+    def remove_many_args(self, facts):
+        for (length, indices), (other_indices, arg_map) in self.hashes.items():
+            for args in facts:
+                if length == len(args):
+                    self._remove_from_index(length, indices, arg_map, args)
+        if self.range_indexes:
+            self._remove_from_ranges([(args, args) for args in facts])
 
     def get_stats(self):
         return len(self.universal_facts), len(self.case_specific_facts)
 
+    def get_index_stats(self):
+        r'''Returns num_indexes, index_bytes, num_built, num_evicted,
+        num_scans.
+
+        Index_bytes is only an approximation and includes the declared
+        indexes.
+        '''
+        return len(self.hashes), sum(self.index_sizes.values()), \
+               self.num_indexes_built, self.num_indexes_evicted, \
+               self.num_scans
+
@@ -0,0 +1,268 @@
+# fact_loader.py
+# coding=utf-8
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+r'''
+    Streaming facts into a fact_base from CSV files, JSON Lines files or
+    database cursors.
+
+    The rows are read Chunk_size rows at a time and converted into facts as
+    they are added, so only one chunk is ever held in memory, no matter how
+    big the input is.  The facts are added in one batch (see
+    engine.add_universal_facts and engine.add_case_specific_facts).  Each
+    row becomes one fact, whose arguments are the row's columns (or just the
+    columns listed in columns, in that order).  The values can be converted
+    by the functions in types, by column.
+
+        >>> import io, sqlite3
+        >>> from pyke import knowledge_engine
+        >>> engine = knowledge_engine.engine()
+        >>> csv_file = io.StringIO("item,qty,price\n"
+        ...                        "bread,4,2.50\n"
+        ...                        "pasta,2,1.25\n"
+        ...                        "pasta,2,1.25\n"
+        ...                        "jam,,3.00\n")
+        >>> report = load_csv(engine, 'store', 'price', csv_file,
+        ...                   columns = ('item', 'price', 'qty'),
+        ...                   types = {'qty': int, 'price': float})
+        >>> engine.get_kb('store').dump_universal_facts()
+        price('bread', 2.5, 4)
+        price('pasta', 1.25, 2)
+        price('jam', 3.0, None)
+        >>> report.rows, report.facts
+        (4, 3)
+        >>> print(report)                               # doctest: +ELLIPSIS
+        price: 4 rows, 3 new facts in ... seconds (... rows/sec)
+
+    JSON Lines files may hold objects or lists.  Lists within the values are
+    converted to tuples:
+
+        >>> jsonl_file = io.StringIO('{"name": "bruce", "kids": ["david"]}\n'
+        ...                          '\n'
+        ...                          '{"name": "thomas", "age": 80}\n')
+        >>> report = load_jsonl(engine, 'people', 'person', jsonl_file,
+        ...                     case_specific = True)
+        >>> engine.get_kb('people').dump_specific_facts()
+        person('bruce', ('david',))
+        person('thomas', None)
+
+    Any DB-API cursor may be used once its query has been executed:
+
+        >>> connection = sqlite3.connect(':memory:')
+        >>> connection.execute("create table movie (title, year)")
+        ... # doctest: +ELLIPSIS
+        <sqlite3.Cursor object at ...>
+        >>> connection.executemany("insert into movie values (?, ?)",
+        ...                        [('Alien', '1979'), ('Brazil', '1985')])
+        ... # doctest: +ELLIPSIS
+        <sqlite3.Cursor object at ...>
+        >>> cursor = connection.execute("select * from movie")
+        >>> report = load_cursor(engine, 'movies', 'movie', cursor,
+        ...                      columns = ('year', 'title'),
+        ...                      types = (int,), chunk_size = 1)
+        >>> engine.get_kb('movies').dump_universal_facts()
+        movie(1979, 'Alien')
+        movie(1985, 'Brazil')
+        >>> connection.close()
+'''
+
+import csv
+import json
+import time
+import itertools
+import contextlib
+
+from pyke import fact_base
+
+# The number of rows read, converted and added at a time.
+Chunk_size = 10000
+
+class load_report(object):
+    r'''What was loaded, and how fast.
+
+    Facts only counts the new facts that have been added to the fact_base
+    (not the duplicates, or the case specific facts held back by
+    engine.bulk_load).
+    '''
+    def __init__(self, fact_name):
+        self.fact_name = fact_name
+        self.rows = 0
+        self.facts = 0
+        self.seconds = 0.0
+
+    @property
+    def rows_per_sec(self):
+        if not self.seconds: return 0.0
+        return self.rows / self.seconds
+
+    def __str__(self):
+        return "%s: %d rows, %d new facts in %.3f seconds (%.0f rows/sec)" % \
+                 (self.fact_name, self.rows, self.facts, self.seconds,
+                  self.rows_per_sec)
+
+def load_csv(engine, kb_name, fact_name, file, columns = None, types = None,
+             case_specific = False, header = True, chunk_size = None,
+             report = None, **reader_kws):
+    r'''Loads the rows of the CSV file (a filename or text file) as facts.
+
+    If header is True, the first row names the columns.  Otherwise the
+    columns and types can only be given by position.  The reader_kws are
+    passed on to csv.reader.  Returns a load_report.
+    '''
+    with _open(file) as f:
+        rows = csv.reader(f, **reader_kws)
+        names = next(rows, None) if header else None
+        return _load(engine, kb_name, fact_name, names, _chunks(rows,
+                                                                chunk_size),
+                     columns, types, case_specific, report)
+
+def load_jsonl(engine, kb_name, fact_name, file, columns = None, types = None,
+               case_specific = False, chunk_size = None, report = None):
+    r'''Loads the JSON value on each line of file (a filename or text file)
+    as a fact.
+
+    The values may be lists, or objects.  For objects, columns defaults to
+    the keys of the first object.  Missing keys are None.  Blank lines are
+    skipped.  Returns a load_report.
+    '''
+    with _open(file) as f:
+        values = (_hashable(json.loads(line)) for line in f if line.strip())
+        first = next(values, None)
+        names = None
+        if isinstance(first, dict):
+            names = tuple(columns if columns is not None else first.keys())
+            values = (tuple(value.get(name) for name in names)
+                      for value in itertools.chain((first,), values))
+        elif first is not None:
+            values = itertools.chain((first,), values)
+        return _load(engine, kb_name, fact_name, names,
+                     _chunks(values, chunk_size),
+                     columns, types, case_specific, report)
+
+def load_cursor(engine, kb_name, fact_name, cursor, columns = None,
+                types = None, case_specific = False, chunk_size = None,
+                report = None):
+    r'''Loads the rows of the (executed) DB-API cursor as facts, fetching
+    chunk_size rows at a time.
+
+    The columns are named by cursor.description.  Returns a load_report.
+    '''
+    if chunk_size is None: chunk_size = Chunk_size
+    names = tuple(description[0] for description in cursor.description)
+    chunks = iter(lambda: cursor.fetchmany(chunk_size), [])
+    return _load(engine, kb_name, fact_name, names, chunks,
+                 columns, types, case_specific, report)
+
+def row_converter(names, columns = None, types = None):
+    r'''Returns a function converting a row into the args of a fact.
+
+    Columns and the keys of a types dict may be column names (if names is
+    given) or positions within the row.  Types may also be a sequence of
+    functions for the (selected) columns, with None for those that aren't
+    converted.  Empty values ('' or None) of converted columns become None.
+
+        >>> convert = row_converter(('a', 'b', 'c'), ('c', 0), {'a': int})
+        >>> convert(['1', 'x', 'y'])
+        ('y', 1)
+        >>> convert(['', 'x', 'y'])
+        ('y', None)
+        >>> row_converter(None, types = (None, float))(['1', '2'])
+        ('1', 2.0)
+        >>> row_converter(('a',), ('b',))
+        Traceback (most recent call last):
+            ...
+        KeyError: "fact_loader: unknown column 'b', expected one of ('a',)"
+    '''
+    def position(column):
+        if isinstance(column, int): return column
+        if names is None or column not in names:
+            raise KeyError("fact_loader: unknown column %r, expected one of %r"
+                             % (column, None if names is None
+                                              else tuple(names)))
+        return list(names).index(column)
+    positions = None if columns is None else tuple(map(position, columns))
+    coercions = ()
+    if isinstance(types, dict):
+        types = dict((position(column), fn) for column, fn in types.items())
+        if positions is None:
+            coercions = tuple(types.items())
+        else:
+            coercions = tuple((i, types[p]) for i, p in enumerate(positions)
+                                            if p in types)
+    elif types:
+        coercions = tuple((i, fn) for i, fn in enumerate(types)
+                                  if fn is not None)
+    def convert(row):
+        args = tuple(row) if positions is None \
+                          else tuple(row[p] for p in positions)
+        if coercions:
+            args = list(args)
+            for i, fn in coercions:
+                value = args[i]
+                args[i] = None if value is None or value == '' else fn(value)
+            args = tuple(args)
+        return args
+    return convert
+
+def _load(engine, kb_name, fact_name, names, chunks, columns, types,
+          case_specific, report):
+    convert = row_converter(names, columns, types)
+    if case_specific: add = engine.add_case_specific_facts
+    else: add = engine.add_universal_facts
+    fact_list = engine.get_kb(kb_name, fact_base.fact_base) \
+                      .get_entity_list(fact_name)
+    def num_facts():
+        return len(fact_list.universal_facts) + \
+               len(fact_list.case_specific_facts)
+    ans = load_report(fact_name)
+    def facts():
+        for chunk in chunks:
+            ans.rows += len(chunk)
+            for row in chunk: yield convert(row)
+    start_facts = num_facts()
+    start = time.perf_counter()
+    add(kb_name, fact_name, facts())
+    ans.seconds = time.perf_counter() - start
+    ans.facts = num_facts() - start_facts
+    if report is not None: report.write("%s\n" % ans)
+    return ans
+
+def _chunks(rows, chunk_size):
+    if chunk_size is None: chunk_size = Chunk_size
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk: break
+        yield chunk
+
+def _hashable(value):
+    r'''Converts the lists within a JSON value to tuples.
+    '''
+    if isinstance(value, list): return tuple(map(_hashable, value))
+    if isinstance(value, dict):
+        return dict((key, _hashable(x)) for key, x in value.items())
+    return value
+
+def _open(file):
+    r'''Returns a context manager for file, only closing it if it's opened
+    here.
+    '''
+    if isinstance(file, str): return open(file, newline = '')
+    return contextlib.nullcontext(file)
@@ -0,0 +1,293 @@
+# fc_network.py
+# coding=utf-8
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+r'''
+    A Rete style join network for forward-chaining rules.
+
+    Normally, when a new fact matches the n-th premise of an fc_rule, the
+    rule's function is rerun with that premise fixed, which looks up all of
+    the rule's other premises again.  With the network, the matches for
+    each premise (alpha memories) and the partial matches for each prefix of
+    the premises (join_nodes) are stored, so a new fact only joins with the
+    partial matches that are already there.  Alpha memories and join_nodes
+    are shared by all rules with the same premises.
+
+    Each complete match is passed to the rule's function with all of its
+    fact premises already bound, which then runs the rest of the rule (its
+    python premises and assertions).
+
+    Only rules whose premises are all simple fact_base premises (no first,
+    forall or notany clauses, and no question bases) use the network; the
+    others run as usual.
+
+    The network is used by activating rule bases with fc_network=True:
+
+        >>> import os, sys, io
+        >>> from pyke import knowledge_engine
+        >>> source_dir = os.path.dirname(os.path.dirname(__file__))
+        >>> family_relations_dir = \
+        ...   os.path.join(source_dir, 'examples/family_relations')
+        >>> sys.path.insert(0, family_relations_dir)
+        >>> engine = knowledge_engine.engine(family_relations_dir)
+
+        >>> def facts():
+        ...     out = io.StringIO()
+        ...     stdout, sys.stdout = sys.stdout, out
+        ...     try:
+        ...         engine.get_kb('family').dump_specific_facts()
+        ...     finally:
+        ...         sys.stdout = stdout
+        ...     return sorted(out.getvalue().split('\n'))
+        >>> engine.activate('fc_example')
+        >>> without_network = facts()
+        >>> engine.reset()
+        >>> engine.activate('fc_example', fc_network=True)
+        >>> facts() == without_network
+        True
+        >>> engine.fc_network.get_stats()[:2]
+        (30, 32)
+        >>> engine.reset()
+        >>> engine.fc_network is None
+        True
+'''
+
+from pyke import contexts, fact_base, fc_rule
+
+class network(object):
+    def __init__(self, engine):
+        self.engine = engine
+        self.alpha_memories = {}   # {alpha_key: alpha_memory}
+        self.join_nodes = {}       # {(alpha_key...): join_node}
+        self.saved = None          # {alpha_memory or join_node: mark}, of
+                                   #   those changed since the last snapshot
+
+    def eligible(self, fc_rule):
+        r'''Can fc_rule use the network?
+        '''
+        return fc_rule.foreach_facts and \
+               all(not multi_match and
+                   isinstance(self.engine.get_kb(kb_name, fact_base.fact_base),
+                              fact_base.fact_base)
+                   for kb_name, fact_name, arg_patterns, multi_match
+                    in fc_rule.foreach_facts)
+
+    def add_rule(self, fc_rule):
+        r'''Returns the join_node for all of fc_rule's premises.
+        '''
+        node = None
+        prefix = ()
+        for kb_name, fact_name, arg_patterns, multi_match \
+         in fc_rule.foreach_facts:
+            alpha = self.get_alpha_memory(kb_name, fact_name, arg_patterns)
+            prefix += (alpha.key,)
+            next_node = self.join_nodes.get(prefix)
+            if next_node is None:
+                self.changing(alpha)
+                if node is not None: self.changing(node)
+                next_node = join_node(self, prefix, node, alpha)
+                self.join_nodes[prefix] = next_node
+                if self.saved is not None: self.saved[next_node] = None
+            node = next_node
+        return node
+
+    def get_alpha_memory(self, kb_name, fact_name, arg_patterns):
+        try:
+            key = kb_name, fact_name, tuple(arg_patterns)
+            hash(key)
+        except TypeError:
+            key = kb_name, fact_name, id(arg_patterns)
+        ans = self.alpha_memories.get(key)
+        if ans is None:
+            ans = self.alpha_memories[key] = \
+                alpha_memory(self, key, kb_name, fact_name, arg_patterns)
+            ans.load(self.engine)
+            if self.saved is not None: self.saved[ans] = None
+        return ans
+
+    def get_stats(self):
+        r'''Returns num_alpha_memories, num_join_nodes, num_partial_matches.
+        '''
+        return len(self.alpha_memories), len(self.join_nodes), \
+               sum(len(node.tokens) for node in self.join_nodes.values())
+
+    def start_saving(self):
+        r'''Called when an engine snapshot is taken.  From then on, the
+        state of each alpha_memory and join_node is saved before it's first
+        changed, so that restore only has to undo what has changed.
+        '''
+        self.saved = {}
+
+    def changing(self, memory):
+        if self.saved is not None and memory not in self.saved:
+            self.saved[memory] = memory.mark()
+
+    def restore(self):
+        r'''Returns the network to its state when start_saving was called.
+        '''
+        saved, self.saved = self.saved, {}
+        # The indexes of the unchanged join_nodes below the changed ones
+        # must be fixed first, while the new tokens are still there.
+        for memory, mark in saved.items():
+            if mark is not None: memory.unindex(mark)
+        for memory, mark in saved.items():
+            if mark is not None:
+                memory.undo_to(mark)
+            elif isinstance(memory, alpha_memory):
+                del self.alpha_memories[memory.key]
+            else:
+                del self.join_nodes[memory.key]
+
+class alpha_memory(object):
+    r'''
+        The variable bindings (tokens) of each fact that matches one
+        premise.
+    '''
+    def __init__(self, network, key, kb_name, fact_name, arg_patterns):
+        self.network = network
+        self.key = key
+        self.kb_name = kb_name
+        self.fact_name = fact_name
+        self.arg_patterns = arg_patterns
+        self.var_names = tuple(sorted(fc_rule.pattern_variables(arg_patterns)))
+        self.tokens = []        # [{var_name: value}]
+        self.successors = []    # [join_node]
+
+    def load(self, engine):
+        context = contexts.simple_context()
+        with engine.lookup(self.kb_name, self.fact_name, context,
+                           self.arg_patterns) \
+          as gen:
+            for dummy in gen:
+                self.tokens.append(dict((name, context.lookup_data(name))
+                                        for name in self.var_names))
+        engine.get_kb(self.kb_name, fact_base.fact_base) \
+              .add_fc_rule_ref(self.fact_name, self, 0)
+
+    def new_fact(self, fact_args, foreach_index):
+        r'''Called by the fact_list, like fc_rule.new_fact.
+        '''
+        if len(fact_args) == len(self.arg_patterns):
+            context = contexts.simple_context()
+            if all(map(lambda pat, arg: pat.match_data(context, context, arg),
+                       self.arg_patterns,
+                       fact_args)):
+                token = dict((name, context.lookup_data(name))
+                             for name in self.var_names)
+                self.network.changing(self)
+                self.tokens.append(token)
+                for node in tuple(self.successors): node.right_activate(token)
+            context.done()
+
+    def mark(self):
+        return len(self.tokens), len(self.successors)
+
+    def unindex(self, mark):
+        num_tokens, num_successors = mark
+        for node in self.successors[:num_successors]:
+            if node.left is not None:
+                for token in reversed(self.tokens[num_tokens:]):
+                    node.remove_from(node.right_index, token)
+
+    def undo_to(self, mark):
+        num_tokens, num_successors = mark
+        del self.tokens[num_tokens:]
+        del self.successors[num_successors:]
+
+class join_node(object):
+    r'''
+        The partial matches (tokens) for a prefix of a rule's premises: the
+        tokens of the node for the shorter prefix (left) joined with the
+        tokens of the alpha memory for the last premise (right) on the
+        variables they share.
+    '''
+    def __init__(self, network, key, left, alpha):
+        self.network = network
+        self.key = key          # (alpha_key...)
+        self.left = left
+        self.alpha = alpha
+        self.tokens = []        # [{var_name: value}]
+        self.children = []      # [join_node]
+        self.fc_rules = []      # [fc_rule]
+        if left is None:
+            self.var_names = frozenset(alpha.var_names)
+            self.join_vars = ()
+        else:
+            self.var_names = left.var_names.union(alpha.var_names)
+            self.join_vars = tuple(sorted(left.var_names.intersection(
+                                            alpha.var_names)))
+        self.left_index = {}    # {join_values: [left_token]}
+        self.right_index = {}   # {join_values: [alpha_token]}
+        alpha.successors.append(self)
+        if left is None:
+            for token in alpha.tokens: self.emit(token)
+        else:
+            for token in alpha.tokens: self.index(self.right_index, token)
+            left.children.append(self)
+            for token in left.tokens: self.left_activate(token)
+
+    def index(self, index, token):
+        key = tuple(token[name] for name in self.join_vars)
+        tokens = index.get(key)
+        if tokens is None: tokens = index[key] = []
+        tokens.append(token)
+        return key
+
+    def remove_from(self, index, token):
+        r'''Removes token, which must be the last one added for its key.
+        '''
+        key = tuple(token[name] for name in self.join_vars)
+        tokens = index[key]
+        tokens.pop()
+        if not tokens: del index[key]
+
+    def left_activate(self, token):
+        key = self.index(self.left_index, token)
+        for alpha_token in tuple(self.right_index.get(key, ())):
+            self.emit(dict(token, **alpha_token))
+
+    def right_activate(self, token):
+        if self.left is None:
+            self.emit(token)
+        else:
+            key = self.index(self.right_index, token)
+            for left_token in tuple(self.left_index.get(key, ())):
+                self.emit(dict(left_token, **token))
+
+    def emit(self, token):
+        self.network.changing(self)
+        self.tokens.append(token)
+        for child in tuple(self.children): child.left_activate(token)
+        for fc_rule in tuple(self.fc_rules): fc_rule.fire(token, True)
+
+    def mark(self):
+        return len(self.tokens), len(self.children), len(self.fc_rules)
+
+    def unindex(self, mark):
+        num_tokens, num_children, num_fc_rules = mark
+        for child in self.children[:num_children]:
+            for token in reversed(self.tokens[num_tokens:]):
+                child.remove_from(child.left_index, token)
+
+    def undo_to(self, mark):
+        num_tokens, num_children, num_fc_rules = mark
+        del self.tokens[num_tokens:]
+        del self.children[num_children:]
+        del self.fc_rules[num_fc_rules:]
@@ -50,10 +50,22 @@
 
 '''
 
-from pyke import contexts, fact_base
+from pyke import contexts, pattern, fact_base
 
 import itertools
 
+class all_premises(object):
+    r'''
+        Passed as the index to a rule function to say that all of its
+        premises are already bound in the context (by the fc_network).  The
+        rule functions test the index with "index == n" for each premise.
+    '''
+    def __eq__(self, n): return True
+    def __ne__(self, n): return False
+    __hash__ = None
+
+All_premises = all_premises()
+
 class rule(object):
     ''' Common to both fc_rules and bc_rules. '''
     def __init__(self, name, rule_base, patterns):
@@ -75,19 +87,58 @@ class fc_rule(rule):
         self.foreach_facts = foreach_facts # (kb_name, fact_name, arg_pats,
                                            #  multi_match?)...
         self.ran = False
+        self.join_node = None   # set when using the fc_network
+        self.plans = None       # {index: (cardinalities, order)}, when
+                                #   reordering the premises
 
-    def register_rule(self):
+    def register_rule(self, network = None, reorder = False):
+        if network is not None and network.eligible(self):
+            self.join_node = network.add_rule(self)
+            return
         for i, (kb_name, fact_name, arg_patterns, multi_match) \
          in enumerate(self.foreach_facts):
             self.rule_base.engine.get_kb(kb_name, fact_base.fact_base) \
                 .add_fc_rule_ref(fact_name, self, i)
+        if reorder and self.reorderable(): self.plans = {}
 
     def reset(self):
         self.ran = False
+        self.join_node = None
+        self.plans = None
+
+    def reorderable(self):
+        r'''Can the premises of this rule be looked up in any order?
+
+        Only rules with more than one premise, all of them simple fact_base
+        premises (no first, forall or notany clauses), are reordered.
+        '''
+        engine = self.rule_base.engine
+        return len(self.foreach_facts) > 1 and \
+               all(not multi_match and
+                   isinstance(engine.get_kb(kb_name, fact_base.fact_base),
+                              fact_base.fact_base)
+                   for kb_name, fact_name, arg_patterns, multi_match
+                    in self.foreach_facts)
 
     def run(self):
         self.ran = True
-        self.rule_fn(self)
+        if self.join_node is None:
+            self.call_rule_fn()
+        else:
+            # Matches added from here on are fired by the join_node.
+            tokens = tuple(self.join_node.tokens)
+            self.join_node.network.changing(self.join_node)
+            self.join_node.fc_rules.append(self)
+            for token in tokens: self.fire(token)
+
+    def fire(self, token, rerun = False):
+        r'''Runs the rule with all of its fact premises bound to token.
+        '''
+        if rerun: self.rule_base.num_fc_rules_rerun += 1
+        context = contexts.simple_context()
+        for var_name, value in token.items():
+            context.bind(var_name, context, value)
+        self.rule_fn(self, context, All_premises)
 
     def new_fact(self, fact_args, n):
         if self.ran:
@@ -100,11 +151,209 @@ class fc_rule(rule):
                                       fact_args)):
                     self.rule_base.num_fc_rules_rerun += 1
                     if self.foreach_facts[n][3]:
-                        self.rule_fn(self)
+                        self.call_rule_fn()
                     else:
-                        self.rule_fn(self, context, n)
+                        self.call_rule_fn(context, n, fact_args)
                 context.done()
 
+    def call_rule_fn(self, context = None, index = None, fact_args = None):
+        r'''Calls the rule function.  With truth maintenance, the facts that
+        it matches are recorded as it runs, starting with fact_args (which
+        matched premise index).
+        '''
+        justifications = self.rule_base.engine.justifications
+        if justifications is None:
+            self.run_rule_fn(context, index)
+            return
+        matched = justifications.matched
+        if fact_args is None:
+            justifications.matched = []
+        else:
+            kb_name, fact_name = self.foreach_facts[index][:2]
+            kb = self.rule_base.engine.get_kb(kb_name)
+            justifications.matched = \
+              [(kb.get_entity_list(fact_name), fact_args)]
+        try:
+            self.run_rule_fn(context, index)
+        finally:
+            justifications.matched = matched
+
+    def run_rule_fn(self, context, index):
+        if self.plans is None:
+            self.rule_fn(self, context, index)
+        else:
+            self.join(context, index)
+
+    def join(self, context, index):
+        r'''Looks up the fact premises in the order given by premise_order,
+        and then runs the rule function with all of them bound (like fire).
+
+        Index is the premise already bound in context by new_fact, if any.
+        Python premises are run by the rule function, after all of the fact
+        premises are matched.
+        '''
+        engine = self.rule_base.engine
+        order = self.premise_order(index)
+        if context is None: context = contexts.simple_context()
+        def lookups(i):
+            if i == len(order):
+                self.fire(dict((var_name, context.lookup_data(var_name))
+                               for var_name in context.bindings))
+            else:
+                kb_name, fact_name, arg_patterns = \
+                  self.foreach_facts[order[i]][:3]
+                with engine.lookup(kb_name, fact_name, context, arg_patterns) \
+                  as gen:
+                    for dummy in gen: lookups(i + 1)
+        try:
+            lookups(0)
+        finally:
+            context.done()
+
+    def premise_order(self, index = None):
+        r'''Returns the indexes of the premises to look up, in order, leaving
+        out index (which is already bound).
+
+        Each step takes the premise expected to match the fewest facts (see
+        fact_list.estimate), given the variables bound by the premises before
+        it.  The order is kept until the cardinality of one of the fact_lists
+        is recomputed.
+        '''
+        engine = self.rule_base.engine
+        fact_lists = \
+          tuple(engine.get_kb(kb_name, fact_base.fact_base) \
+                      .get_entity_list(fact_name)
+                for kb_name, fact_name, arg_patterns, multi_match
+                 in self.foreach_facts)
+        cardinalities = tuple(fact_list.get_cardinality()
+                              for fact_list in fact_lists)
+        plan = self.plans.get(index)
+        if plan is not None and plan[0] == cardinalities: return plan[1]
+        bound = set()
+        if index is not None:
+            bound.update(pattern_variables(self.foreach_facts[index][2]))
+        todo = [i for i in range(len(self.foreach_facts)) if i != index]
+        order = []
+        while todo:
+            def cost(i):
+                arg_patterns = self.foreach_facts[i][2]
+                return fact_lists[i].estimate(
+                         len(arg_patterns),
+                         tuple(n for n, pat in enumerate(arg_patterns)
+                                if pattern_variables((pat,), True) <= bound))
+            best = min(todo, key = cost)  # the first one, if there's a tie
+            todo.remove(best)
+            order.append(best)
+            bound.update(pattern_variables(self.foreach_facts[best][2]))
+        order = tuple(order)
+        self.plans[index] = cardinalities, order
+        return order
+
     def foreach_patterns(self, foreach_index):
         return self.foreach_facts[foreach_index][2]
 
+
+def pattern_variables(patterns, anonymous = False):
+    r'''Returns the set of names of the variables in patterns.
+
+    If anonymous is True, a name that can't be bound ('_') is included for
+    anonymous variables, so that a pattern with one is never fully bound.
+
+        >>> from pyke import pattern
+        >>> sorted(pattern_variables((contexts.variable('a'),
+        ...                           pattern.pattern_literal(1),
+        ...                           contexts.anonymous('_b'),
+        ...                           pattern.pattern_tuple(
+        ...                             (contexts.variable('c'),
+        ...                              contexts.anonymous('_e')),
+        ...                             contexts.variable('d')))))
+        ['a', 'c', 'd']
+        >>> pattern_variables((contexts.anonymous('_b'),), True)
+        {'_'}
+        >>> pattern_variables((pattern.pattern_tuple(
+        ...                      (contexts.anonymous('_b'),)),), True)
+        {'_'}
+    '''
+    ans = set()
+    todo = list(patterns)
+    while todo:
+        pat = todo.pop()
+        if isinstance(pat, contexts.anonymous):
+            if anonymous: ans.add('_')
+        elif isinstance(pat, contexts.variable):
+            ans.add(pat.name)
+        elif isinstance(pat, pattern.pattern_tuple):
+            todo.extend(pat.elements)
+            if pat.rest_var is not None: todo.append(pat.rest_var)
+    return ans
+
+class delta_batch(object):
+    r'''
+        Semi-naive forward-chaining.
+
+        While a batch is running (as engine.fc_batch), asserted facts are not
+        added to their fact_lists right away.  They are held until the end
+        of the round, and then all added together as the delta for the next
+        round.  Each new fact is then passed to the fc_rules that use it,
+        which join it with the facts known at the end of the last round.
+
+        This also means that long chains of derivations don't nest Python
+        calls.
+
+        Batches are also used to add many facts at once (see
+        engine.bulk_load), with no rule_base.
+
+            >>> from pyke import fact_base
+            >>> fl = fact_base.fact_list('f')
+            >>> batch = delta_batch(None)
+            >>> for args in ((1,), ([2],), (1,), ([2],)): batch.add(fl, args)
+            >>> batch.run()
+            >>> fl.case_specific_facts
+            [(1,), ([2],)]
+
+        Facts that are already there are dropped, whether their args are
+        hashable or not:
+
+            >>> for args in ((3,), ([2],)): batch.add(fl, args)
+            >>> batch.run()
+            >>> fl.case_specific_facts
+            [(1,), ([2],), (3,)]
+    '''
+    def __init__(self, rule_base):
+        self.rule_base = rule_base
+        self.pending = []       # [(fact_list, args)]
+        self.pending_sets = {}  # {fact_list: fact_base.fact_set}
+
+    def add(self, fact_list, args):
+        # Facts that are already in the fact_list are dropped by run.
+        pending = self.pending_sets.get(fact_list)
+        if pending is None:
+            pending = self.pending_sets[fact_list] = fact_base.fact_set()
+        if args not in pending:
+            pending.add(args)
+            self.pending.append((fact_list, args))
+
+    def run(self):
+        r'''Runs rounds until no new facts are asserted.
+        '''
+        while self.pending:
+            pending = self.pending
+            self.pending = []
+            self.pending_sets = {}
+            facts = {}          # {fact_list: [args]}
+            for fact_list, args in pending:
+                fact_lists_facts = facts.get(fact_list)
+                if fact_lists_facts is None:
+                    fact_lists_facts = facts[fact_list] = []
+                fact_lists_facts.append(args)
+            new_facts = dict((fact_list,
+                              fact_base.fact_set(
+                                fact_list.store_case_specific_facts(args)))
+                             for fact_list, args in facts.items())
+            delta = [(fact_list, args)
+                     for fact_list, args in pending
+                      if args in new_facts[fact_list]]
+            if self.rule_base is not None:
+                self.rule_base.num_fc_rounds += 1
+                self.rule_base.num_fc_delta_facts += len(delta)
+            for fact_list, args in delta: fact_list.trigger_fc_rules(args)
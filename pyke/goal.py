@@ -17,11 +17,102 @@ EXAMPLE USAGE:
 
 
 
+import os
 import itertools
+import threading
+import collections
+import pickle
+import tempfile
+import pyke
 from pyke import contexts, knowledge_engine, krb_compiler
 
+# The goal parser keeps its state in module globals, so only one thread at a
+# time may use it.  This also guards the Cache.
+Compile_lock = threading.Lock()
+
+# The number of compiled goals to remember (0 to turn the cache off):
+Cache_size = 256
+
+Cache = collections.OrderedDict()       # {goal_str: prover}, oldest first
+
+# The name of the goal cache file in a compiled_krb directory:
+Cache_filename = 'compiled_goals.pickle'
+
 def compile(goal_str):
-    return prover(goal_str, *krb_compiler.compile_goal(goal_str))
+    r'''Returns the prover for goal_str.
+
+    The last Cache_size goals compiled are remembered, so that proving the
+    same goal_str again doesn't parse it again:
+
+        >>> Cache.clear()
+        >>> g = compile('family.son_of($child, bruce)')
+        >>> g.rb_name, g.goal_name, g.pattern_vars
+        ('family', 'son_of', ['child'])
+        >>> compile('family.son_of($child, bruce)') is g
+        True
+    '''
+    with Compile_lock:
+        ans = Cache.get(goal_str)
+        if ans is not None:
+            Cache.move_to_end(goal_str)
+            return ans
+        ans = prover(goal_str, *krb_compiler.compile_goal(goal_str))
+        if Cache_size > 0:
+            Cache[goal_str] = ans
+            while len(Cache) > Cache_size: Cache.popitem(False)
+        return ans
+
+def save_cache(path):
+    r'''Writes the cached goals to path, for load_cache.
+
+    The file is written as a temp file first and then renamed, so that
+    other processes never see a partial file.
+
+        >>> path = os.path.join(tempfile.mkdtemp(), Cache_filename)
+        >>> save_cache(path)
+        >>> Cache.clear()
+        >>> load_cache(path)
+        1
+        >>> list(Cache.keys())
+        ['family.son_of($child, bruce)']
+        >>> Cache['family.son_of($child, bruce)'].patterns[0] is \
+        ...   contexts.variable('child')
+        True
+    '''
+    with Compile_lock:
+        goals = dict((goal_str, (p.rb_name, p.goal_name, p.patterns,
+                                 p.pattern_vars))
+                     for goal_str, p in Cache.items())
+    fd, temp_path = tempfile.mkstemp(dir = os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((pyke.version, pyke.compiler_version), f)
+            pickle.dump(goals, f)
+        os.replace(temp_path, path)
+    except:
+        os.remove(temp_path)
+        raise
+
+def load_cache(f):
+    r'''Adds the goals saved by save_cache to the Cache.
+
+    F is the path or an open binary file.  Goals saved by a different
+    version of the compiler are ignored.  Returns the number of goals
+    added.
+    '''
+    if isinstance(f, str):
+        with open(f, 'rb') as f2: return load_cache(f2)
+    pyke_version, compiler_version = pickle.load(f)
+    if compiler_version != pyke.compiler_version: return 0
+    goals = pickle.load(f)
+    num_added = 0
+    with Compile_lock:
+        for goal_str, args in goals.items():
+            if goal_str not in Cache and len(Cache) < Cache_size:
+                Cache[goal_str] = prover(goal_str, *args)
+                Cache.move_to_end(goal_str, False)
+                num_added += 1
+    return num_added
 
 class prover(object):
     def __init__(self, goal_str, rb_name, goal_name, patterns, pattern_vars):
@@ -66,7 +66,17 @@ class immutable_dict(dict):
         Traceback (most recent call last):
             ...
         TypeError: update not allowed on plan context
+
+        Unpickling doesn't go through __setitem__, so plans may be pickled:
+
+        >>> import pickle
+        >>> im2 = pickle.loads(pickle.dumps(im))
+        >>> type(im2).__name__, sorted(im2.items())
+        ('immutable_dict', [('a', 1), ('b', 2)])
     '''
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
+
     def __delitem__(self, key):
         raise TypeError("del (%s) not allowed on plan context" % key)
 
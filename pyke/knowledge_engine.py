@@ -27,6 +27,8 @@ import types
 import os, os.path
 import imp
 import re
+import copy
+import threading
 import contextlib
 
 if sys.version_info[0] < 3:
@@ -75,41 +77,86 @@ class engine(object):
 
         kws can be: load_fc, load_bc, load_fb and load_qb.  They are all
         boolean valued and default to True.
+
+        kws can also be lazy (default False).  If True, no knowledge bases
+        (or rule bases) are loaded until they are first referenced (see
+        engine.load_kb).
         '''
 
         # import this stuff here to avoid import cycles...
         global condensedPrint, pattern, fact_base, goal, rule_base, special, \
-               target_pkg
+               target_pkg, fc_network, snapshot, startup_profile, fc_rule
         from pyke import (condensedPrint, pattern, fact_base, goal, rule_base,
-                          special, target_pkg)
+                          special, target_pkg, fc_network, snapshot,
+                          startup_profile, fc_rule)
 
         for keyword in kws.keys():
-            if keyword not in ('load_fc', 'load_bc', 'load_fb', 'load_qb'):
+            if keyword not in ('load_fc', 'load_bc', 'load_fb', 'load_qb',
+                               'lazy'):
                 raise TypeError("engine.__init__() got an unexpected keyword "
                                 "argument %r" %
                                   keyword)
+        self.lazy = kws.pop('lazy', False)
         self.knowledge_bases = {}
         self.rule_bases = {}
+        self.fc_network = None
+        self.fc_batch = None    # fc_rule.delta_batch while running one
+        self.justifications = None      # see engine.activate
+        self.tabling = False    # whether any goals are tabled, see table
+        self.tables_filled = False      # whether any answer_tables are kept
+        self.cur_snapshot = None        # see engine.snapshot
+        self.compiled_modules = []      # the modules populating this engine
+        self.target_package_names = ()  # of the compiled_krb packages
+        self.thread_sessions = threading.local()
+        self.lazy_targets = {}  # {kb_name: [(target_pkg, target_filename)]}
+                                #   of those not loaded yet
+        self.lazy_lock = threading.RLock()
+        self.load_flags = dict(load_fc = True, load_bc = True,
+                               load_fb = True, load_qb = True)
+        self.load_flags.update(kws)
         special.create_for(self)
 
-        if len(search_paths) == 1 and isinstance(search_paths[0], tuple) and \
-           search_paths[0][0] == '*direct*' and \
-           isinstance(search_paths[0][1], types.ModuleType):
-            # secret hook for the compiler to initialize itself (so the
-            # compiled python module can be in an egg).
-            search_paths[0][1].populate(self)
-        else:
-            target_pkgs = {}  # {target_package_name: target_pkg}
-            for path in search_paths:
-                self._create_target_pkg(path, target_pkgs)
-            for target_package in target_pkgs.values():
-                if debug:
-                    print("target_package:", target_package, file=sys.stderr)
-                target_package.compile(self)
-                target_package.write()
-                target_package.load(self, **kws)
-        for kb in self.knowledge_bases.values(): kb.init2()
-        for rb in self.rule_bases.values(): rb.init2()
+        with startup_profile.from_environ():
+            if len(search_paths) == 1 and \
+               isinstance(search_paths[0], tuple) and \
+               search_paths[0][0] == '*direct*' and \
+               isinstance(search_paths[0][1], types.ModuleType):
+                # secret hook for the compiler to initialize itself (so the
+                # compiled python module can be in an egg).  Also used to load
+                # frozen bundles (see pyke.bundle).
+                self.populate(search_paths[0][1])
+                if hasattr(search_paths[0][1], 'load'):
+                    search_paths[0][1].load(self)
+            else:
+                target_pkgs = {}  # {target_package_name: target_pkg}
+                for path in search_paths:
+                    with startup_profile.phase('find_sources', str(path)):
+                        self._create_target_pkg(path, target_pkgs)
+                for target_package in target_pkgs.values():
+                    if debug:
+                        print("target_package:", target_package,
+                              file=sys.stderr)
+                    with target_package.compile_lock():
+                        with startup_profile.phase('compile',
+                                                   target_package.package_name):
+                            target_package.compile(self)
+                        with startup_profile.phase('write',
+                                                   target_package.package_name):
+                            target_package.write()
+                    if self.lazy:
+                        for kb_name, target_filenames \
+                         in target_package.manifest().items():
+                            self.lazy_targets.setdefault(kb_name, []) \
+                                .extend((target_package, target_filename)
+                                        for target_filename in target_filenames)
+                    else:
+                        target_package.load(self, **kws)
+                    with startup_profile.phase('load_goal_cache',
+                                               target_package.package_name):
+                        target_package.load_goal_cache()
+                self.target_package_names = tuple(target_pkgs.keys())
+            for kb in self.knowledge_bases.values(): kb.init2()
+            for rb in self.rule_bases.values(): rb.init2()
 
     def _create_target_pkg(self, path, target_pkgs):
         # Does target_pkg.add_source_package.
@@ -225,6 +272,21 @@ class engine(object):
         tp.add_source_package(source_package_name, remainder_path,
                               source_package_dir)
 
+    def populate(self, module):
+        r'''Creates the rules in the compiled (_fc or _bc) module in this
+        engine.
+        '''
+        module.populate(self)
+        self.compiled_modules.append(module)
+
+    def session(self):
+        r'''Returns the calling thread's session (see knowledge_engine.session),
+        creating it the first time.
+        '''
+        ans = getattr(self.thread_sessions, 'session', None)
+        if ans is None: ans = self.thread_sessions.session = session(self)
+        return ans
+
     def get_ask_module(self):
         if not hasattr(self, 'ask_module'):
             from pyke import ask_tty
@@ -236,9 +298,96 @@ class engine(object):
         '''
         for rb in self.rule_bases.values(): rb.reset()
         for kb in self.knowledge_bases.values(): kb.reset()
+        self.fc_network = None
+        self.justifications = None
+        self.cur_snapshot = None
+
+    def snapshot(self):
+        r'''Returns a snapshot of the case specific facts and active rule
+        bases, to be passed to engine.restore.
+
+        Only the last snapshot taken since the last reset may be restored.
+        '''
+        self.cur_snapshot = snapshot.snapshot(self)
+        return self.cur_snapshot
+
+    def restore(self, snapshot):
+        r'''Returns the engine to the snapshot (see pyke.snapshot).
+
+        This is a cheaper alternative to reset, followed by activating the
+        same rule bases again, as it only undoes what has changed since the
+        snapshot was taken.  Universal facts are not removed.
+        '''
+        snapshot.restore()
+
+    def save_goal_cache(self, path = None):
+        r'''Saves the goals compiled so far by this process to path, so
+        that engines created later (for example, in other worker processes)
+        don't have to parse them again.
+
+        Path defaults to the goal cache file in the first compiled_krb
+        directory, which is loaded whenever an engine is created from it.
+        '''
+        if path is None:
+            if not self.target_package_names:
+                raise AssertionError("engine.save_goal_cache: no compiled_krb "
+                                     "directory")
+            path = os.path.join(
+                     os.path.dirname(
+                       sys.modules[self.target_package_names[0]].__file__),
+                     goal.Cache_filename)
+        goal.save_cache(path)
+
+    def load_kb(self, kb_name):
+        r'''Loads the knowledge base (or rule base) kb_name from the
+        compiled_krb directories, if the engine was created with lazy=True
+        and it hasn't been loaded yet.  Returns True if anything was
+        loaded.
+
+        This is called by get_kb, get_rb (and so activate) and when a rule
+        base's parent is needed, so it only needs to be called directly to
+        load knowledge bases ahead of time.
+
+            >>> import os
+            >>> from pyke import knowledge_engine
+            >>> source_dir = os.path.dirname(os.path.dirname(__file__))
+            >>> family_relations_dir = \
+            ...   os.path.join(source_dir, 'examples/family_relations')
+            >>> engine = knowledge_engine.engine(family_relations_dir,
+            ...                                  lazy=True)
+            >>> sorted(engine.lazy_targets.keys())
+            ['bc2_example', 'bc_example', 'example', 'family', 'fc_example']
+            >>> def loaded():
+            ...     return sorted(engine.rule_bases.keys()), \
+            ...            'family' in engine.knowledge_bases
+            >>> loaded()
+            ([], False)
+            >>> engine.activate('bc_example')
+            >>> loaded()
+            (['bc_example'], False)
+            >>> engine.prove_1_goal(
+            ...   'bc_example.how_related(bruce, thomas, $ans)')[0]['ans']
+            ('son', 'father')
+            >>> 'family' in engine.knowledge_bases
+            True
+            >>> engine.load_kb('family'), sorted(engine.lazy_targets.keys())
+            (False, ['bc2_example', 'example', 'fc_example'])
+        '''
+        if kb_name not in self.lazy_targets: return False
+        with self.lazy_lock:
+            targets = self.lazy_targets.pop(kb_name, None)
+            if targets is None: return False
+            for target_package, target_filename in targets:
+                target_package.do_by_ext('load', target_filename, self,
+                                         self.load_flags)
+            for kb in tuple(self.knowledge_bases.values()): kb.init2()
+            for rb in tuple(self.rule_bases.values()): rb.init2()
+            return True
 
     def get_kb(self, kb_name, _new_class = None):
         ans = self.knowledge_bases.get(kb_name)
+        if ans is None and self.load_kb(kb_name):
+            ans = self.knowledge_bases.get(kb_name)
         if ans is None:
             if _new_class: ans = _new_class(self, kb_name)
             else: raise KeyError("knowledge_base %s not found" % kb_name)
@@ -246,6 +395,8 @@ class engine(object):
 
     def get_rb(self, rb_name):
         ans = self.rule_bases.get(rb_name)
+        if ans is None and self.load_kb(rb_name):
+            ans = self.rule_bases.get(rb_name)
         if ans is None: raise KeyError("rule_base %s not found" % rb_name)
         return ans
 
@@ -270,6 +421,15 @@ class engine(object):
         return self.get_kb(kb_name, fact_base.fact_base) \
                    .add_universal_fact(fact_name, args)
 
+    def add_universal_facts(self, kb_name, fact_name, facts):
+        r'''Adds each of the facts (sequences of args) as a universal fact,
+        updating the indexes once for all of them.
+        '''
+        self.get_kb(kb_name, fact_base.fact_base) \
+            .add_universal_facts(fact_name,
+                                 (self.check_args(args, 'add_universal_facts')
+                                  for args in facts))
+
     def add_case_specific_fact(self, kb_name, fact_name, args):
         r'''Case specific facts are deleted by engine.reset.
         '''
@@ -280,6 +440,91 @@ class engine(object):
         return self.get_kb(kb_name, fact_base.fact_base) \
                    .add_case_specific_fact(fact_name, args)
 
+    def add_case_specific_facts(self, kb_name, fact_name, facts):
+        r'''Adds each of the facts (sequences of args) as a case specific
+        fact, in one batch (see bulk_load).
+
+            >>> import os
+            >>> from pyke import knowledge_engine
+            >>> source_dir = os.path.dirname(os.path.dirname(__file__))
+            >>> family_relations_dir = \
+            ...   os.path.join(source_dir, 'examples/family_relations')
+            >>> engine = knowledge_engine.engine(family_relations_dir)
+            >>> engine.activate('fc_example')
+            >>> engine.add_case_specific_facts('family', 'son_of',
+            ...                                (('tom%d' % i, 'tom', 'ann')
+            ...                                 for i in range(3)))
+            >>> engine.prove_1_goal(
+            ...   'family.siblings(tom0, $b, $_, $_)')[0]['b']
+            'tom1'
+            >>> engine.prove_1_goal(
+            ...   'family.child_parent(tom2, $p, mother, son)')[0]['p']
+            'ann'
+
+        Facts with unhashable args are added too, and dropped if they are
+        already there:
+
+            >>> engine.add_case_specific_facts('fb', 'f',
+            ...                                (([3], 4), (1, 2), ([3], 4)))
+            >>> engine.add_case_specific_facts('fb', 'f',
+            ...                                ((5, 6), ([3], 4)))
+            >>> engine.get_kb('fb').dump_specific_facts()
+            f([3], 4)
+            f(1, 2)
+            f(5, 6)
+        '''
+        with self.bulk_load():
+            self.get_kb(kb_name, fact_base.fact_base) \
+                .add_case_specific_facts(fact_name,
+                                         (self.check_args(args,
+                                            'add_case_specific_facts')
+                                          for args in facts))
+
+    def check_args(self, args, fn_name):
+        if isinstance(args, str):
+            raise TypeError("engine.%s: illegal args type, %s" %
+                              (fn_name, type(args)))
+        return tuple(args)
+
+    @contextlib.contextmanager
+    def bulk_load(self):
+        r'''Returns a context manager that holds back the case specific facts
+        added (or asserted) within it until the end, and then adds them all
+        at once.
+
+        The new facts are added to each fact list, and to its indexes, in
+        one go, and only then passed to the forward-chaining rules that use
+        them.  The facts that these rules assert are also added in batches,
+        round by round, (as with activate's semi_naive option) until no new
+        facts are asserted.
+
+        If an exception is raised within it, the facts held back are
+        dropped.  Within a bulk_load, facts are not yet visible to lookups or
+        goals.
+
+            >>> from pyke import knowledge_engine
+            >>> engine = knowledge_engine.engine()
+            >>> with engine.bulk_load():
+            ...     for i in range(3): engine.assert_('fb', 'f', (i, i % 2))
+            ...     engine.assert_('fb', 'f', (1, 1))
+            ...     engine.get_kb('fb').dump_specific_facts()
+            >>> engine.get_kb('fb').dump_specific_facts()
+            f(0, 0)
+            f(1, 1)
+            f(2, 0)
+        '''
+        if self.fc_batch is not None:
+            # Already in a batch.
+            yield
+            return
+        batch = self.fc_batch = fc_rule.delta_batch(None)
+        try:
+            yield
+            batch.run()
+        finally:
+            self.fc_batch = None
+        self.clear_tables()
+
     def assert_(self, kb_name, entity_name, args):
         if isinstance(args, str):
             raise TypeError("engine.assert_: "
@@ -288,17 +533,146 @@ class engine(object):
         return self.get_kb(kb_name, fact_base.fact_base) \
                    .assert_(entity_name, args)
 
-    def activate(self, *rb_names):
+    def retract(self, kb_name, fact_name, args):
+        r'''Retracts the case specific fact, along with the facts derived from
+        it by the forward-chaining rules that are no longer justified (if
+        the rule bases were activated with truth_maintenance=True).  Returns
+        the number of facts retracted.
+
+            >>> import os
+            >>> from pyke import knowledge_engine
+            >>> source_dir = os.path.dirname(os.path.dirname(__file__))
+            >>> family_relations_dir = \
+            ...   os.path.join(source_dir, 'examples/family_relations')
+            >>> engine = knowledge_engine.engine(family_relations_dir)
+            >>> for son in ('tom', 'dick', 'harry'):
+            ...     engine.assert_('family', 'son_of', (son, 'bob', 'ann'))
+            >>> engine.activate('fc_example', truth_maintenance=True)
+            >>> def siblings(kid):
+            ...     with engine.prove_goal(
+            ...            'family.siblings($kid, $sibling, $_, $_)',
+            ...            kid=kid) as gen:
+            ...         return sorted(vars['sibling'] for vars, plan in gen)
+            >>> siblings('tom')
+            ['dick', 'harry']
+
+        This also retracts the child_parent, siblings and how_related facts
+        derived from harry's son_of fact:
+
+            >>> engine.retract('family', 'son_of', ('harry', 'bob', 'ann'))
+            17
+            >>> siblings('tom')
+            ['dick']
+            >>> engine.retract_where('family', 'son_of',
+            ...                      lambda args: args[0] == 'dick')
+            13
+            >>> siblings('tom')
+            []
+        '''
+        return self.get_kb(kb_name, fact_base.fact_base) \
+                   .retract(fact_name, self.check_args(args, 'retract'))
+
+    def retract_where(self, kb_name, fact_name, test):
+        r'''Retracts the case specific facts for which test(args) is True,
+        like retract.
+        '''
+        return self.get_kb(kb_name, fact_base.fact_base) \
+                   .retract_where(fact_name, test)
+
+    def add_index(self, kb_name, fact_name, arg_positions):
+        r'''Declares an index on the arg_positions of fact_name.
+
+        Declared indexes are never discarded to stay within
+        fact_base.Index_budget.
+        '''
+        return self.get_kb(kb_name, fact_base.fact_base) \
+                   .add_index(fact_name, arg_positions)
+
+    def add_range_index(self, kb_name, fact_name, arg_position):
+        r'''Declares a sorted index on the arg_position of fact_name.
+
+        The compiler passes the simple comparisons in the check premises
+        that follow a fact premise (like "check $price > 100", or
+        "check $name.startswith('ab')") down to its lookup.  With a range
+        index on that argument, only the facts in range are looked up.
+        '''
+        return self.get_kb(kb_name, fact_base.fact_base) \
+                   .add_range_index(fact_name, arg_position)
+
+    def table(self, rb_name, *goal_names):
+        r'''Tables (memoizes) the answers to goal_names in rule_base rb_name,
+        or to all of its goals if no goal_names are given.
+
+        The tables are cleared by engine.reset and whenever facts are added.
+        '''
+        self.get_rb(rb_name).table(*goal_names)
+
+    def clear_tables(self):
+        if self.tables_filled:
+            for rb in self.rule_bases.values(): rb.clear_tables()
+            self.tables_filled = False
+
+    def activate(self, *rb_names, fc_network = False, semi_naive = False,
+                 truth_maintenance = False, reorder_premises = False):
         r'''Activate rule bases.
 
         This runs all forward-chaining rules in the activated rule bases, so
         add your facts before doing this!
-        '''
-        for rb_name in rb_names: self.get_rb(rb_name).activate()
 
-    def lookup(self, kb_name, entity_name, pat_context, patterns):
-        return self.get_kb(kb_name).lookup(pat_context, pat_context,
-                                           entity_name, patterns)
+        If fc_network is True, the forward-chaining rules are run through a
+        join network (see pyke.fc_network) that stores their partial matches
+        until the next reset.  This uses more memory, but avoids rerunning
+        the rules from scratch as new facts are asserted.
+
+        If semi_naive is True, the facts asserted by the forward-chaining
+        rules are added in rounds (see fc_rule.delta_batch), rather than one
+        at a time.
+
+        If truth_maintenance is True, the facts asserted by the
+        forward-chaining rules from then on (until the next reset) are
+        recorded with the facts that they were derived from, so that
+        engine.retract also retracts the facts that are no longer justified
+        (see pyke.truth_maintenance).  This can't be used with the
+        fc_network.
+
+        If reorder_premises is True, the fact premises of the
+        forward-chaining rules are looked up in the order expected to match
+        the fewest facts, by the cardinality statistics of their fact_lists
+        (see fc_rule.premise_order), rather than in the order that they are
+        written.  Only rules whose premises are all simple fact premises are
+        reordered, and their python premises are run once all of the fact
+        premises are matched.  This doesn't apply to the rules run by the
+        fc_network.
+        '''
+        if truth_maintenance and self.justifications is None:
+            if fc_network or self.fc_network is not None:
+                raise AssertionError("engine.activate: truth_maintenance "
+                                     "can't be used with the fc_network")
+            from pyke.truth_maintenance import justifications
+            self.justifications = justifications()
+        elif fc_network and self.justifications is not None:
+            raise AssertionError("engine.activate: the fc_network can't be "
+                                 "used with truth_maintenance")
+        for rb_name in rb_names:
+            self.get_rb(rb_name).activate(fc_network, semi_naive,
+                                          reorder_premises)
+
+    def get_fc_network(self):
+        if self.fc_network is None:
+            self.fc_network = fc_network.network(self)
+        return self.fc_network
+
+    def lookup(self, kb_name, entity_name, pat_context, patterns,
+               ranges = None):
+        kb = self.get_kb(kb_name)
+        if isinstance(kb, fact_base.fact_base):
+            matched = None
+            if self.justifications is not None:
+                # Called by an fc_rule, see truth_maintenance.
+                matched = self.justifications.matched
+            return kb.lookup(pat_context, pat_context, entity_name, patterns,
+                             matched, ranges)
+        return kb.lookup(pat_context, pat_context, entity_name, patterns)
 
     def prove_goal(self, goal_str, **args):
         r'''Proves goal_str with logic variables set to args.
@@ -366,11 +740,39 @@ class engine(object):
         '''
         return goal.compile(goal_str).prove_1(self, **args)
 
-    def prove(self, kb_name, entity_name, pat_context, patterns):
+    def prove_many(self, goal_str, args_list, workers = None, ordered = True,
+                   chunksize = 1):
+        r'''Proves goal_str once for each dict of logic variable values in
+        args_list, using a pool of worker processes.
+
+        This generates (args, ans) for each args in args_list, where ans is
+        the (vars, plan) that prove_1_goal would return, or the exception
+        (usually CanNotProve) that it would raise.  These are generated in the
+        order of args_list, or as they are completed if ordered is False.
+
+        Each worker creates its own engine from the compiled_krb packages of
+        this engine once, then adds this engine's case specific facts and
+        activates the same rule bases.  See pyke.process_pool.
+        '''
+        global process_pool
+        try:
+            process_pool
+        except NameError:
+            from pyke import process_pool
+        return process_pool.prove_many(self, goal_str, args_list, workers,
+                                       ordered, chunksize)
+
+    def prove(self, kb_name, entity_name, pat_context, patterns,
+              ranges = None):
         r'''Deprecated.  Use engine.prove_goal.
+
+        Ranges are passed on to fact_base lookups (see fact_list.lookup).
         '''
-        return self.get_kb(kb_name).prove(pat_context, pat_context,
-                                          entity_name, patterns)
+        kb = self.get_kb(kb_name)
+        if ranges and isinstance(kb, fact_base.fact_base):
+            return kb.lookup(pat_context, pat_context, entity_name, patterns,
+                             ranges = ranges)
+        return kb.prove(pat_context, pat_context, entity_name, patterns)
 
     def prove_n(self, kb_name, entity_name, fixed_args = (), num_returns = 0):
         '''Returns a context manager for a generator of:
@@ -427,6 +829,122 @@ class engine(object):
     def untrace(self, rb_name, rule_name):
         self.get_rb(rb_name).untrace(rule_name)
 
+class session(engine):
+    r'''
+        A session shares the compiled rules and the universal facts of the
+        engine that it was created from, but has its own case specific facts,
+        active rule bases, statistics and question answers.  So each thread
+        may use its own session of the same engine at the same time.
+
+        Engine.session returns the calling thread's session.  Sessions are
+        used just like engines, but universal facts may only be added to the
+        engine itself, before any sessions are created.
+
+            >>> import os, sys
+            >>> import concurrent.futures
+            >>> source_dir = os.path.dirname(os.path.dirname(__file__))
+            >>> family_relations_dir = \
+            ...   os.path.join(source_dir, 'examples/family_relations')
+            >>> sys.path.insert(0, family_relations_dir)
+            >>> my_engine = engine(family_relations_dir)
+
+            >>> def siblings(n):
+            ...     s = my_engine.session()
+            ...     s.reset()
+            ...     s.add_case_specific_fact('family', 'son_of',
+            ...                              ('kid%d' % n, 'arthur2',
+            ...                               'kathleen'))
+            ...     s.activate('bc_example')
+            ...     with s.prove_goal('bc_example.siblings($kid, $sibling, '
+            ...                       '$_, $_)', kid='kid%d' % n) as gen:
+            ...         return sorted(vars['sibling'] for vars, plan in gen)
+            >>> with concurrent.futures.ThreadPoolExecutor(4) as pool:
+            ...     results = list(pool.map(siblings, range(20)))
+            >>> results[0]
+            ['arthur3', 'david_b', 'ed', 'm_helen', 'marilyn', 'nanette', 'sue']
+            >>> all(result == results[0] for result in results)
+            True
+
+        The engine itself is unchanged:
+
+            >>> my_engine.get_kb('family').get_stats()[2]
+            0
+            >>> my_engine.session().add_universal_fact('family', 'son_of',
+            ...                                        ('x', 'y', 'z'))
+            ... # doctest: +ELLIPSIS
+            Traceback (most recent call last):
+                ...
+            AssertionError: session.add_universal_fact: add universal facts ...
+    '''
+    def __init__(self, parent):
+        self.parent = parent
+        self.knowledge_bases = {}
+        self.rule_bases = {}
+        self.fc_network = None
+        self.fc_batch = None
+        self.justifications = None
+        self.tabling = parent.tabling
+        self.tables_filled = False
+        self.cur_snapshot = None
+        self.compiled_modules = parent.compiled_modules
+        self.num_modules_populated = 0
+        self.target_package_names = parent.target_package_names
+        self.lazy = parent.lazy
+        special.create_for(self)
+        if hasattr(parent, 'ask_module'): self.ask_module = parent.ask_module
+        with parent.lazy_lock:
+            self.add_parents_kbs()
+
+    def add_parents_kbs(self):
+        r'''Adds the rule bases and knowledge bases of the parent engine that
+        this session doesn't have yet.  Returns True if any were added.
+        '''
+        ans = False
+        while self.num_modules_populated < len(self.compiled_modules):
+            module = self.compiled_modules[self.num_modules_populated]
+            self.num_modules_populated += 1
+            module.populate(self)
+            ans = True
+        for kb in tuple(self.parent.knowledge_bases.values()):
+            if kb.name in self.knowledge_bases or \
+               isinstance(kb, (rule_base.rule_base,
+                               special.special_knowledge_base)):
+                continue
+            if isinstance(kb, fact_base.fact_base):
+                kb.copy_for(self)
+            else:
+                copy.deepcopy(kb).register(self)    # e.g., question_bases
+            ans = True
+        for rb in tuple(self.rule_bases.values()):
+            if not rb.initialized:
+                parent_rb = self.parent.rule_bases[rb.name]
+                rb.table_all_goals = parent_rb.table_all_goals
+                rb.tabled_goals = set(parent_rb.tabled_goals)
+                if rb.table_all_goals or rb.tabled_goals: self.tabling = True
+        for kb in tuple(self.knowledge_bases.values()): kb.init2()
+        for rb in tuple(self.rule_bases.values()): rb.init2()
+        return ans
+
+    def load_kb(self, kb_name):
+        r'''Has the parent engine load kb_name, if it's lazy, and then adds
+        whatever the parent has loaded since this session was created.
+        '''
+        if not self.lazy: return False
+        with self.parent.lazy_lock:
+            self.parent.load_kb(kb_name)
+            return self.add_parents_kbs()
+
+    def session(self):
+        return self
+
+    def add_universal_fact(self, kb_name, fact_name, args):
+        raise AssertionError("session.add_universal_fact: "
+                             "add universal facts to the engine")
+
+    def add_universal_facts(self, kb_name, fact_name, facts):
+        raise AssertionError("session.add_universal_facts: "
+                             "add universal facts to the engine")
+
 Compiled_suffix = None
 
 def _get_target_pkg(target_name):
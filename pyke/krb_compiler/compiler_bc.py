@@ -7,15 +7,16 @@ compiler_version = 1
 
 def file(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 6:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('generated_root_pkg', context, arg_patterns[0], arg_context) or True) and \
+         (context.bind('rb_name', context, arg_patterns[1], arg_context) or True) and \
+         ((tuple_2 := pattern.open_tuple(arg_patterns[2], arg_context)) is None and patterns[2].match_pattern(context, context, arg_patterns[2], arg_context) or tuple_2 is not None and len(tuple_2[0]) == 4 and ('file' == tuple_2[0][0] if tuple_2[1] is None else tuple_2[0][0].match_data(context, tuple_2[1], 'file')) and (context.bind('parent', context, tuple_2[0][1], tuple_2[1]) or True) and ((tuple_2_2 := pattern.open_tuple(tuple_2[0][2], tuple_2[1])) is None and pattern.match_arg(context, patterns[2].elements[2], context, tuple_2[0][2], tuple_2[1]) or tuple_2_2 is not None and len(tuple_2_2[0]) == 2 and (context.bind('fc_rules', context, tuple_2_2[0][0], tuple_2_2[1]) or True) and (context.bind('fc_extra_lines', context, tuple_2_2[0][1], tuple_2_2[1]) or True)) and ((tuple_2_3 := pattern.open_tuple(tuple_2[0][3], tuple_2[1])) is None and pattern.match_arg(context, patterns[2].elements[3], context, tuple_2[0][3], tuple_2[1]) or tuple_2_3 is not None and len(tuple_2_3[0]) == 3 and (context.bind('bc_rules', context, tuple_2_3[0][0], tuple_2_3[1]) or True) and (context.bind('bc_extra_lines', context, tuple_2_3[0][1], tuple_2_3[1]) or True) and (context.bind('plan_extra_lines', context, tuple_2_3[0][2], tuple_2_3[1]) or True))) and \
+         (context.bind('fc_lines', context, arg_patterns[3], arg_context) or True) and \
+         (context.bind('bc_lines', context, arg_patterns[4], arg_context) or True) and \
+         (context.bind('plan_lines', context, arg_patterns[5], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
         mark1 = context.mark(True)
         if rule.pattern(0).match_data(context, context,
@@ -131,15 +132,12 @@ def file(rule, arg_patterns, arg_context):
 
 def rule_decl(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 3:
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('rb_name', context, arg_patterns[0], arg_context) or True) and \
+         arg_patterns[1].match_data(context, arg_context, None) and \
+         (context.bind('decl_line', context, arg_patterns[2], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
         mark1 = context.mark(True)
         if rule.pattern(0).match_data(context, context,
@@ -155,15 +153,13 @@ def rule_decl(rule, arg_patterns, arg_context):
 
 def rule_decl_with_parent(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 3:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('rb_name', context, arg_patterns[0], arg_context) or True) and \
+         ((tuple_1 := pattern.open_tuple(arg_patterns[1], arg_context)) is None and patterns[1].match_pattern(context, context, arg_patterns[1], arg_context) or tuple_1 is not None and len(tuple_1[0]) == 3 and ('parent' == tuple_1[0][0] if tuple_1[1] is None else tuple_1[0][0].match_data(context, tuple_1[1], 'parent')) and (context.bind('parent', context, tuple_1[0][1], tuple_1[1]) or True) and (context.bind('excluded_symbols', context, tuple_1[0][2], tuple_1[1]) or True)) and \
+         (context.bind('decl_line', context, arg_patterns[2], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
         mark1 = context.mark(True)
         if rule.pattern(0).match_data(context, context,
@@ -181,15 +177,12 @@ def rule_decl_with_parent(rule, arg_patterns, arg_context):
 
 def fc_rules(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 3:
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('fc_rules', context, arg_patterns[0], arg_context) or True) and \
+         (context.bind('fc_funs', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('fc_init', context, arg_patterns[2], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
         fc_funs = []
         fc_init = []
@@ -242,104 +235,113 @@ def fc_rules(rule, arg_patterns, arg_context):
 
 def fc_rule_(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 3:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if ((tuple_0 := pattern.open_tuple(arg_patterns[0], arg_context)) is None and patterns[0].match_pattern(context, context, arg_patterns[0], arg_context) or tuple_0 is not None and len(tuple_0[0]) == 4 and ('fc_rule' == tuple_0[0][0] if tuple_0[1] is None else tuple_0[0][0].match_data(context, tuple_0[1], 'fc_rule')) and (context.bind('rule_name', context, tuple_0[0][1], tuple_0[1]) or True) and (context.bind('fc_premises', context, tuple_0[0][2], tuple_0[1]) or True) and (context.bind('assertions', context, tuple_0[0][3], tuple_0[1]) or True)) and \
+         (context.bind('fc_fun', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('fc_init', context, arg_patterns[2], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
-        flag_1 = False
-        with engine.prove(rule.rule_base.root_name, 'fc_premises', context,
-                          (rule.pattern(0),
-                           rule.pattern(1),
-                           rule.pattern(2),
-                           rule.pattern(3),
-                           rule.pattern(4),
-                           rule.pattern(5),
-                           rule.pattern(6),
-                           rule.pattern(7),
-                           rule.pattern(1),
-                           rule.pattern(2),
-                           rule.pattern(8),
-                           rule.pattern(9),
-                           rule.pattern(10),)) \
-          as gen_1:
-          for x_1 in gen_1:
-            flag_1 = True
-            assert x_1 is None, \
-              "compiler.fc_rule_: got unexpected plan from when clause 1"
-            flag_2 = False
-            with engine.prove(rule.rule_base.root_name, 'assertions', context,
-                              (rule.pattern(11),
-                               rule.pattern(12),
-                               rule.pattern(10),
-                               rule.pattern(13),)) \
-              as gen_2:
-              for x_2 in gen_2:
-                flag_2 = True
-                assert x_2 is None, \
-                  "compiler.fc_rule_: got unexpected plan from when clause 2"
-                mark3 = context.mark(True)
-                if rule.pattern(14).match_data(context, context,
-                        ("",
-                       "def %s(rule, context = None, index = None):" % context.lookup_data('rule_name'),
-                       ("INDENT", 2),
-                       "engine = rule.rule_base.engine",
-                       "if context is None: context = contexts.simple_context()",
-                       "try:",
-                       ("INDENT", 2),
-                       context.lookup_data('prem_fn_head'),
-                       context.lookup_data('asserts_fn_lines'),
-                       "rule.rule_base.num_fc_rules_triggered += 1",
-                       context.lookup_data('prem_fn_tail'),
-                       "POPINDENT",
-                       "finally:",
-                       ("INDENT", 2),
-                       "context.done()",
-                       "POPINDENT",
-                       "POPINDENT",
-                       )):
-                  context.end_save_all_undo()
+        mark1 = context.mark(True)
+        if rule.pattern(0).match_data(context, context,
+                helpers.push_down_checks(context.lookup_data('fc_premises'))):
+          context.end_save_all_undo()
+          flag_2 = False
+          with engine.prove(rule.rule_base.root_name, 'fc_premises', context,
+                            (rule.pattern(1),
+                             rule.pattern(2),
+                             rule.pattern(3),
+                             rule.pattern(0),
+                             rule.pattern(4),
+                             rule.pattern(5),
+                             rule.pattern(6),
+                             rule.pattern(7),
+                             rule.pattern(2),
+                             rule.pattern(3),
+                             rule.pattern(8),
+                             rule.pattern(9),
+                             rule.pattern(10),)) \
+            as gen_2:
+            for x_2 in gen_2:
+              flag_2 = True
+              assert x_2 is None, \
+                "compiler.fc_rule_: got unexpected plan from when clause 2"
+              flag_3 = False
+              with engine.prove(rule.rule_base.root_name, 'assertions', context,
+                                (rule.pattern(11),
+                                 rule.pattern(12),
+                                 rule.pattern(10),
+                                 rule.pattern(13),)) \
+                as gen_3:
+                for x_3 in gen_3:
+                  flag_3 = True
+                  assert x_3 is None, \
+                    "compiler.fc_rule_: got unexpected plan from when clause 3"
                   mark4 = context.mark(True)
-                  if rule.pattern(15).match_data(context, context,
+                  if rule.pattern(14).match_data(context, context,
                           ("",
-                         "fc_rule.fc_rule('%(name)s', This_rule_base, %(name)s," %
-                         {'name': context.lookup_data('rule_name')},
+                         "def %s(rule, context = None, index = None):" % context.lookup_data('rule_name'),
                          ("INDENT", 2),
-                         helpers.add_brackets(context.lookup_data('prem_decl_lines'), '(', '),'),
-                         helpers.list_format(context.lookup_data('patterns_out'), '(', '))'),
+                         "engine = rule.rule_base.engine",
+                         "if context is None: context = contexts.simple_context()",
+                         "try:",
+                         ("INDENT", 2),
+                         context.lookup_data('prem_fn_head'),
+                         context.lookup_data('asserts_fn_lines'),
+                         "rule.rule_base.num_fc_rules_triggered += 1",
+                         context.lookup_data('prem_fn_tail'),
+                         "POPINDENT",
+                         "finally:",
+                         ("INDENT", 2),
+                         "context.done()",
+                         "POPINDENT",
                          "POPINDENT",
                          )):
                     context.end_save_all_undo()
-                    rule.rule_base.num_bc_rule_successes += 1
-                    yield
+                    mark5 = context.mark(True)
+                    if rule.pattern(15).match_data(context, context,
+                            ("",
+                           "fc_rule.fc_rule('%(name)s', This_rule_base, %(name)s," %
+                           {'name': context.lookup_data('rule_name')},
+                           ("INDENT", 2),
+                           helpers.add_brackets(context.lookup_data('prem_decl_lines'), '(', '),'),
+                           helpers.list_format(context.lookup_data('patterns_out'), '(', '))'),
+                           "POPINDENT",
+                           )):
+                      context.end_save_all_undo()
+                      rule.rule_base.num_bc_rule_successes += 1
+                      yield
+                    else: context.end_save_all_undo()
+                    context.undo_to_mark(mark5)
                   else: context.end_save_all_undo()
                   context.undo_to_mark(mark4)
-                else: context.end_save_all_undo()
-                context.undo_to_mark(mark3)
-            if not flag_2:
-              raise AssertionError("compiler.fc_rule_: 'when' clause 2 failed")
-        if not flag_1:
-          raise AssertionError("compiler.fc_rule_: 'when' clause 1 failed")
+              if not flag_3:
+                raise AssertionError("compiler.fc_rule_: 'when' clause 3 failed")
+          if not flag_2:
+            raise AssertionError("compiler.fc_rule_: 'when' clause 2 failed")
+        else: context.end_save_all_undo()
+        context.undo_to_mark(mark1)
         rule.rule_base.num_bc_rule_failures += 1
     finally:
       context.done()
 
 def fc_premises0(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 13:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('clause_num', context, arg_patterns[1], arg_context) or True) and \
+         patterns[2].match_pattern(context, context, arg_patterns[2], arg_context) and \
+         arg_patterns[3].match_data(context, arg_context, ()) and \
+         arg_patterns[6].match_data(context, arg_context, ()) and \
+         arg_patterns[7].match_data(context, arg_context, ()) and \
+         (context.bind('decl_num_in', context, arg_patterns[8], arg_context) or True) and \
+         patterns[9].match_pattern(context, context, arg_patterns[9], arg_context) and \
+         arg_patterns[10].match_data(context, arg_context, ()) and \
+         (context.bind('patterns_in', context, arg_patterns[11], arg_context) or True) and \
+         patterns[12].match_pattern(context, context, arg_patterns[12], arg_context):
         rule.rule_base.num_bc_rules_matched += 1
         rule.rule_base.num_bc_rule_successes += 1
         yield
@@ -349,15 +351,23 @@ def fc_premises0(rule, arg_patterns, arg_context):
 
 def fc_premises1(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 13:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('rule_name', context, arg_patterns[0], arg_context) or True) and \
+         (context.bind('clause_num', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('next_clause_num', context, arg_patterns[2], arg_context) or True) and \
+         ((tuple_3 := pattern.open_tuple(arg_patterns[3], arg_context)) is None and patterns[3].match_pattern(context, context, arg_patterns[3], arg_context) or tuple_3 is not None and len(tuple_3[0]) >= 1 and (context.bind('first_prem', context, tuple_3[0][0], tuple_3[1]) or True) and (context.bind('rest_prems', context, *pattern.tuple_rest(tuple_3, 1)) or True)) and \
+         (context.bind('break_cond', context, arg_patterns[4], arg_context) or True) and \
+         (context.bind('multi_match', context, arg_patterns[5], arg_context) or True) and \
+         ((tuple_6 := pattern.open_tuple(arg_patterns[6], arg_context)) is None and patterns[6].match_pattern(context, context, arg_patterns[6], arg_context) or tuple_6 is not None and len(tuple_6[0]) >= 1 and (context.bind('fn_head1', context, tuple_6[0][0], tuple_6[1]) or True) and (context.bind('fn_head2', context, *pattern.tuple_rest(tuple_6, 1)) or True)) and \
+         ((tuple_7 := pattern.open_tuple(arg_patterns[7], arg_context)) is None and patterns[7].match_pattern(context, context, arg_patterns[7], arg_context) or tuple_7 is not None and len(tuple_7[0]) >= 1 and (context.bind('fn_tail2', context, tuple_7[0][0], tuple_7[1]) or True) and (context.bind('fn_tail1', context, *pattern.tuple_rest(tuple_7, 1)) or True)) and \
+         (context.bind('decl_num_in', context, arg_patterns[8], arg_context) or True) and \
+         (context.bind('decl_num_out', context, arg_patterns[9], arg_context) or True) and \
+         (context.bind('decl_lines', context, arg_patterns[10], arg_context) or True) and \
+         (context.bind('patterns_in', context, arg_patterns[11], arg_context) or True) and \
+         (context.bind('patterns_out', context, arg_patterns[12], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
         flag_1 = False
         with engine.prove(rule.rule_base.root_name, 'fc_premise', context,
@@ -417,15 +427,23 @@ def fc_premises1(rule, arg_patterns, arg_context):
 
 def fc_premise(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 13:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('rule_name', context, arg_patterns[0], arg_context) or True) and \
+         (context.bind('clause_num', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('next_clause_num', context, arg_patterns[2], arg_context) or True) and \
+         ((tuple_3 := pattern.open_tuple(arg_patterns[3], arg_context)) is None and patterns[3].match_pattern(context, context, arg_patterns[3], arg_context) or tuple_3 is not None and len(tuple_3[0]) >= 6 and ('fc_premise' == tuple_3[0][0] if tuple_3[1] is None else tuple_3[0][0].match_data(context, tuple_3[1], 'fc_premise')) and (context.bind('kb_name', context, tuple_3[0][1], tuple_3[1]) or True) and (context.bind('entity_name', context, tuple_3[0][2], tuple_3[1]) or True) and (context.bind('arg_patterns', context, tuple_3[0][3], tuple_3[1]) or True) and (context.bind('start_lineno', context, tuple_3[0][4], tuple_3[1]) or True) and (context.bind('end_lineno', context, tuple_3[0][5], tuple_3[1]) or True) and (context.bind('ranges', context, *pattern.tuple_rest(tuple_3, 6)) or True)) and \
+         (context.bind('break_cond', context, arg_patterns[4], arg_context) or True) and \
+         (context.bind('multi_match', context, arg_patterns[5], arg_context) or True) and \
+         (context.bind('fn_head', context, arg_patterns[6], arg_context) or True) and \
+         (context.bind('fn_tail', context, arg_patterns[7], arg_context) or True) and \
+         (context.bind('decl_num_in', context, arg_patterns[8], arg_context) or True) and \
+         (context.bind('decl_num_out', context, arg_patterns[9], arg_context) or True) and \
+         (context.bind('decl_lines', context, arg_patterns[10], arg_context) or True) and \
+         (context.bind('patterns_in', context, arg_patterns[11], arg_context) or True) and \
+         patterns[12].match_pattern(context, context, arg_patterns[12], arg_context):
         rule.rule_base.num_bc_rules_matched += 1
         with engine.prove(rule.rule_base.root_name, 'gen_fc_for', context,
                           (rule.pattern(0),
@@ -434,28 +452,29 @@ def fc_premise(rule, arg_patterns, arg_context):
                            rule.pattern(3),
                            rule.pattern(4),
                            rule.pattern(5),
-                           rule.pattern(6),)) \
+                           rule.pattern(6),
+                           rule.pattern(7),)) \
           as gen_1:
           for x_1 in gen_1:
             assert x_1 is None, \
               "compiler.fc_premise: got unexpected plan from when clause 1"
             mark2 = context.mark(True)
-            if rule.pattern(7).match_data(context, context,
+            if rule.pattern(8).match_data(context, context,
                     (() if context.lookup_data('break_cond') is None
                    else "if %s: break" % context.lookup_data('break_cond'),
                    'POPINDENT',
                    'POPINDENT',),):
               context.end_save_all_undo()
               mark3 = context.mark(True)
-              if rule.pattern(8).match_data(context, context,
+              if rule.pattern(9).match_data(context, context,
                       context.lookup_data('clause_num') + 1):
                 context.end_save_all_undo()
                 mark4 = context.mark(True)
-                if rule.pattern(9).match_data(context, context,
+                if rule.pattern(10).match_data(context, context,
                         context.lookup_data('decl_num_in') + 1):
                   context.end_save_all_undo()
                   mark5 = context.mark(True)
-                  if rule.pattern(10).match_data(context, context,
+                  if rule.pattern(11).match_data(context, context,
                           ("(%r, %r," % (context.lookup_data('kb_name'), context.lookup_data('entity_name')),
                          ('INDENT', 1),
                          helpers.list_format(context.lookup_data('arg_patterns'), '(', '),'),
@@ -479,15 +498,17 @@ def fc_premise(rule, arg_patterns, arg_context):
 
 def gen_fc_for_false(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 8:
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('kb_name', context, arg_patterns[0], arg_context) or True) and \
+         (context.bind('entity_name', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('start_lineno', context, arg_patterns[2], arg_context) or True) and \
+         (context.bind('end_lineno', context, arg_patterns[3], arg_context) or True) and \
+         arg_patterns[4].match_data(context, arg_context, False) and \
+         (context.bind('decl_num', context, arg_patterns[5], arg_context) or True) and \
+         (context.bind('ranges', context, arg_patterns[6], arg_context) or True) and \
+         (context.bind('fn_head', context, arg_patterns[7], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
         mark1 = context.mark(True)
         if rule.pattern(0).match_data(context, context,
@@ -498,7 +519,9 @@ def gen_fc_for_false(rule, arg_patterns, arg_context):
                "else engine.lookup(%r, %r, context," % \
                                          (context.lookup_data('kb_name'), context.lookup_data('entity_name')),
                ('INDENT', 19),
-               "rule.foreach_patterns(%d)) \\" % context.lookup_data('decl_num'),
+               helpers.add_ranges(
+               ("rule.foreach_patterns(%d)" % context.lookup_data('decl_num'),),
+               context.lookup_data('ranges')),
                'POPINDENT',
                'POPINDENT',
                ('INDENT', 2),
@@ -518,15 +541,17 @@ def gen_fc_for_false(rule, arg_patterns, arg_context):
 
 def gen_fc_for_true(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 8:
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('kb_name', context, arg_patterns[0], arg_context) or True) and \
+         (context.bind('entity_name', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('start_lineno', context, arg_patterns[2], arg_context) or True) and \
+         (context.bind('end_lineno', context, arg_patterns[3], arg_context) or True) and \
+         arg_patterns[4].match_data(context, arg_context, True) and \
+         (context.bind('decl_num', context, arg_patterns[5], arg_context) or True) and \
+         (context.bind('ranges', context, arg_patterns[6], arg_context) or True) and \
+         (context.bind('fn_head', context, arg_patterns[7], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
         mark1 = context.mark(True)
         if rule.pattern(0).match_data(context, context,
@@ -534,7 +559,8 @@ def gen_fc_for_true(rule, arg_patterns, arg_context):
                "with engine.lookup(%r, %r, context, \\" % \
                                        (context.lookup_data('kb_name'), context.lookup_data('entity_name')),
                ('INDENT', 19),
-               "rule.foreach_patterns(%d)) \\" % context.lookup_data('decl_num'),
+               helpers.add_ranges(
+               ("rule.foreach_patterns(%d)" % context.lookup_data('decl_num'),), context.lookup_data('ranges')),
                'POPINDENT',
                ('INDENT', 2),
                "as gen_%d:" % context.lookup_data('decl_num'),
@@ -552,15 +578,21 @@ def gen_fc_for_true(rule, arg_patterns, arg_context):
 
 def fc_first(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 13:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('rule_name', context, arg_patterns[0], arg_context) or True) and \
+         (context.bind('clause_num', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('next_clause_num', context, arg_patterns[2], arg_context) or True) and \
+         ((tuple_3 := pattern.open_tuple(arg_patterns[3], arg_context)) is None and patterns[3].match_pattern(context, context, arg_patterns[3], arg_context) or tuple_3 is not None and len(tuple_3[0]) == 3 and ('fc_first' == tuple_3[0][0] if tuple_3[1] is None else tuple_3[0][0].match_data(context, tuple_3[1], 'fc_first')) and (context.bind('premises1', context, tuple_3[0][1], tuple_3[1]) or True)) and \
+         ((tuple_6 := pattern.open_tuple(arg_patterns[6], arg_context)) is None and patterns[6].match_pattern(context, context, arg_patterns[6], arg_context) or tuple_6 is not None and len(tuple_6[0]) == 3 and (context.bind('init_worked', context, tuple_6[0][0], tuple_6[1]) or True) and (context.bind('fn_head', context, tuple_6[0][1], tuple_6[1]) or True) and (context.bind('set_worked', context, tuple_6[0][2], tuple_6[1]) or True)) and \
+         (context.bind('fn_tail', context, arg_patterns[7], arg_context) or True) and \
+         (context.bind('decl_num_in', context, arg_patterns[8], arg_context) or True) and \
+         (context.bind('decl_num_out', context, arg_patterns[9], arg_context) or True) and \
+         (context.bind('decl_lines', context, arg_patterns[10], arg_context) or True) and \
+         (context.bind('patterns_in', context, arg_patterns[11], arg_context) or True) and \
+         (context.bind('patterns_out', context, arg_patterns[12], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
         mark1 = context.mark(True)
         if rule.pattern(0).match_data(context, context,
@@ -610,15 +642,21 @@ def fc_first(rule, arg_patterns, arg_context):
 
 def fc_forall_None(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 13:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('rule_name', context, arg_patterns[0], arg_context) or True) and \
+         (context.bind('clause_num', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('next_clause_num', context, arg_patterns[2], arg_context) or True) and \
+         ((tuple_3 := pattern.open_tuple(arg_patterns[3], arg_context)) is None and patterns[3].match_pattern(context, context, arg_patterns[3], arg_context) or tuple_3 is not None and len(tuple_3[0]) == 5 and ('fc_forall' == tuple_3[0][0] if tuple_3[1] is None else tuple_3[0][0].match_data(context, tuple_3[1], 'fc_forall')) and (context.bind('premises1', context, tuple_3[0][1], tuple_3[1]) or True) and (None == tuple_3[0][2] if tuple_3[1] is None else tuple_3[0][2].match_data(context, tuple_3[1], None))) and \
+         (context.bind('fn_head', context, arg_patterns[6], arg_context) or True) and \
+         arg_patterns[7].match_data(context, arg_context, ()) and \
+         (context.bind('decl_num_in', context, arg_patterns[8], arg_context) or True) and \
+         (context.bind('decl_num_out', context, arg_patterns[9], arg_context) or True) and \
+         (context.bind('decl_lines', context, arg_patterns[10], arg_context) or True) and \
+         (context.bind('patterns_in', context, arg_patterns[11], arg_context) or True) and \
+         (context.bind('patterns_out', context, arg_patterns[12], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
         flag_1 = False
         with engine.prove(rule.rule_base.root_name, 'fc_premises', context,
@@ -656,15 +694,21 @@ def fc_forall_None(rule, arg_patterns, arg_context):
 
 def fc_forall_require(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 13:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('rule_name', context, arg_patterns[0], arg_context) or True) and \
+         (context.bind('clause_num', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('next_clause_num', context, arg_patterns[2], arg_context) or True) and \
+         ((tuple_3 := pattern.open_tuple(arg_patterns[3], arg_context)) is None and patterns[3].match_pattern(context, context, arg_patterns[3], arg_context) or tuple_3 is not None and len(tuple_3[0]) == 5 and ('fc_forall' == tuple_3[0][0] if tuple_3[1] is None else tuple_3[0][0].match_data(context, tuple_3[1], 'fc_forall')) and (context.bind('premises1', context, tuple_3[0][1], tuple_3[1]) or True) and (context.bind('require', context, tuple_3[0][2], tuple_3[1]) or True) and (context.bind('start_lineno', context, tuple_3[0][3], tuple_3[1]) or True)) and \
+         (context.bind('fn_head', context, arg_patterns[6], arg_context) or True) and \
+         arg_patterns[7].match_data(context, arg_context, ("POPINDENT",)) and \
+         (context.bind('decl_num_in', context, arg_patterns[8], arg_context) or True) and \
+         (context.bind('decl_num_out', context, arg_patterns[9], arg_context) or True) and \
+         (context.bind('decl_lines', context, arg_patterns[10], arg_context) or True) and \
+         (context.bind('patterns_in', context, arg_patterns[11], arg_context) or True) and \
+         (context.bind('patterns_out', context, arg_patterns[12], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
         mark1 = context.mark(True)
         if rule.pattern(0).match_data(context, context,
@@ -750,15 +794,21 @@ def fc_forall_require(rule, arg_patterns, arg_context):
 
 def fc_notany(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 13:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('rule_name', context, arg_patterns[0], arg_context) or True) and \
+         (context.bind('clause_num', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('next_clause_num', context, arg_patterns[2], arg_context) or True) and \
+         ((tuple_3 := pattern.open_tuple(arg_patterns[3], arg_context)) is None and patterns[3].match_pattern(context, context, arg_patterns[3], arg_context) or tuple_3 is not None and len(tuple_3[0]) == 3 and ('fc_notany' == tuple_3[0][0] if tuple_3[1] is None else tuple_3[0][0].match_data(context, tuple_3[1], 'fc_notany')) and (context.bind('premises', context, tuple_3[0][1], tuple_3[1]) or True) and (context.bind('start_lineno', context, tuple_3[0][2], tuple_3[1]) or True)) and \
+         (context.bind('fn_head', context, arg_patterns[6], arg_context) or True) and \
+         arg_patterns[7].match_data(context, arg_context, ("POPINDENT",)) and \
+         (context.bind('decl_num_in', context, arg_patterns[8], arg_context) or True) and \
+         (context.bind('decl_num_out', context, arg_patterns[9], arg_context) or True) and \
+         (context.bind('decl_lines', context, arg_patterns[10], arg_context) or True) and \
+         (context.bind('patterns_in', context, arg_patterns[11], arg_context) or True) and \
+         (context.bind('patterns_out', context, arg_patterns[12], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
         mark1 = context.mark(True)
         if rule.pattern(0).match_data(context, context,
@@ -813,15 +863,22 @@ def fc_notany(rule, arg_patterns, arg_context):
 
 def fc_python_premise(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 13:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('rule_name', context, arg_patterns[0], arg_context) or True) and \
+         (context.bind('clause_num', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('next_clause_num', context, arg_patterns[2], arg_context) or True) and \
+         (context.bind('python_premise', context, arg_patterns[3], arg_context) or True) and \
+         (context.bind('break_cond', context, arg_patterns[4], arg_context) or True) and \
+         (context.bind('fn_head', context, arg_patterns[6], arg_context) or True) and \
+         (context.bind('fn_tail', context, arg_patterns[7], arg_context) or True) and \
+         (context.bind('decl_num_in', context, arg_patterns[8], arg_context) or True) and \
+         patterns[9].match_pattern(context, context, arg_patterns[9], arg_context) and \
+         arg_patterns[10].match_data(context, arg_context, ()) and \
+         (context.bind('patterns_in', context, arg_patterns[11], arg_context) or True) and \
+         (context.bind('patterns_out', context, arg_patterns[12], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
         mark1 = context.mark(True)
         if rule.pattern(0).match_data(context, context,
@@ -849,15 +906,14 @@ def fc_python_premise(rule, arg_patterns, arg_context):
 
 def assertions_0(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 4:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if arg_patterns[0].match_data(context, arg_context, ()) and \
+         arg_patterns[1].match_data(context, arg_context, ()) and \
+         (context.bind('patterns_in', context, arg_patterns[2], arg_context) or True) and \
+         patterns[3].match_pattern(context, context, arg_patterns[3], arg_context):
         rule.rule_base.num_bc_rules_matched += 1
         rule.rule_base.num_bc_rule_successes += 1
         yield
@@ -867,15 +923,14 @@ def assertions_0(rule, arg_patterns, arg_context):
 
 def assertions_n(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 4:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if ((tuple_0 := pattern.open_tuple(arg_patterns[0], arg_context)) is None and patterns[0].match_pattern(context, context, arg_patterns[0], arg_context) or tuple_0 is not None and len(tuple_0[0]) >= 1 and (context.bind('first_assertion', context, tuple_0[0][0], tuple_0[1]) or True) and (context.bind('rest_assertions', context, *pattern.tuple_rest(tuple_0, 1)) or True)) and \
+         ((tuple_1 := pattern.open_tuple(arg_patterns[1], arg_context)) is None and patterns[1].match_pattern(context, context, arg_patterns[1], arg_context) or tuple_1 is not None and len(tuple_1[0]) >= 1 and (context.bind('fn_lines1', context, tuple_1[0][0], tuple_1[1]) or True) and (context.bind('fn_lines2', context, *pattern.tuple_rest(tuple_1, 1)) or True)) and \
+         (context.bind('patterns_in', context, arg_patterns[2], arg_context) or True) and \
+         (context.bind('patterns_out', context, arg_patterns[3], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
         flag_1 = False
         with engine.prove(rule.rule_base.root_name, 'assertion', context,
@@ -911,15 +966,14 @@ def assertions_n(rule, arg_patterns, arg_context):
 
 def assertion(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 4:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if ((tuple_0 := pattern.open_tuple(arg_patterns[0], arg_context)) is None and patterns[0].match_pattern(context, context, arg_patterns[0], arg_context) or tuple_0 is not None and len(tuple_0[0]) == 6 and ('assert' == tuple_0[0][0] if tuple_0[1] is None else tuple_0[0][0].match_data(context, tuple_0[1], 'assert')) and (context.bind('kb_name', context, tuple_0[0][1], tuple_0[1]) or True) and (context.bind('entity_name', context, tuple_0[0][2], tuple_0[1]) or True) and (context.bind('patterns', context, tuple_0[0][3], tuple_0[1]) or True) and (context.bind('start_lineno', context, tuple_0[0][4], tuple_0[1]) or True) and (context.bind('end_lineno', context, tuple_0[0][5], tuple_0[1]) or True)) and \
+         (context.bind('fn_lines', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('patterns_in', context, arg_patterns[2], arg_context) or True) and \
+         (context.bind('patterns_out', context, arg_patterns[3], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
         mark1 = context.mark(True)
         if rule.pattern(0).match_data(context, context,
@@ -951,15 +1005,14 @@ def assertion(rule, arg_patterns, arg_context):
 
 def python_assertion(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 4:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if ((tuple_0 := pattern.open_tuple(arg_patterns[0], arg_context)) is None and patterns[0].match_pattern(context, context, arg_patterns[0], arg_context) or tuple_0 is not None and len(tuple_0[0]) == 4 and ('python_assertion' == tuple_0[0][0] if tuple_0[1] is None else tuple_0[0][0].match_data(context, tuple_0[1], 'python_assertion')) and ((tuple_0_1 := pattern.open_tuple(tuple_0[0][1], tuple_0[1])) is None and pattern.match_arg(context, patterns[0].elements[1], context, tuple_0[0][1], tuple_0[1]) or tuple_0_1 is not None and len(tuple_0_1[0]) == 4 and (context.bind('python_code', context, tuple_0_1[0][0], tuple_0_1[1]) or True)) and (context.bind('start_lineno', context, tuple_0[0][2], tuple_0[1]) or True) and (context.bind('end_lineno', context, tuple_0[0][3], tuple_0[1]) or True)) and \
+         ((tuple_1 := pattern.open_tuple(arg_patterns[1], arg_context)) is None and patterns[1].match_pattern(context, context, arg_patterns[1], arg_context) or tuple_1 is not None and len(tuple_1[0]) == 3 and ((tuple_1_0 := pattern.open_tuple(tuple_1[0][0], tuple_1[1])) is None and pattern.match_arg(context, patterns[1].elements[0], context, tuple_1[0][0], tuple_1[1]) or tuple_1_0 is not None and len(tuple_1_0[0]) == 2 and ('STARTING_LINENO' == tuple_1_0[0][0] if tuple_1_0[1] is None else tuple_1_0[0][0].match_data(context, tuple_1_0[1], 'STARTING_LINENO')) and pattern.match_arg(context, patterns[1].elements[0].elements[1], context, tuple_1_0[0][1], tuple_1_0[1])) and pattern.match_arg(context, patterns[1].elements[1], context, tuple_1[0][1], tuple_1[1]) and ((tuple_1_2 := pattern.open_tuple(tuple_1[0][2], tuple_1[1])) is None and pattern.match_arg(context, patterns[1].elements[2], context, tuple_1[0][2], tuple_1[1]) or tuple_1_2 is not None and len(tuple_1_2[0]) == 2 and ('ENDING_LINENO' == tuple_1_2[0][0] if tuple_1_2[1] is None else tuple_1_2[0][0].match_data(context, tuple_1_2[1], 'ENDING_LINENO')) and pattern.match_arg(context, patterns[1].elements[2].elements[1], context, tuple_1_2[0][1], tuple_1_2[1]))) and \
+         (context.bind('patterns_in', context, arg_patterns[2], arg_context) or True) and \
+         patterns[3].match_pattern(context, context, arg_patterns[3], arg_context):
         rule.rule_base.num_bc_rules_matched += 1
         rule.rule_base.num_bc_rule_successes += 1
         yield
@@ -969,26 +1022,25 @@ def python_assertion(rule, arg_patterns, arg_context):
 
 def bc_rules(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 5:
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('rb_name', context, arg_patterns[0], arg_context) or True) and \
+         (context.bind('bc_rules', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('bc_plan_lines', context, arg_patterns[2], arg_context) or True) and \
+         (context.bind('bc_bc_funs', context, arg_patterns[3], arg_context) or True) and \
+         (context.bind('bc_bc_init', context, arg_patterns[4], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
         bc_plan_lines = []
         bc_bc_funs = []
         bc_bc_init = []
-        forall356_worked = True
+        forall360_worked = True
         for python_ans in \
              context.lookup_data('bc_rules'):
           mark2 = context.mark(True)
           if rule.pattern(0).match_data(context, context, python_ans):
             context.end_save_all_undo()
-            forall356_worked = False
+            forall360_worked = False
             flag_3 = False
             with engine.prove(rule.rule_base.root_name, 'bc_rule', context,
                               (rule.pattern(1),
@@ -1004,16 +1056,16 @@ def bc_rules(rule, arg_patterns, arg_context):
                 bc_plan_lines.extend(context.lookup_data('bc_plan1'))
                 bc_bc_funs.append(context.lookup_data('bc_bc_fun1'))
                 bc_bc_init.append(context.lookup_data('bc_bc_init1'))
-                forall356_worked = True
-                if forall356_worked: break
+                forall360_worked = True
+                if forall360_worked: break
             if not flag_3:
               raise AssertionError("compiler.bc_rules: 'when' clause 3 failed")
-            if not forall356_worked:
+            if not forall360_worked:
               context.undo_to_mark(mark2)
               break
           else: context.end_save_all_undo()
           context.undo_to_mark(mark2)
-        if forall356_worked:
+        if forall360_worked:
           mark5 = context.mark(True)
           if rule.pattern(5).match_data(context, context,
                   tuple(bc_plan_lines)):
@@ -1040,80 +1092,88 @@ def bc_rules(rule, arg_patterns, arg_context):
 
 def bc_rule_(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 5:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('rb_name', context, arg_patterns[0], arg_context) or True) and \
+         ((tuple_1 := pattern.open_tuple(arg_patterns[1], arg_context)) is None and patterns[1].match_pattern(context, context, arg_patterns[1], arg_context) or tuple_1 is not None and len(tuple_1[0]) == 6 and ('bc_rule' == tuple_1[0][0] if tuple_1[1] is None else tuple_1[0][0].match_data(context, tuple_1[1], 'bc_rule')) and (context.bind('name', context, tuple_1[0][1], tuple_1[1]) or True) and (context.bind('goal', context, tuple_1[0][2], tuple_1[1]) or True) and (context.bind('bc_premises', context, tuple_1[0][3], tuple_1[1]) or True) and (context.bind('python_lines', context, tuple_1[0][4], tuple_1[1]) or True) and (context.bind('plan_vars_needed', context, tuple_1[0][5], tuple_1[1]) or True)) and \
+         (context.bind('plan_lines', context, arg_patterns[2], arg_context) or True) and \
+         (context.bind('bc_fun_lines', context, arg_patterns[3], arg_context) or True) and \
+         (context.bind('bc_init_lines', context, arg_patterns[4], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
-        flag_1 = False
-        with engine.prove(rule.rule_base.root_name, 'bc_premises', context,
-                          (rule.pattern(0),
-                           rule.pattern(1),
-                           rule.pattern(2),
-                           rule.pattern(3),
-                           rule.pattern(4),
-                           rule.pattern(5),
-                           rule.pattern(6),
-                           rule.pattern(7),)) \
-          as gen_1:
-          for x_1 in gen_1:
-            flag_1 = True
-            assert x_1 is None, \
-              "compiler.bc_rule_: got unexpected plan from when clause 1"
-            mark2 = context.mark(True)
-            if rule.pattern(8).match_data(context, context,
-                    \
-                               helpers.goal(context.lookup_data('rb_name'), context.lookup_data('name'), context.lookup_data('goal'),
-                   context.lookup_data('prem_plan_lines'), context.lookup_data('python_lines'))):
-              context.end_save_all_undo()
+        mark1 = context.mark(True)
+        if rule.pattern(0).match_data(context, context,
+                helpers.push_down_checks(context.lookup_data('bc_premises'))):
+          context.end_save_all_undo()
+          flag_2 = False
+          with engine.prove(rule.rule_base.root_name, 'bc_premises', context,
+                            (rule.pattern(1),
+                             rule.pattern(2),
+                             rule.pattern(0),
+                             rule.pattern(3),
+                             rule.pattern(4),
+                             rule.pattern(5),
+                             rule.pattern(6),
+                             rule.pattern(7),)) \
+            as gen_2:
+            for x_2 in gen_2:
+              flag_2 = True
+              assert x_2 is None, \
+                "compiler.bc_rule_: got unexpected plan from when clause 2"
               mark3 = context.mark(True)
-              if rule.pattern(9).match_data(context, context,
-                      (context.lookup_data('goal_fn_head'),
-                     context.lookup_data('prem_fn_head'),
-                     'rule.rule_base.num_bc_rule_successes += 1',
-                     'yield context' if context.lookup_data('plan_lines') else 'yield',
-                     context.lookup_data('prem_fn_tail'),
-                     'rule.rule_base.num_bc_rule_failures += 1',
-                     context.lookup_data('goal_fn_tail'),
-                     )):
+              if rule.pattern(8).match_data(context, context,
+                      \
+                                 helpers.goal(context.lookup_data('rb_name'), context.lookup_data('name'), context.lookup_data('goal'),
+                     context.lookup_data('prem_plan_lines'), context.lookup_data('python_lines'))):
                 context.end_save_all_undo()
                 mark4 = context.mark(True)
-                if rule.pattern(10).match_data(context, context,
-                        (context.lookup_data('goal_decl_lines'),
-                       context.lookup_data('prem_decl_lines'),
-                       "POPINDENT",
+                if rule.pattern(9).match_data(context, context,
+                        (context.lookup_data('goal_fn_head'),
+                       context.lookup_data('prem_fn_head'),
+                       'rule.rule_base.num_bc_rule_successes += 1',
+                       'yield context' if context.lookup_data('plan_lines') else 'yield',
+                       context.lookup_data('prem_fn_tail'),
+                       'rule.rule_base.num_bc_rule_failures += 1',
+                       context.lookup_data('goal_fn_tail'),
                        )):
                   context.end_save_all_undo()
-                  rule.rule_base.num_bc_rule_successes += 1
-                  yield
+                  mark5 = context.mark(True)
+                  if rule.pattern(10).match_data(context, context,
+                          (context.lookup_data('goal_decl_lines'),
+                         context.lookup_data('prem_decl_lines'),
+                         "POPINDENT",
+                         )):
+                    context.end_save_all_undo()
+                    rule.rule_base.num_bc_rule_successes += 1
+                    yield
+                  else: context.end_save_all_undo()
+                  context.undo_to_mark(mark5)
                 else: context.end_save_all_undo()
                 context.undo_to_mark(mark4)
               else: context.end_save_all_undo()
               context.undo_to_mark(mark3)
-            else: context.end_save_all_undo()
-            context.undo_to_mark(mark2)
-        if not flag_1:
-          raise AssertionError("compiler.bc_rule_: 'when' clause 1 failed")
+          if not flag_2:
+            raise AssertionError("compiler.bc_rule_: 'when' clause 2 failed")
+        else: context.end_save_all_undo()
+        context.undo_to_mark(mark1)
         rule.rule_base.num_bc_rule_failures += 1
     finally:
       context.done()
 
 def bc_premises(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 8:
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('rb_name', context, arg_patterns[0], arg_context) or True) and \
+         (context.bind('rule_name', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('bc_premises', context, arg_patterns[2], arg_context) or True) and \
+         (context.bind('plan_vars_needed', context, arg_patterns[3], arg_context) or True) and \
+         (context.bind('plan_lines', context, arg_patterns[4], arg_context) or True) and \
+         (context.bind('fn_head', context, arg_patterns[5], arg_context) or True) and \
+         (context.bind('fn_tail', context, arg_patterns[6], arg_context) or True) and \
+         (context.bind('decl_lines', context, arg_patterns[7], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
         flag_1 = False
         with engine.prove(rule.rule_base.root_name, 'bc_premises1', context,
@@ -1172,15 +1232,20 @@ def bc_premises(rule, arg_patterns, arg_context):
 
 def bc_premises1_0(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 14:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('clause_num', context, arg_patterns[2], arg_context) or True) and \
+         patterns[3].match_pattern(context, context, arg_patterns[3], arg_context) and \
+         arg_patterns[4].match_data(context, arg_context, ()) and \
+         (context.bind('patterns', context, arg_patterns[7], arg_context) or True) and \
+         patterns[8].match_pattern(context, context, arg_patterns[8], arg_context) and \
+         (context.bind('plan_var_names', context, arg_patterns[9], arg_context) or True) and \
+         patterns[10].match_pattern(context, context, arg_patterns[10], arg_context) and \
+         arg_patterns[11].match_data(context, arg_context, ()) and \
+         arg_patterns[12].match_data(context, arg_context, ()) and \
+         arg_patterns[13].match_data(context, arg_context, ()):
         rule.rule_base.num_bc_rules_matched += 1
         rule.rule_base.num_bc_rule_successes += 1
         yield
@@ -1190,15 +1255,24 @@ def bc_premises1_0(rule, arg_patterns, arg_context):
 
 def bc_premises1_n(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 14:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('rb_name', context, arg_patterns[0], arg_context) or True) and \
+         (context.bind('rule_name', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('clause_num', context, arg_patterns[2], arg_context) or True) and \
+         (context.bind('next_clause_num', context, arg_patterns[3], arg_context) or True) and \
+         ((tuple_4 := pattern.open_tuple(arg_patterns[4], arg_context)) is None and patterns[4].match_pattern(context, context, arg_patterns[4], arg_context) or tuple_4 is not None and len(tuple_4[0]) >= 1 and (context.bind('first_prem', context, tuple_4[0][0], tuple_4[1]) or True) and (context.bind('rest_prems', context, *pattern.tuple_rest(tuple_4, 1)) or True)) and \
+         (context.bind('break_cond', context, arg_patterns[5], arg_context) or True) and \
+         (context.bind('allow_plan', context, arg_patterns[6], arg_context) or True) and \
+         (context.bind('patterns_in', context, arg_patterns[7], arg_context) or True) and \
+         (context.bind('patterns_out', context, arg_patterns[8], arg_context) or True) and \
+         (context.bind('plan_var_names_in', context, arg_patterns[9], arg_context) or True) and \
+         (context.bind('plan_var_names_out', context, arg_patterns[10], arg_context) or True) and \
+         (context.bind('plan_lines', context, arg_patterns[11], arg_context) or True) and \
+         (context.bind('fn_head', context, arg_patterns[12], arg_context) or True) and \
+         (context.bind('fn_tail', context, arg_patterns[13], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
         flag_1 = False
         with engine.prove(rule.rule_base.root_name, 'bc_premise', context,
@@ -1272,15 +1346,24 @@ def bc_premises1_n(rule, arg_patterns, arg_context):
 
 def bc_premise(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 14:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('rb_name', context, arg_patterns[0], arg_context) or True) and \
+         (context.bind('rule_name', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('clause_num', context, arg_patterns[2], arg_context) or True) and \
+         (context.bind('next_clause_num', context, arg_patterns[3], arg_context) or True) and \
+         ((tuple_4 := pattern.open_tuple(arg_patterns[4], arg_context)) is None and patterns[4].match_pattern(context, context, arg_patterns[4], arg_context) or tuple_4 is not None and len(tuple_4[0]) >= 8 and ('bc_premise' == tuple_4[0][0] if tuple_4[1] is None else tuple_4[0][0].match_data(context, tuple_4[1], 'bc_premise')) and (context.bind('required', context, tuple_4[0][1], tuple_4[1]) or True) and (context.bind('kb_name', context, tuple_4[0][2], tuple_4[1]) or True) and (context.bind('entity_name', context, tuple_4[0][3], tuple_4[1]) or True) and (context.bind('arg_patterns', context, tuple_4[0][4], tuple_4[1]) or True) and (context.bind('plan_spec', context, tuple_4[0][5], tuple_4[1]) or True) and (context.bind('start_lineno', context, tuple_4[0][6], tuple_4[1]) or True) and (context.bind('end_lineno', context, tuple_4[0][7], tuple_4[1]) or True) and (context.bind('ranges', context, *pattern.tuple_rest(tuple_4, 8)) or True)) and \
+         (context.bind('break_cond', context, arg_patterns[5], arg_context) or True) and \
+         (context.bind('allow_plan', context, arg_patterns[6], arg_context) or True) and \
+         (context.bind('patterns_in', context, arg_patterns[7], arg_context) or True) and \
+         (context.bind('patterns_out', context, arg_patterns[8], arg_context) or True) and \
+         (context.bind('plan_var_names_in', context, arg_patterns[9], arg_context) or True) and \
+         (context.bind('plan_var_names_out', context, arg_patterns[10], arg_context) or True) and \
+         (context.bind('plan_lines', context, arg_patterns[11], arg_context) or True) and \
+         (context.bind('fn_head', context, arg_patterns[12], arg_context) or True) and \
+         (context.bind('fn_tail', context, arg_patterns[13], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
         mark1 = context.mark(True)
         if rule.pattern(0).match_data(context, context,
@@ -1302,9 +1385,11 @@ def bc_premise(rule, arg_patterns, arg_context):
                      (context.lookup_data('kb_name2'), context.lookup_data('entity_name')),
                      ('INDENT', 2),
                      ('INDENT', 16),
+                     helpers.add_ranges(
                      helpers.list_format(('rule.pattern(%d)' % pat_num
                      for pat_num in context.lookup_data('pat_nums')),
-                     '(', ')) \\'),
+                     '(', ')'),
+                     context.lookup_data('ranges')),
                      'POPINDENT',
                      "as gen_%d:" % context.lookup_data('clause_num'),
                      "for x_%d in gen_%d:" % (context.lookup_data('clause_num'), context.lookup_data('clause_num')),
@@ -1386,15 +1471,23 @@ def bc_premise(rule, arg_patterns, arg_context):
 
 def bc_first(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 14:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('rb_name', context, arg_patterns[0], arg_context) or True) and \
+         (context.bind('rule_name', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('clause_num', context, arg_patterns[2], arg_context) or True) and \
+         (context.bind('next_clause_num', context, arg_patterns[3], arg_context) or True) and \
+         ((tuple_4 := pattern.open_tuple(arg_patterns[4], arg_context)) is None and patterns[4].match_pattern(context, context, arg_patterns[4], arg_context) or tuple_4 is not None and len(tuple_4[0]) == 4 and ('bc_first' == tuple_4[0][0] if tuple_4[1] is None else tuple_4[0][0].match_data(context, tuple_4[1], 'bc_first')) and (context.bind('required', context, tuple_4[0][1], tuple_4[1]) or True) and (context.bind('bc_premises', context, tuple_4[0][2], tuple_4[1]) or True)) and \
+         (context.bind('allow_plan', context, arg_patterns[6], arg_context) or True) and \
+         (context.bind('patterns_in', context, arg_patterns[7], arg_context) or True) and \
+         (context.bind('patterns_out', context, arg_patterns[8], arg_context) or True) and \
+         (context.bind('plan_var_names_in', context, arg_patterns[9], arg_context) or True) and \
+         (context.bind('plan_var_names_out', context, arg_patterns[10], arg_context) or True) and \
+         (context.bind('plan_lines', context, arg_patterns[11], arg_context) or True) and \
+         ((tuple_12 := pattern.open_tuple(arg_patterns[12], arg_context)) is None and patterns[12].match_pattern(context, context, arg_patterns[12], arg_context) or tuple_12 is not None and len(tuple_12[0]) == 3 and (context.bind('init_worked', context, tuple_12[0][0], tuple_12[1]) or True) and (context.bind('fn_head', context, tuple_12[0][1], tuple_12[1]) or True) and (context.bind('set_worked', context, tuple_12[0][2], tuple_12[1]) or True)) and \
+         (context.bind('fn_tail', context, arg_patterns[13], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
         mark1 = context.mark(True)
         if rule.pattern(0).match_data(context, context,
@@ -1462,15 +1555,22 @@ def bc_first(rule, arg_patterns, arg_context):
 
 def bc_forall_None(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 14:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('rb_name', context, arg_patterns[0], arg_context) or True) and \
+         (context.bind('rule_name', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('clause_num', context, arg_patterns[2], arg_context) or True) and \
+         (context.bind('next_clause_num', context, arg_patterns[3], arg_context) or True) and \
+         ((tuple_4 := pattern.open_tuple(arg_patterns[4], arg_context)) is None and patterns[4].match_pattern(context, context, arg_patterns[4], arg_context) or tuple_4 is not None and len(tuple_4[0]) == 5 and ('bc_forall' == tuple_4[0][0] if tuple_4[1] is None else tuple_4[0][0].match_data(context, tuple_4[1], 'bc_forall')) and (context.bind('bc_premises', context, tuple_4[0][1], tuple_4[1]) or True) and (None == tuple_4[0][2] if tuple_4[1] is None else tuple_4[0][2].match_data(context, tuple_4[1], None))) and \
+         (context.bind('patterns_in', context, arg_patterns[7], arg_context) or True) and \
+         (context.bind('patterns_out', context, arg_patterns[8], arg_context) or True) and \
+         (context.bind('plan_var_names_in', context, arg_patterns[9], arg_context) or True) and \
+         (context.bind('plan_var_names_out', context, arg_patterns[10], arg_context) or True) and \
+         (context.bind('plan_lines', context, arg_patterns[11], arg_context) or True) and \
+         (context.bind('fn_head', context, arg_patterns[12], arg_context) or True) and \
+         arg_patterns[13].match_data(context, arg_context, ()):
         rule.rule_base.num_bc_rules_matched += 1
         flag_1 = False
         with engine.prove(rule.rule_base.root_name, 'bc_premises1', context,
@@ -1509,15 +1609,22 @@ def bc_forall_None(rule, arg_patterns, arg_context):
 
 def bc_forall_require(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 14:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('rb_name', context, arg_patterns[0], arg_context) or True) and \
+         (context.bind('rule_name', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('clause_num', context, arg_patterns[2], arg_context) or True) and \
+         (context.bind('next_clause_num', context, arg_patterns[3], arg_context) or True) and \
+         ((tuple_4 := pattern.open_tuple(arg_patterns[4], arg_context)) is None and patterns[4].match_pattern(context, context, arg_patterns[4], arg_context) or tuple_4 is not None and len(tuple_4[0]) == 5 and ('bc_forall' == tuple_4[0][0] if tuple_4[1] is None else tuple_4[0][0].match_data(context, tuple_4[1], 'bc_forall')) and (context.bind('premises1', context, tuple_4[0][1], tuple_4[1]) or True) and (context.bind('require', context, tuple_4[0][2], tuple_4[1]) or True) and (context.bind('start_lineno', context, tuple_4[0][3], tuple_4[1]) or True)) and \
+         (context.bind('patterns_in', context, arg_patterns[7], arg_context) or True) and \
+         (context.bind('patterns_out', context, arg_patterns[8], arg_context) or True) and \
+         (context.bind('plan_var_names_in', context, arg_patterns[9], arg_context) or True) and \
+         (context.bind('plan_var_names_out', context, arg_patterns[10], arg_context) or True) and \
+         arg_patterns[11].match_data(context, arg_context, ()) and \
+         (context.bind('fn_head', context, arg_patterns[12], arg_context) or True) and \
+         arg_patterns[13].match_data(context, arg_context, ("POPINDENT",)):
         rule.rule_base.num_bc_rules_matched += 1
         mark1 = context.mark(True)
         if rule.pattern(0).match_data(context, context,
@@ -1599,15 +1706,22 @@ def bc_forall_require(rule, arg_patterns, arg_context):
 
 def bc_notany(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 14:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('rb_name', context, arg_patterns[0], arg_context) or True) and \
+         (context.bind('rule_name', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('clause_num', context, arg_patterns[2], arg_context) or True) and \
+         (context.bind('next_clause_num', context, arg_patterns[3], arg_context) or True) and \
+         ((tuple_4 := pattern.open_tuple(arg_patterns[4], arg_context)) is None and patterns[4].match_pattern(context, context, arg_patterns[4], arg_context) or tuple_4 is not None and len(tuple_4[0]) == 3 and ('bc_notany' == tuple_4[0][0] if tuple_4[1] is None else tuple_4[0][0].match_data(context, tuple_4[1], 'bc_notany')) and (context.bind('bc_premises', context, tuple_4[0][1], tuple_4[1]) or True) and (context.bind('start_lineno', context, tuple_4[0][2], tuple_4[1]) or True)) and \
+         (context.bind('patterns_in', context, arg_patterns[7], arg_context) or True) and \
+         (context.bind('patterns_out', context, arg_patterns[8], arg_context) or True) and \
+         (context.bind('plan_var_in', context, arg_patterns[9], arg_context) or True) and \
+         (context.bind('plan_var_out', context, arg_patterns[10], arg_context) or True) and \
+         arg_patterns[11].match_data(context, arg_context, ()) and \
+         (context.bind('fn_head', context, arg_patterns[12], arg_context) or True) and \
+         arg_patterns[13].match_data(context, arg_context, ("POPINDENT",)):
         rule.rule_base.num_bc_rules_matched += 1
         mark1 = context.mark(True)
         if rule.pattern(0).match_data(context, context,
@@ -1663,15 +1777,20 @@ def bc_notany(rule, arg_patterns, arg_context):
 
 def no_plan(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 11:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('rb_name', context, arg_patterns[0], arg_context) or True) and \
+         (context.bind('rule_name', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('clause_num', context, arg_patterns[2], arg_context) or True) and \
+         arg_patterns[3].match_data(context, arg_context, None) and \
+         (context.bind('patterns_in', context, arg_patterns[5], arg_context) or True) and \
+         patterns[6].match_pattern(context, context, arg_patterns[6], arg_context) and \
+         (context.bind('fn_head', context, arg_patterns[7], arg_context) or True) and \
+         arg_patterns[8].match_data(context, arg_context, ()) and \
+         arg_patterns[9].match_data(context, arg_context, ()) and \
+         arg_patterns[10].match_data(context, arg_context, ()):
         rule.rule_base.num_bc_rules_matched += 1
         mark1 = context.mark(True)
         if rule.pattern(0).match_data(context, context,
@@ -1694,15 +1813,20 @@ def no_plan(rule, arg_patterns, arg_context):
 
 def as_plan(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 11:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('rb_name', context, arg_patterns[0], arg_context) or True) and \
+         (context.bind('rule_name', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('clause_num', context, arg_patterns[2], arg_context) or True) and \
+         ((tuple_3 := pattern.open_tuple(arg_patterns[3], arg_context)) is None and patterns[3].match_pattern(context, context, arg_patterns[3], arg_context) or tuple_3 is not None and len(tuple_3[0]) == 2 and ('as' == tuple_3[0][0] if tuple_3[1] is None else tuple_3[0][0].match_data(context, tuple_3[1], 'as')) and (context.bind('pat_var_name', context, tuple_3[0][1], tuple_3[1]) or True)) and \
+         (context.bind('patterns_in', context, arg_patterns[5], arg_context) or True) and \
+         (context.bind('patterns_out', context, arg_patterns[6], arg_context) or True) and \
+         (context.bind('fn_head', context, arg_patterns[7], arg_context) or True) and \
+         (context.bind('fn_tail', context, arg_patterns[8], arg_context) or True) and \
+         arg_patterns[9].match_data(context, arg_context, ()) and \
+         arg_patterns[10].match_data(context, arg_context, ()):
         rule.rule_base.num_bc_rules_matched += 1
         mark1 = context.mark(True)
         if rule.pattern(0).match_data(context, context,
@@ -1736,15 +1860,21 @@ def as_plan(rule, arg_patterns, arg_context):
 
 def plan_spec(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 11:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('rb_name', context, arg_patterns[0], arg_context) or True) and \
+         (context.bind('rule_name', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('clause_num', context, arg_patterns[2], arg_context) or True) and \
+         ((tuple_3 := pattern.open_tuple(arg_patterns[3], arg_context)) is None and patterns[3].match_pattern(context, context, arg_patterns[3], arg_context) or tuple_3 is not None and len(tuple_3[0]) == 7 and ('plan_spec' == tuple_3[0][0] if tuple_3[1] is None else tuple_3[0][0].match_data(context, tuple_3[1], 'plan_spec')) and (context.bind('step_num', context, tuple_3[0][1], tuple_3[1]) or True) and (context.bind('plan_var_name', context, tuple_3[0][2], tuple_3[1]) or True) and (context.bind('python_code', context, tuple_3[0][3], tuple_3[1]) or True) and (context.bind('plan_vars_needed', context, tuple_3[0][4], tuple_3[1]) or True)) and \
+         arg_patterns[4].match_data(context, arg_context, True) and \
+         (context.bind('patterns_in', context, arg_patterns[5], arg_context) or True) and \
+         (context.bind('patterns_out', context, arg_patterns[6], arg_context) or True) and \
+         (context.bind('fn_head', context, arg_patterns[7], arg_context) or True) and \
+         (context.bind('fn_tail', context, arg_patterns[8], arg_context) or True) and \
+         ((tuple_9 := pattern.open_tuple(arg_patterns[9], arg_context)) is None and patterns[9].match_pattern(context, context, arg_patterns[9], arg_context) or tuple_9 is not None and len(tuple_9[0]) == 1 and ((tuple_9_0 := pattern.open_tuple(tuple_9[0][0], tuple_9[1])) is None and pattern.match_arg(context, patterns[9].elements[0], context, tuple_9[0][0], tuple_9[1]) or tuple_9_0 is not None and len(tuple_9_0[0]) == 2 and pattern.match_arg(context, patterns[9].elements[0].elements[0], context, tuple_9_0[0][0], tuple_9_0[1]) and pattern.match_arg(context, patterns[9].elements[0].elements[1], context, tuple_9_0[0][1], tuple_9_0[1]))) and \
+         patterns[10].match_pattern(context, context, arg_patterns[10], arg_context):
         rule.rule_base.num_bc_rules_matched += 1
         mark1 = context.mark(True)
         if rule.pattern(0).match_data(context, context,
@@ -1778,15 +1908,12 @@ def plan_spec(rule, arg_patterns, arg_context):
 
 def illegal_plan_spec(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 11:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if ((tuple_3 := pattern.open_tuple(arg_patterns[3], arg_context)) is None and patterns[3].match_pattern(context, context, arg_patterns[3], arg_context) or tuple_3 is not None and len(tuple_3[0]) == 7 and ('plan_spec' == tuple_3[0][0] if tuple_3[1] is None else tuple_3[0][0].match_data(context, tuple_3[1], 'plan_spec')) and (context.bind('lineno', context, tuple_3[0][5], tuple_3[1]) or True) and (context.bind('lexpos', context, tuple_3[0][6], tuple_3[1]) or True)) and \
+         arg_patterns[4].match_data(context, arg_context, False):
         rule.rule_base.num_bc_rules_matched += 1
         mark1 = context.mark(True)
         if rule.pattern(0).match_data(context, context,
@@ -1803,15 +1930,16 @@ def illegal_plan_spec(rule, arg_patterns, arg_context):
 
 def plan_bindings(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 7:
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('rb_name', context, arg_patterns[0], arg_context) or True) and \
+         (context.bind('rule_name', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('clause_num', context, arg_patterns[2], arg_context) or True) and \
+         (context.bind('plan_var_name', context, arg_patterns[3], arg_context) or True) and \
+         (context.bind('pat_num', context, arg_patterns[4], arg_context) or True) and \
+         (context.bind('fn_head', context, arg_patterns[5], arg_context) or True) and \
+         (context.bind('fn_tail', context, arg_patterns[6], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
         mark1 = context.mark(True)
         if rule.pattern(0).match_data(context, context,
@@ -1853,15 +1981,15 @@ def plan_bindings(rule, arg_patterns, arg_context):
 
 def not_required(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 8:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if arg_patterns[0].match_data(context, arg_context, False) and \
+         (context.bind('fn_head', context, arg_patterns[4], arg_context) or True) and \
+         (context.bind('fn_tail', context, arg_patterns[5], arg_context) or True) and \
+         patterns[6].match_pattern(context, context, arg_patterns[6], arg_context) and \
+         patterns[7].match_pattern(context, context, arg_patterns[7], arg_context):
         rule.rule_base.num_bc_rules_matched += 1
         rule.rule_base.num_bc_rule_successes += 1
         yield
@@ -1871,15 +1999,17 @@ def not_required(rule, arg_patterns, arg_context):
 
 def required(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 8:
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if arg_patterns[0].match_data(context, arg_context, True) and \
+         (context.bind('rb_name', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('rule_name', context, arg_patterns[2], arg_context) or True) and \
+         (context.bind('clause_num', context, arg_patterns[3], arg_context) or True) and \
+         (context.bind('fn_head1', context, arg_patterns[4], arg_context) or True) and \
+         (context.bind('fn_tail1', context, arg_patterns[5], arg_context) or True) and \
+         (context.bind('fn_head', context, arg_patterns[6], arg_context) or True) and \
+         (context.bind('fn_tail', context, arg_patterns[7], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
         mark1 = context.mark(True)
         if rule.pattern(0).match_data(context, context,
@@ -1910,15 +2040,23 @@ def required(rule, arg_patterns, arg_context):
 
 def bc_python_premise(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 14:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('rb_name', context, arg_patterns[0], arg_context) or True) and \
+         (context.bind('rule_name', context, arg_patterns[1], arg_context) or True) and \
+         (context.bind('clause_num', context, arg_patterns[2], arg_context) or True) and \
+         (context.bind('next_clause_num', context, arg_patterns[3], arg_context) or True) and \
+         (context.bind('python_premise', context, arg_patterns[4], arg_context) or True) and \
+         (context.bind('break_cond', context, arg_patterns[5], arg_context) or True) and \
+         (context.bind('patterns_in', context, arg_patterns[7], arg_context) or True) and \
+         (context.bind('patterns_out', context, arg_patterns[8], arg_context) or True) and \
+         (context.bind('plan_var_names', context, arg_patterns[9], arg_context) or True) and \
+         patterns[10].match_pattern(context, context, arg_patterns[10], arg_context) and \
+         arg_patterns[11].match_data(context, arg_context, ()) and \
+         (context.bind('fn_head', context, arg_patterns[12], arg_context) or True) and \
+         (context.bind('fn_tail', context, arg_patterns[13], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
         mark1 = context.mark(True)
         if rule.pattern(0).match_data(context, context,
@@ -1946,15 +2084,16 @@ def bc_python_premise(rule, arg_patterns, arg_context):
 
 def python_eq(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 7:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('clause_num', context, arg_patterns[0], arg_context) or True) and \
+         ((tuple_1 := pattern.open_tuple(arg_patterns[1], arg_context)) is None and patterns[1].match_pattern(context, context, arg_patterns[1], arg_context) or tuple_1 is not None and len(tuple_1[0]) == 5 and ('python_eq' == tuple_1[0][0] if tuple_1[1] is None else tuple_1[0][0].match_data(context, tuple_1[1], 'python_eq')) and (context.bind('pattern', context, tuple_1[0][1], tuple_1[1]) or True) and ((tuple_1_2 := pattern.open_tuple(tuple_1[0][2], tuple_1[1])) is None and pattern.match_arg(context, patterns[1].elements[2], context, tuple_1[0][2], tuple_1[1]) or tuple_1_2 is not None and len(tuple_1_2[0]) == 4 and (context.bind('python_code', context, tuple_1_2[0][0], tuple_1_2[1]) or True)) and (context.bind('start_lineno', context, tuple_1[0][3], tuple_1[1]) or True) and (context.bind('end_lineno', context, tuple_1[0][4], tuple_1[1]) or True)) and \
+         (context.bind('patterns_in', context, arg_patterns[3], arg_context) or True) and \
+         (context.bind('patterns_out', context, arg_patterns[4], arg_context) or True) and \
+         (context.bind('fn_head', context, arg_patterns[5], arg_context) or True) and \
+         (context.bind('fn_tail', context, arg_patterns[6], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
         mark1 = context.mark(True)
         if rule.pattern(0).match_data(context, context,
@@ -2001,15 +2140,17 @@ def python_eq(rule, arg_patterns, arg_context):
 
 def python_in(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 7:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('clause_num', context, arg_patterns[0], arg_context) or True) and \
+         ((tuple_1 := pattern.open_tuple(arg_patterns[1], arg_context)) is None and patterns[1].match_pattern(context, context, arg_patterns[1], arg_context) or tuple_1 is not None and len(tuple_1[0]) == 5 and ('python_in' == tuple_1[0][0] if tuple_1[1] is None else tuple_1[0][0].match_data(context, tuple_1[1], 'python_in')) and (context.bind('pattern', context, tuple_1[0][1], tuple_1[1]) or True) and ((tuple_1_2 := pattern.open_tuple(tuple_1[0][2], tuple_1[1])) is None and pattern.match_arg(context, patterns[1].elements[2], context, tuple_1[0][2], tuple_1[1]) or tuple_1_2 is not None and len(tuple_1_2[0]) == 4 and (context.bind('python_code', context, tuple_1_2[0][0], tuple_1_2[1]) or True)) and (context.bind('start_lineno', context, tuple_1[0][3], tuple_1[1]) or True) and (context.bind('end_lineno', context, tuple_1[0][4], tuple_1[1]) or True)) and \
+         (context.bind('break_cond', context, arg_patterns[2], arg_context) or True) and \
+         (context.bind('patterns_in', context, arg_patterns[3], arg_context) or True) and \
+         (context.bind('patterns_out', context, arg_patterns[4], arg_context) or True) and \
+         (context.bind('fn_head', context, arg_patterns[5], arg_context) or True) and \
+         (context.bind('fn_tail', context, arg_patterns[6], arg_context) or True):
         rule.rule_base.num_bc_rules_matched += 1
         mark1 = context.mark(True)
         if rule.pattern(0).match_data(context, context,
@@ -2065,15 +2206,16 @@ def python_in(rule, arg_patterns, arg_context):
 
 def python_check(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 7:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('clause_num', context, arg_patterns[0], arg_context) or True) and \
+         ((tuple_1 := pattern.open_tuple(arg_patterns[1], arg_context)) is None and patterns[1].match_pattern(context, context, arg_patterns[1], arg_context) or tuple_1 is not None and len(tuple_1[0]) == 4 and ('python_check' == tuple_1[0][0] if tuple_1[1] is None else tuple_1[0][0].match_data(context, tuple_1[1], 'python_check')) and ((tuple_1_1 := pattern.open_tuple(tuple_1[0][1], tuple_1[1])) is None and pattern.match_arg(context, patterns[1].elements[1], context, tuple_1[0][1], tuple_1[1]) or tuple_1_1 is not None and len(tuple_1_1[0]) == 4 and (context.bind('python_code', context, tuple_1_1[0][0], tuple_1_1[1]) or True)) and (context.bind('start_lineno', context, tuple_1[0][2], tuple_1[1]) or True) and (context.bind('end_lineno', context, tuple_1[0][3], tuple_1[1]) or True)) and \
+         (context.bind('patterns_in', context, arg_patterns[3], arg_context) or True) and \
+         patterns[4].match_pattern(context, context, arg_patterns[4], arg_context) and \
+         (context.bind('fn_head', context, arg_patterns[5], arg_context) or True) and \
+         arg_patterns[6].match_data(context, arg_context, ('POPINDENT',)):
         rule.rule_base.num_bc_rules_matched += 1
         mark1 = context.mark(True)
         if rule.pattern(0).match_data(context, context,
@@ -2102,15 +2244,16 @@ def python_check(rule, arg_patterns, arg_context):
 
 def python_block(rule, arg_patterns, arg_context):
   engine = rule.rule_base.engine
-  patterns = rule.goal_arg_patterns()
-  if len(arg_patterns) == len(patterns):
+  if len(arg_patterns) == 7:
+    patterns = rule.goal_arg_patterns()
     context = contexts.bc_context(rule)
     try:
-      if all(map(lambda pat, arg:
-                   pat.match_pattern(context, context,
-                                     arg, arg_context),
-                 patterns,
-                 arg_patterns)):
+      if (context.bind('clause_num', context, arg_patterns[0], arg_context) or True) and \
+         ((tuple_1 := pattern.open_tuple(arg_patterns[1], arg_context)) is None and patterns[1].match_pattern(context, context, arg_patterns[1], arg_context) or tuple_1 is not None and len(tuple_1[0]) == 4 and ('python_block' == tuple_1[0][0] if tuple_1[1] is None else tuple_1[0][0].match_data(context, tuple_1[1], 'python_block')) and ((tuple_1_1 := pattern.open_tuple(tuple_1[0][1], tuple_1[1])) is None and pattern.match_arg(context, patterns[1].elements[1], context, tuple_1[0][1], tuple_1[1]) or tuple_1_1 is not None and len(tuple_1_1[0]) == 4 and (context.bind('python_code', context, tuple_1_1[0][0], tuple_1_1[1]) or True)) and (context.bind('start_lineno', context, tuple_1[0][2], tuple_1[1]) or True) and (context.bind('end_lineno', context, tuple_1[0][3], tuple_1[1]) or True)) and \
+         (context.bind('patterns_in', context, arg_patterns[3], arg_context) or True) and \
+         patterns[4].match_pattern(context, context, arg_patterns[4], arg_context) and \
+         ((tuple_5 := pattern.open_tuple(arg_patterns[5], arg_context)) is None and patterns[5].match_pattern(context, context, arg_patterns[5], arg_context) or tuple_5 is not None and len(tuple_5[0]) == 3 and ((tuple_5_0 := pattern.open_tuple(tuple_5[0][0], tuple_5[1])) is None and pattern.match_arg(context, patterns[5].elements[0], context, tuple_5[0][0], tuple_5[1]) or tuple_5_0 is not None and len(tuple_5_0[0]) == 2 and ('STARTING_LINENO' == tuple_5_0[0][0] if tuple_5_0[1] is None else tuple_5_0[0][0].match_data(context, tuple_5_0[1], 'STARTING_LINENO')) and pattern.match_arg(context, patterns[5].elements[0].elements[1], context, tuple_5_0[0][1], tuple_5_0[1])) and pattern.match_arg(context, patterns[5].elements[1], context, tuple_5[0][1], tuple_5[1]) and ((tuple_5_2 := pattern.open_tuple(tuple_5[0][2], tuple_5[1])) is None and pattern.match_arg(context, patterns[5].elements[2], context, tuple_5[0][2], tuple_5[1]) or tuple_5_2 is not None and len(tuple_5_2[0]) == 2 and ('ENDING_LINENO' == tuple_5_2[0][0] if tuple_5_2[1] is None else tuple_5_2[0][0].match_data(context, tuple_5_2[1], 'ENDING_LINENO')) and pattern.match_arg(context, patterns[5].elements[2].elements[1], context, tuple_5_2[0][1], tuple_5_2[1]))) and \
+         arg_patterns[6].match_data(context, arg_context, ()):
         rule.rule_base.num_bc_rules_matched += 1
         rule.rule_base.num_bc_rule_successes += 1
         yield
@@ -2181,10 +2324,10 @@ def populate(engine):
                    contexts.variable('fc_fun'),
                    contexts.variable('fc_init'),),
                   (),
-                  (contexts.variable('rule_name'),
+                  (contexts.variable('fc_premises2'),
+                   contexts.variable('rule_name'),
                    pattern.pattern_literal(0),
                    contexts.anonymous('_'),
-                   contexts.variable('fc_premises'),
                    pattern.pattern_literal(None),
                    pattern.pattern_literal(False),
                    contexts.variable('prem_fn_head'),
@@ -2259,7 +2402,7 @@ def populate(engine):
                   (contexts.variable('rule_name'),
                    contexts.variable('clause_num'),
                    contexts.variable('next_clause_num'),
-                   pattern.pattern_tuple((pattern.pattern_literal('fc_premise'), contexts.variable('kb_name'), contexts.variable('entity_name'), contexts.variable('arg_patterns'), contexts.variable('start_lineno'), contexts.variable('end_lineno'),), None),
+                   pattern.pattern_tuple((pattern.pattern_literal('fc_premise'), contexts.variable('kb_name'), contexts.variable('entity_name'), contexts.variable('arg_patterns'), contexts.variable('start_lineno'), contexts.variable('end_lineno'),), contexts.variable('ranges')),
                    contexts.variable('break_cond'),
                    contexts.variable('multi_match'),
                    contexts.variable('fn_head'),
@@ -2276,6 +2419,7 @@ def populate(engine):
                    contexts.variable('end_lineno'),
                    contexts.variable('multi_match'),
                    contexts.variable('decl_num_in'),
+                   contexts.variable('ranges'),
                    contexts.variable('fn_head'),
                    contexts.variable('fn_tail'),
                    contexts.variable('next_clause_num'),
@@ -2290,6 +2434,7 @@ def populate(engine):
                    contexts.variable('end_lineno'),
                    pattern.pattern_literal(False),
                    contexts.variable('decl_num'),
+                   contexts.variable('ranges'),
                    contexts.variable('fn_head'),),
                   (),
                   (contexts.variable('fn_head'),))
@@ -2302,6 +2447,7 @@ def populate(engine):
                    contexts.variable('end_lineno'),
                    pattern.pattern_literal(True),
                    contexts.variable('decl_num'),
+                   contexts.variable('ranges'),
                    contexts.variable('fn_head'),),
                   (),
                   (contexts.variable('fn_head'),))
@@ -2534,9 +2680,9 @@ def populate(engine):
                    contexts.variable('bc_fun_lines'),
                    contexts.variable('bc_init_lines'),),
                   (),
-                  (contexts.variable('rb_name'),
+                  (contexts.variable('bc_premises2'),
+                   contexts.variable('rb_name'),
                    contexts.variable('name'),
-                   contexts.variable('bc_premises'),
                    contexts.variable('plan_vars_needed'),
                    contexts.variable('prem_plan_lines'),
                    contexts.variable('prem_fn_head'),
@@ -2642,7 +2788,7 @@ def populate(engine):
                    contexts.variable('rule_name'),
                    contexts.variable('clause_num'),
                    contexts.variable('next_clause_num'),
-                   pattern.pattern_tuple((pattern.pattern_literal('bc_premise'), contexts.variable('required'), contexts.variable('kb_name'), contexts.variable('entity_name'), contexts.variable('arg_patterns'), contexts.variable('plan_spec'), contexts.variable('start_lineno'), contexts.variable('end_lineno'),), None),
+                   pattern.pattern_tuple((pattern.pattern_literal('bc_premise'), contexts.variable('required'), contexts.variable('kb_name'), contexts.variable('entity_name'), contexts.variable('arg_patterns'), contexts.variable('plan_spec'), contexts.variable('start_lineno'), contexts.variable('end_lineno'),), contexts.variable('ranges')),
                    contexts.variable('break_cond'),
                    contexts.variable('allow_plan'),
                    contexts.variable('patterns_in'),
@@ -3024,165 +3170,167 @@ from pyke.krb_compiler import helpers
 
 Krb_filename = '../compiler.krb'
 Krb_lineno_map = (
-    ((14, 18), (24, 28)),
-    ((22, 22), (30, 30)),
-    ((26, 26), (31, 31)),
-    ((30, 30), (32, 32)),
-    ((33, 41), (33, 33)),
-    ((43, 51), (34, 34)),
-    ((53, 63), (35, 36)),
-    ((66, 78), (37, 49)),
-    ((82, 87), (50, 55)),
-    ((91, 106), (56, 71)),
-    ((138, 142), (74, 74)),
-    ((146, 146), (76, 76)),
-    ((162, 166), (79, 79)),
-    ((170, 172), (81, 83)),
-    ((188, 192), (86, 86)),
-    ((194, 195), (88, 90)),
-    ((198, 198), (92, 92)),
-    ((204, 212), (94, 94)),
-    ((213, 214), (95, 97)),
-    ((227, 227), (98, 98)),
-    ((231, 231), (99, 99)),
-    ((249, 253), (102, 103)),
-    ((256, 274), (105, 107)),
-    ((276, 285), (108, 109)),
-    ((288, 305), (110, 127)),
-    ((309, 316), (128, 135)),
-    ((338, 342), (138, 139)),
-    ((356, 360), (142, 146)),
-    ((363, 381), (148, 152)),
-    ((383, 401), (153, 157)),
-    ((404, 404), (158, 158)),
-    ((424, 428), (161, 167)),
-    ((430, 441), (169, 170)),
-    ((444, 447), (171, 174)),
-    ((451, 451), (175, 175)),
-    ((455, 455), (176, 176)),
-    ((459, 464), (177, 182)),
-    ((486, 490), (185, 186)),
-    ((494, 509), (188, 203)),
-    ((525, 529), (207, 208)),
-    ((533, 543), (210, 220)),
-    ((559, 563), (223, 227)),
-    ((567, 567), (229, 229)),
-    ((570, 588), (230, 234)),
-    ((591, 591), (235, 235)),
-    ((595, 595), (236, 236)),
-    ((617, 621), (239, 242)),
-    ((624, 642), (244, 248)),
-    ((645, 645), (249, 249)),
-    ((663, 667), (252, 256)),
-    ((671, 671), (258, 258)),
-    ((675, 675), (259, 259)),
-    ((678, 696), (260, 264)),
-    ((698, 716), (265, 269)),
-    ((719, 727), (270, 278)),
-    ((731, 731), (279, 279)),
-    ((757, 761), (282, 286)),
-    ((765, 765), (288, 288)),
-    ((769, 769), (289, 289)),
-    ((772, 790), (290, 294)),
-    ((793, 798), (295, 300)),
-    ((820, 824), (303, 306)),
-    ((828, 828), (308, 308)),
-    ((830, 841), (309, 311)),
-    ((856, 860), (314, 314)),
-    ((874, 878), (317, 318)),
-    ((881, 890), (320, 320)),
-    ((892, 901), (321, 321)),
-    ((918, 922), (324, 326)),
-    ((926, 927), (328, 329)),
-    ((931, 940), (330, 339)),
-    ((958, 962), (342, 347)),
-    ((976, 980), (350, 350)),
-    ((982, 984), (352, 355)),
-    ((987, 987), (357, 357)),
-    ((993, 1003), (359, 359)),
-    ((1004, 1006), (360, 363)),
-    ((1019, 1019), (364, 364)),
-    ((1023, 1023), (365, 365)),
-    ((1027, 1027), (366, 366)),
-    ((1047, 1051), (369, 371)),
-    ((1054, 1067), (373, 375)),
-    ((1070, 1072), (376, 378)),
-    ((1076, 1083), (379, 386)),
-    ((1087, 1090), (387, 390)),
-    ((1112, 1116), (393, 395)),
-    ((1119, 1138), (397, 400)),
-    ((1141, 1141), (401, 401)),
-    ((1145, 1148), (402, 405)),
-    ((1152, 1157), (406, 411)),
-    ((1179, 1183), (414, 416)),
-    ((1197, 1201), (419, 423)),
-    ((1204, 1223), (425, 429)),
-    ((1225, 1244), (430, 434)),
-    ((1247, 1247), (435, 435)),
-    ((1251, 1251), (436, 436)),
-    ((1255, 1255), (437, 437)),
-    ((1279, 1283), (440, 446)),
-    ((1287, 1287), (448, 448)),
-    ((1291, 1291), (449, 449)),
-    ((1295, 1296), (450, 451)),
-    ((1300, 1312), (452, 464)),
-    ((1315, 1328), (465, 466)),
-    ((1330, 1346), (467, 470)),
-    ((1349, 1350), (471, 472)),
-    ((1354, 1354), (473, 473)),
-    ((1358, 1361), (474, 477)),
-    ((1393, 1397), (480, 484)),
-    ((1401, 1401), (486, 486)),
-    ((1404, 1423), (487, 491)),
-    ((1425, 1438), (492, 493)),
-    ((1441, 1441), (494, 494)),
-    ((1445, 1445), (495, 495)),
-    ((1469, 1473), (498, 502)),
-    ((1476, 1495), (504, 508)),
-    ((1498, 1498), (509, 509)),
-    ((1516, 1520), (512, 516)),
-    ((1524, 1524), (518, 518)),
-    ((1528, 1528), (519, 519)),
-    ((1531, 1550), (520, 524)),
-    ((1552, 1571), (525, 529)),
-    ((1574, 1582), (530, 538)),
-    ((1606, 1610), (541, 545)),
-    ((1614, 1614), (548, 548)),
-    ((1618, 1618), (549, 549)),
-    ((1621, 1640), (550, 554)),
-    ((1643, 1648), (555, 560)),
-    ((1670, 1674), (563, 565)),
-    ((1678, 1685), (567, 574)),
-    ((1701, 1705), (577, 581)),
-    ((1709, 1711), (583, 585)),
-    ((1714, 1726), (586, 587)),
-    ((1743, 1747), (590, 595)),
-    ((1751, 1753), (597, 599)),
-    ((1756, 1768), (600, 601)),
-    ((1785, 1789), (604, 606)),
-    ((1793, 1794), (608, 609)),
-    ((1810, 1814), (612, 613)),
-    ((1818, 1838), (615, 635)),
-    ((1842, 1842), (636, 636)),
-    ((1860, 1864), (639, 640)),
-    ((1878, 1882), (643, 644)),
-    ((1886, 1889), (646, 649)),
-    ((1893, 1899), (650, 656)),
-    ((1917, 1921), (659, 663)),
-    ((1925, 1925), (665, 665)),
-    ((1927, 1938), (666, 668)),
-    ((1953, 1957), (671, 675)),
-    ((1961, 1962), (677, 678)),
-    ((1966, 1966), (679, 679)),
-    ((1970, 1980), (680, 690)),
-    ((1984, 1986), (691, 693)),
-    ((2008, 2012), (696, 700)),
-    ((2016, 2017), (702, 703)),
-    ((2021, 2021), (704, 704)),
-    ((2025, 2037), (705, 717)),
-    ((2041, 2050), (718, 727)),
-    ((2072, 2076), (730, 735)),
-    ((2080, 2080), (737, 737)),
-    ((2084, 2091), (738, 745)),
-    ((2109, 2113), (748, 756)),
+    ((14, 19), (24, 28)),
+    ((23, 23), (30, 30)),
+    ((27, 27), (31, 31)),
+    ((31, 31), (32, 32)),
+    ((34, 42), (33, 33)),
+    ((44, 52), (34, 34)),
+    ((54, 64), (35, 36)),
+    ((67, 79), (37, 49)),
+    ((83, 88), (50, 55)),
+    ((92, 107), (56, 71)),
+    ((138, 140), (74, 74)),
+    ((144, 144), (76, 76)),
+    ((160, 162), (79, 79)),
+    ((166, 168), (81, 83)),
+    ((183, 185), (86, 86)),
+    ((187, 188), (88, 90)),
+    ((191, 191), (92, 92)),
+    ((197, 205), (94, 94)),
+    ((206, 207), (95, 97)),
+    ((220, 220), (98, 98)),
+    ((224, 224), (99, 99)),
+    ((242, 244), (102, 103)),
+    ((248, 248), (105, 105)),
+    ((251, 269), (106, 108)),
+    ((271, 280), (109, 110)),
+    ((283, 300), (111, 128)),
+    ((304, 311), (129, 136)),
+    ((335, 344), (139, 140)),
+    ((358, 370), (143, 147)),
+    ((373, 391), (149, 153)),
+    ((393, 411), (154, 158)),
+    ((414, 414), (159, 159)),
+    ((434, 446), (162, 168)),
+    ((448, 460), (170, 171)),
+    ((463, 466), (172, 175)),
+    ((470, 470), (176, 176)),
+    ((474, 474), (177, 177)),
+    ((478, 483), (178, 183)),
+    ((504, 511), (186, 187)),
+    ((515, 532), (189, 206)),
+    ((547, 554), (210, 211)),
+    ((558, 569), (213, 224)),
+    ((585, 595), (227, 231)),
+    ((599, 599), (233, 233)),
+    ((602, 620), (234, 238)),
+    ((623, 623), (239, 239)),
+    ((627, 627), (240, 240)),
+    ((649, 659), (243, 246)),
+    ((662, 680), (248, 252)),
+    ((683, 683), (253, 253)),
+    ((701, 711), (256, 260)),
+    ((715, 715), (262, 262)),
+    ((719, 719), (263, 263)),
+    ((722, 740), (264, 268)),
+    ((742, 760), (269, 273)),
+    ((763, 771), (274, 282)),
+    ((775, 775), (283, 283)),
+    ((801, 811), (286, 290)),
+    ((815, 815), (292, 292)),
+    ((819, 819), (293, 293)),
+    ((822, 840), (294, 298)),
+    ((843, 848), (299, 304)),
+    ((870, 881), (307, 310)),
+    ((885, 885), (312, 312)),
+    ((887, 898), (313, 315)),
+    ((913, 916), (318, 318)),
+    ((930, 933), (321, 322)),
+    ((936, 945), (324, 324)),
+    ((947, 956), (325, 325)),
+    ((973, 976), (328, 330)),
+    ((980, 981), (332, 333)),
+    ((985, 994), (334, 343)),
+    ((1012, 1015), (346, 351)),
+    ((1028, 1032), (354, 354)),
+    ((1034, 1036), (356, 359)),
+    ((1039, 1039), (361, 361)),
+    ((1045, 1055), (363, 363)),
+    ((1056, 1058), (364, 367)),
+    ((1071, 1071), (368, 368)),
+    ((1075, 1075), (369, 369)),
+    ((1079, 1079), (370, 370)),
+    ((1099, 1103), (373, 375)),
+    ((1107, 1107), (377, 377)),
+    ((1110, 1123), (378, 380)),
+    ((1126, 1128), (381, 383)),
+    ((1132, 1139), (384, 391)),
+    ((1143, 1146), (392, 395)),
+    ((1169, 1176), (398, 400)),
+    ((1179, 1198), (402, 405)),
+    ((1201, 1201), (406, 406)),
+    ((1205, 1208), (407, 410)),
+    ((1212, 1217), (411, 416)),
+    ((1239, 1248), (419, 421)),
+    ((1262, 1275), (424, 428)),
+    ((1278, 1297), (430, 434)),
+    ((1299, 1318), (435, 439)),
+    ((1321, 1321), (440, 440)),
+    ((1325, 1325), (441, 441)),
+    ((1329, 1329), (442, 442)),
+    ((1353, 1366), (445, 451)),
+    ((1370, 1370), (453, 453)),
+    ((1374, 1374), (454, 454)),
+    ((1378, 1379), (455, 456)),
+    ((1383, 1397), (457, 471)),
+    ((1400, 1413), (472, 473)),
+    ((1415, 1431), (474, 477)),
+    ((1434, 1435), (478, 479)),
+    ((1439, 1439), (480, 480)),
+    ((1443, 1446), (481, 484)),
+    ((1478, 1490), (487, 491)),
+    ((1494, 1494), (493, 493)),
+    ((1497, 1516), (494, 498)),
+    ((1518, 1531), (499, 500)),
+    ((1534, 1534), (501, 501)),
+    ((1538, 1538), (502, 502)),
+    ((1562, 1573), (505, 509)),
+    ((1576, 1595), (511, 515)),
+    ((1598, 1598), (516, 516)),
+    ((1616, 1627), (519, 523)),
+    ((1631, 1631), (525, 525)),
+    ((1635, 1635), (526, 526)),
+    ((1638, 1657), (527, 531)),
+    ((1659, 1678), (532, 536)),
+    ((1681, 1689), (537, 545)),
+    ((1713, 1724), (548, 552)),
+    ((1728, 1728), (555, 555)),
+    ((1732, 1732), (556, 556)),
+    ((1735, 1754), (557, 561)),
+    ((1757, 1762), (562, 567)),
+    ((1784, 1793), (570, 572)),
+    ((1797, 1804), (574, 581)),
+    ((1820, 1829), (584, 588)),
+    ((1833, 1835), (590, 592)),
+    ((1838, 1850), (593, 594)),
+    ((1867, 1877), (597, 602)),
+    ((1881, 1883), (604, 606)),
+    ((1886, 1898), (607, 608)),
+    ((1915, 1916), (611, 613)),
+    ((1920, 1921), (615, 616)),
+    ((1936, 1942), (619, 620)),
+    ((1946, 1966), (622, 642)),
+    ((1970, 1970), (643, 643)),
+    ((1988, 1992), (646, 647)),
+    ((2005, 2012), (650, 651)),
+    ((2016, 2019), (653, 656)),
+    ((2023, 2029), (657, 663)),
+    ((2047, 2059), (666, 670)),
+    ((2063, 2063), (672, 672)),
+    ((2065, 2076), (673, 675)),
+    ((2091, 2096), (678, 682)),
+    ((2100, 2101), (684, 685)),
+    ((2105, 2105), (686, 686)),
+    ((2109, 2119), (687, 697)),
+    ((2123, 2125), (698, 700)),
+    ((2147, 2153), (703, 707)),
+    ((2157, 2158), (709, 710)),
+    ((2162, 2162), (711, 711)),
+    ((2166, 2178), (712, 724)),
+    ((2182, 2191), (725, 734)),
+    ((2213, 2218), (737, 742)),
+    ((2222, 2222), (744, 744)),
+    ((2226, 2233), (745, 752)),
+    ((2251, 2256), (755, 763)),
 )
@@ -21,6 +21,8 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
+import ast
+
 import pyke
 
 def fc_head(rb_name):
@@ -55,31 +57,22 @@ def goal(rb_name, rule_name, goal_info, pred_plan_lines, python_lines):
     # returns plan_lines, goal_fn_head, goal_fn_tail, goal_decl_lines
     goal, goal_name, pattern_args, taking, start_lineno, end_lineno = goal_info
     assert goal == 'goal'
+    patterns_line, head_match_lines = head_match(pattern_args)
     goal_fn_head = (
         "",
         "def %s(rule, arg_patterns, arg_context):" % rule_name,
         ("INDENT", 2),
         "engine = rule.rule_base.engine",
-        "patterns = rule.goal_arg_patterns()",
-        "if len(arg_patterns) == len(patterns):",
+        "if len(arg_patterns) == %d:" % len(pattern_args),
         ("INDENT", 2),
+        patterns_line,
         "context = contexts.bc_context(rule)",
         "try:",
         ("INDENT", 2),
         ("STARTING_LINENO", start_lineno),
-        "if all(map(lambda pat, arg:",
-        ("INDENT", 2),
-        ("INDENT", 9),
-        ("INDENT", 2),
-        "pat.match_pattern(context, context,",
-        ("INDENT", 18),
-        "arg, arg_context),",
-        "POPINDENT",
-        "POPINDENT",
-        "patterns,",
-        "arg_patterns)):",
+        head_match_lines,
         ("ENDING_LINENO", end_lineno),
-        "POPINDENT",
+        ("INDENT", 2),
         "rule.rule_base.num_bc_rules_matched += 1",
     )
     goal_fn_tail = (
@@ -144,6 +137,337 @@ def goal(rb_name, rule_name, goal_info, pred_plan_lines, python_lines):
     ) + list_format(pattern_args, "(", "),")
     return plan_lines, goal_fn_head, goal_fn_tail, goal_decl_lines
 
+def head_match(pattern_args):
+    r'''
+        Returns the line getting the rule's goal_arg_patterns (or () if they
+        aren't needed) and the "if" statement matching the goal's
+        arg_patterns to them.
+
+        Literals are matched directly against the arg_pattern, the first use
+        of each variable just binds it to the arg_pattern and anonymous
+        variables are skipped.  Only variables used before go through the
+        general match_pattern.
+
+            >>> head_match(("pattern.pattern_literal('bruce')",
+            ...             "contexts.variable('a')",
+            ...             "contexts.anonymous('_b')",
+            ...             "contexts.variable('a')"))
+            ... # doctest: +NORMALIZE_WHITESPACE
+            ('patterns = rule.goal_arg_patterns()',
+             ("if arg_patterns[0].match_data(context, arg_context, 'bruce') and \\",
+              ('INDENT', 3),
+              "(context.bind('a', context, arg_patterns[1], arg_context) or True) and \\",
+              'patterns[3].match_pattern(context, context, arg_patterns[3], arg_context):',
+              'POPINDENT'))
+            >>> head_match(("contexts.variable('a')",))
+            ((), ("if (context.bind('a', context, arg_patterns[0], arg_context) or True):",))
+            >>> head_match(("contexts.anonymous('_a')",))
+            ((), ('if True:',))
+
+        Tuples are opened by pattern.open_tuple, which gives their elements
+        (with the context of the elements, or None if they are data).  Then
+        their length is checked and their elements are matched the same way,
+        inline.  Their rest variable gets the elements left over.  If the
+        arg_pattern is an unbound variable (or a tuple with its own rest
+        variable), the tuple goes through the general match_pattern instead.
+
+            >>> patterns_line, if_lines = head_match((
+            ...   "pattern.pattern_tuple((pattern.pattern_literal(1), "
+            ...     "pattern.pattern_tuple((contexts.variable('a'), "
+            ...       "contexts.anonymous('_b'),), None), "
+            ...     "contexts.variable('a'),), contexts.variable('rest'))",))
+            >>> patterns_line
+            'patterns = rule.goal_arg_patterns()'
+            >>> print(if_lines[0].replace(' and ', ' and\n   ')
+            ...                  .replace(' or ', '\n or '))
+            if ((tuple_0 := pattern.open_tuple(arg_patterns[0], arg_context)) is None and
+               patterns[0].match_pattern(context, context, arg_patterns[0], arg_context)
+             or tuple_0 is not None and
+               len(tuple_0[0]) >= 3 and
+               (1 == tuple_0[0][0] if tuple_0[1] is None else tuple_0[0][0].match_data(context, tuple_0[1], 1)) and
+               ((tuple_0_1 := pattern.open_tuple(tuple_0[0][1], tuple_0[1])) is None and
+               pattern.match_arg(context, patterns[0].elements[1], context, tuple_0[0][1], tuple_0[1])
+             or tuple_0_1 is not None and
+               len(tuple_0_1[0]) == 2 and
+               (context.bind('a', context, tuple_0_1[0][0], tuple_0_1[1])
+             or True)) and
+               pattern.match_arg(context, patterns[0].elements[2], context, tuple_0[0][2], tuple_0[1]) and
+               (context.bind('rest', context, *pattern.tuple_rest(tuple_0, 3))
+             or True)):
+    '''
+    conditions = []
+    var_names_seen = set()
+    needs_patterns = False
+    for i, pat in enumerate(pattern_args):
+        condition, generic = \
+          _match_code(pat, ast.parse(pat, mode='eval').body, "patterns[%d]" % i,
+                      "arg_patterns[%d]" % i, "arg_context", "tuple_%d" % i,
+                      var_names_seen)
+        if condition is not None: conditions.append(condition)
+        if generic: needs_patterns = True
+    patterns_line = \
+      "patterns = rule.goal_arg_patterns()" if needs_patterns else ()
+    if not conditions: return patterns_line, ("if True:",)
+    if len(conditions) == 1:
+        return patterns_line, ("if %s:" % conditions[0],)
+    return patterns_line, \
+           ("if %s and \\" % conditions[0], ("INDENT", 3)) + \
+           tuple(condition + " and \\" for condition in conditions[1:-1]) + \
+           (conditions[-1] + ':', "POPINDENT")
+
+def _match_code(code, node, pat_expr, arg_expr, context_expr, tuple_name,
+                var_names_seen, top = True):
+    r'''
+        Returns the condition matching the pattern, whose code is node (in
+        code) and which is pat_expr at run time, to arg_expr in context_expr,
+        or None if there's nothing to match; and whether the condition uses
+        the rule's goal_arg_patterns.  At the top, the arg is always a
+        pattern; inside a tuple, it may be data (when context_expr is None).
+    '''
+    kind = _pattern_kind(node)
+    if kind == 'anonymous': return None, False
+    if kind == 'pattern_literal':
+        literal = ast.get_source_segment(code, node.args[0])
+        if top:
+            return "%s.match_data(context, %s, %s)" % \
+                     (arg_expr, context_expr, literal), \
+                   False
+        return "(%s == %s if %s is None else %s.match_data(context, %s, %s))" \
+                 % (literal, arg_expr, context_expr, arg_expr, context_expr,
+                    literal), \
+               False
+    if kind == 'variable':
+        var_name = node.args[0].value
+        if var_name not in var_names_seen:
+            var_names_seen.add(var_name)
+            return "(context.bind(%s, context, %s, %s) or True)" % \
+                     (ast.get_source_segment(code, node.args[0]), arg_expr,
+                      context_expr), \
+                   False
+    if kind != 'pattern_tuple':
+        return _general_match(pat_expr, arg_expr, context_expr, top)
+    generic, uses_patterns = \
+      _general_match(pat_expr, arg_expr, context_expr, top)
+    elements = node.args[0].elts
+    rest_var = node.args[1]
+    conditions = ["len(%s[0]) %s %d" %
+                    (tuple_name, '==' if _pattern_kind(rest_var) is None
+                                      else '>=',
+                     len(elements))]
+    for i, element in enumerate(elements):
+        condition, element_uses_patterns = \
+          _match_code(code, element, "%s.elements[%d]" % (pat_expr, i),
+                      "%s[0][%d]" % (tuple_name, i), "%s[1]" % tuple_name,
+                      "%s_%d" % (tuple_name, i), var_names_seen, False)
+        if condition is not None: conditions.append(condition)
+        if element_uses_patterns: uses_patterns = True
+    rest_kind = _pattern_kind(rest_var)
+    if rest_kind == 'variable' and rest_var.args[0].value in var_names_seen:
+        conditions.append(
+          "pattern.match_arg(context, %s.rest_var, context, "
+                            "*pattern.tuple_rest(%s, %d))" %
+            (pat_expr, tuple_name, len(elements)))
+    elif rest_kind == 'variable':
+        var_names_seen.add(rest_var.args[0].value)
+        conditions.append(
+          "(context.bind(%s, context, *pattern.tuple_rest(%s, %d)) or True)" %
+            (ast.get_source_segment(code, rest_var.args[0]), tuple_name,
+             len(elements)))
+    return "((%s := pattern.open_tuple(%s, %s)) is None and %s or " \
+             "%s is not None and %s)" % \
+             (tuple_name, arg_expr, context_expr, generic, tuple_name,
+              " and ".join(conditions)), \
+           uses_patterns
+
+def _general_match(pat_expr, arg_expr, context_expr, top):
+    if top:
+        return "%s.match_pattern(context, context, %s, %s)" % \
+                 (pat_expr, arg_expr, context_expr), \
+               True
+    return "pattern.match_arg(context, %s, context, %s, %s)" % \
+             (pat_expr, arg_expr, context_expr), \
+           True
+
+def _pattern_kind(node):
+    r'''
+        Returns 'anonymous', 'variable', 'pattern_literal' or
+        'pattern_tuple' for the code creating that pattern, else None.
+    '''
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+        return node.func.attr
+    return None
+
+def push_down_checks(premises):
+    r'''
+        Returns premises, with the simple comparisons in their check
+        premises also passed down to the fact (or goal) premises that bind
+        the variables compared, as ranges for their lookups (see
+        fact_list.lookup).  The check premises are left as they are, so the
+        ranges only save looking at the facts that the checks would fail.
+
+        A comparison is simple if it compares a variable (that first
+        appears as an argument of a fact premise) to a constant or a
+        variable bound before that premise, or tests that the variable
+        startswith a string.  Comparisons may be joined by "and".  The
+        premises passed ranges get the code for them added to their tuple.
+
+            >>> def check(code, var_names):
+            ...     return ('python_check', ((code,), var_names, 0, 0), 1, 1)
+            >>> premises = (
+            ...   ('fc_premise', 'store', 'min', ("contexts.variable('min')",),
+            ...    1, 1),
+            ...   ('fc_premise', 'store', 'price',
+            ...    ("contexts.variable('item')", "contexts.variable('p')",
+            ...     "contexts.anonymous('_')"),
+            ...    2, 2),
+            ...   check(" context.lookup_data('p') > context.lookup_data('min')"
+            ...         " and 1000 >= context.lookup_data('p')", ('p', 'min')),
+            ...   check(" context.lookup_data('item').startswith('ab')",
+            ...         ('item',)),
+            ...   check(" context.lookup_data('p') < len('xyz')", ('p',)))
+            >>> new_premises = push_down_checks(premises)
+            >>> new_premises[0] == premises[0], new_premises[2:] == premises[2:]
+            (True, True)
+            >>> print(new_premises[1][-1].replace('), ', '),\n '))
+            ((1, '>', context.lookup_data('min')),
+             (1, '<=', 1000),
+             (0, 'prefix', 'ab'),)
+
+        In bc rules, the variables compared to must be bound by python
+        premises, since goals may bind them to patterns:
+
+            >>> premises = (
+            ...   ('bc_premise', False, 'store', 'min',
+            ...    ("contexts.variable('min')",), None, 1, 1),
+            ...   ('bc_premise', False, 'store', 'price',
+            ...    ("contexts.variable('item')", "contexts.variable('p')"),
+            ...    None, 2, 2),
+            ...   check(" context.lookup_data('p') > context.lookup_data('min')"
+            ...         " and context.lookup_data('p') != 4", ('p', 'min')))
+            >>> push_down_checks(premises) == premises
+            True
+    '''
+    premises = list(premises)
+    ranges = {}         # {premise_index: [range_code]}
+    for i, premise in enumerate(premises):
+        if premise[0] == 'python_check' and len(premise[1][0]) == 1:
+            code = premise[1][0][0].strip()
+            try:
+                tree = ast.parse(code, mode='eval').body
+            except SyntaxError:
+                continue
+            for var_name, op, value in _comparisons(tree):
+                value_code = ast.get_source_segment(code, value)
+                binder = _binding_premise(premises[:i], var_name)
+                if binder is None: continue
+                premise_index, position = binder
+                if all(_bound_before(premises[:premise_index], name)
+                       for name in _lookup_names(value)):
+                    ranges.setdefault(premise_index, []).append(
+                      "(%d, %r, %s)" % (position, op, value_code))
+    for premise_index, range_codes in ranges.items():
+        premises[premise_index] += ('(' + ', '.join(range_codes) + ',)',)
+    return tuple(premises)
+
+def add_ranges(lines, ranges):
+    r'''
+        Returns lines (the patterns of a lookup) followed by the ranges for
+        it, if any (from push_down_checks), and the end of the call.
+
+            >>> add_ranges(('rule.foreach_patterns(0)',), ())
+            ('rule.foreach_patterns(0)) \\',)
+            >>> add_ranges(('rule.foreach_patterns(0)',), ("((1, '>', 100),)",))
+            ('rule.foreach_patterns(0),', "((1, '>', 100),)) \\")
+    '''
+    if not ranges: return tuple(add_end(lines, ') \\')[1])
+    return tuple(add_end(lines, ',')[1]) + (ranges[0] + ') \\',)
+
+Comparison_ops = {
+    ast.Lt: ('<', '>'),         # (op, op with the sides swapped)
+    ast.LtE: ('<=', '>='),
+    ast.Gt: ('>', '<'),
+    ast.GtE: ('>=', '<='),
+    ast.Eq: ('==', '=='),
+}
+
+def _comparisons(tree):
+    r'''Generates var_name, op, value_node for the simple comparisons in
+    tree.
+    '''
+    if isinstance(tree, ast.BoolOp) and isinstance(tree.op, ast.And):
+        for value in tree.values:
+            for comparison in _comparisons(value): yield comparison
+    elif isinstance(tree, ast.Compare):
+        operands = [tree.left] + tree.comparators
+        for left, op, right in zip(operands, tree.ops, operands[1:]):
+            ops = Comparison_ops.get(type(op))
+            if ops is None: continue
+            if _lookup_name(left) and _simple_value(right):
+                yield _lookup_name(left), ops[0], right
+            elif _lookup_name(right) and _simple_value(left):
+                yield _lookup_name(right), ops[1], left
+    elif isinstance(tree, ast.Call) and \
+         isinstance(tree.func, ast.Attribute) and \
+         tree.func.attr == 'startswith' and \
+         _lookup_name(tree.func.value) and \
+         len(tree.args) == 1 and not tree.keywords and \
+         isinstance(tree.args[0], ast.Constant) and \
+         isinstance(tree.args[0].value, str):
+        yield _lookup_name(tree.func.value), 'prefix', tree.args[0]
+
+def _lookup_name(node):
+    r'''Returns the variable name if node is context.lookup_data('name').
+    '''
+    if isinstance(node, ast.Call) and \
+       isinstance(node.func, ast.Attribute) and \
+       node.func.attr == 'lookup_data' and \
+       isinstance(node.func.value, ast.Name) and \
+       node.func.value.id == 'context' and \
+       len(node.args) == 1 and not node.keywords and \
+       isinstance(node.args[0], ast.Constant) and \
+       isinstance(node.args[0].value, str):
+        return node.args[0].value
+    return None
+
+def _simple_value(node):
+    r'''Is node a constant (other than None), or a variable?
+    '''
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        node = node.operand
+        return isinstance(node, ast.Constant) and \
+               isinstance(node.value, (int, float))
+    if isinstance(node, ast.Constant): return node.value is not None
+    return _lookup_name(node) is not None
+
+def _lookup_names(node):
+    name = _lookup_name(node)
+    return () if name is None else (name,)
+
+def _binding_premise(premises, var_name):
+    r'''Returns premise_index, position of the fact premise where var_name
+    first appears, if it's an argument there.
+    '''
+    var = "contexts.variable(%r)" % var_name
+    for i, premise in enumerate(premises):
+        if var in repr(premise):
+            if premise[0] == 'fc_premise': arg_patterns = premise[3]
+            elif premise[0] == 'bc_premise' and premise[5] is None:
+                arg_patterns = premise[4]
+            else: return None
+            if var not in arg_patterns: return None
+            return i, arg_patterns.index(var)
+    return None
+
+def _bound_before(premises, var_name):
+    r'''Is var_name bound to data by premises?
+    '''
+    var = "contexts.variable(%r)" % var_name
+    for premise in premises:
+        if premise[0] == 'fc_premise' and var in repr(premise[3]) or \
+           premise[0] in ('python_eq', 'python_in') and var in premise[1]:
+            return True
+    return False
+
 def add_start(l, start):
     '''
         >>> add_start(('a', 'b', 'c'), '^')
@@ -49,6 +49,25 @@ def p_fact1(p):
     ''' fact : IDENTIFIER_TOK LP_TOK data_list RP_TOK '''
     Fact_base.add_universal_fact(p[1], tuple(p[3]))
 
+def p_index(p):
+    ''' fact : IDENTIFIER_TOK IDENTIFIER_TOK LP_TOK data_list RP_TOK '''
+    # Raising SyntaxError here would just trigger yacc's error recovery, so
+    # the first error is saved and raised by parse.
+    global Error
+    if p[1] != 'index':
+        if Error is None:
+            Error = SyntaxError("invalid syntax",
+                                scanner.syntaxerror_params(p.lexpos(1),
+                                                           p.lineno(1)))
+        return
+    try:
+        Fact_base.add_index(p[2], p[4])
+    except ValueError as e:
+        if Error is None:
+            Error = SyntaxError(str(e),
+                                scanner.syntaxerror_params(p.lexpos(2),
+                                                           p.lineno(2)))
+
 def p_none(p):
     ''' data : NONE_TOK
         comma_opt :
@@ -112,6 +131,8 @@ def p_error(t):
 
 parser = None
 
+Error = None
+
 def init(this_module, check_tables = False, debug = 0):
     global parser
     if parser is None:
@@ -153,17 +174,22 @@ def parse(this_module, filename, check_tables = False, debug = 0):
         ...                 True)
         <fact_base kfbparse_test>
     '''
-    global Fact_base
+    global Fact_base, Error
     init(this_module, check_tables, debug)
     name = os.path.basename(filename)[:-4]
     Fact_base = fact_base.fact_base(None, name, False)
-    with open(filename) as f:
-        scanner.init(scanner, debug, check_tables, True)
-        scanner.lexer.lineno = 1
-        scanner.lexer.filename = filename
-        #parser.restart()
-        parser.parse(f.read(), lexer=scanner.lexer, tracking=True, debug=debug)
-    ans = Fact_base
-    Fact_base = None
-    return ans
+    Error = None
+    try:
+        with open(filename) as f:
+            scanner.init(scanner, debug, check_tables, True)
+            scanner.lexer.lineno = 1
+            scanner.lexer.filename = filename
+            #parser.restart()
+            parser.parse(f.read(), lexer=scanner.lexer, tracking=True,
+                         debug=debug)
+        if Error is not None: raise Error
+        return Fact_base
+    finally:
+        Fact_base = None
+        Error = None
 
@@ -0,0 +1,295 @@
+# mapped_fact_base.py
+# coding=utf-8
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+r'''
+    The .fbm format for compiled .kfb files.
+
+    Unlike the .fbc pickles, a .fbm file is not unpickled into a private
+    copy of all of the facts when it is loaded.  The file is mmap'ed
+    read-only and the universal facts are decoded as they are used.  So the
+    pages are shared by all of the processes using the same compiled_krb
+    directory (for example, the forked workers of a pre-forked server).
+
+    The file layout is:
+
+        Magic (8 bytes), header length (8 bytes, little endian), pickled
+        header, padding to an 8 byte boundary and then the data, with, for
+        each fact_list:
+
+            offsets: num_facts + 1 unsigned 8 byte offsets of the facts
+            table:   open addressing hash table of row + 1 (0 for empty),
+                     hashed by _hash
+            the encoded facts
+
+    Each fact is encoded with marshal version 0.  All positions are relative
+    to the start of the data, and everything in the data is aligned to 8
+    bytes.  The header is:
+
+        (pyke_version, compiler_version, byteorder, fact_base_name,
+         {fact_name: (offsets_pos, num_facts, table_pos, table_size,
+                      declared_indexes)})
+
+        >>> import os, tempfile
+        >>> from pyke import knowledge_engine, fact_base, contexts, pattern
+        >>> fb = fact_base.fact_base(None, 'fb', False)
+        >>> for i in range(5): fb.add_universal_fact('num', (i, str(i)))
+        >>> fb.add_universal_fact('empty', ())
+        >>> fb.add_index('num', (1,))
+        >>> path = os.path.join(tempfile.mkdtemp(), 'fb.fbm')
+        >>> write(fb, path)
+
+        >>> engine = knowledge_engine.engine()
+        >>> with open(path, 'rb') as f: fb2 = load(f, engine)
+        >>> engine.get_kb('fb') is fb2
+        True
+        >>> fb2.dump_universal_facts()
+        empty()
+        num(0, '0')
+        num(1, '1')
+        num(2, '2')
+        num(3, '3')
+        num(4, '4')
+        >>> fl = fb2.get_entity_list('num')
+        >>> fl.declared_indexes
+        {(1,)}
+        >>> (3, '3') in fl.universal_facts, (3, 3) in fl.universal_facts
+        (True, False)
+
+    Membership is by ==, as for a list:
+
+        >>> (3.0, '3') in fl.universal_facts, (True, '1') in fl.universal_facts
+        (True, True)
+        >>> fl.add_case_specific_fact((2.0, '2'))
+        >>> fl.case_specific_facts
+        []
+
+        >>> c = contexts.simple_context()
+        >>> with fb2.lookup(c, c, 'num', (contexts.variable('n'),
+        ...                               pattern.pattern_literal('2'))) \
+        ...   as gen:
+        ...     for dummy in gen: print(c.lookup_data('n'))
+        2
+
+    Adding universal facts later copies the facts for that fact_list into a
+    normal list:
+
+        >>> engine.add_universal_fact('fb', 'num', (5, '5'))
+        >>> type(fl.universal_facts), fb2.get_stats()
+        (<class 'list'>, (2, 7, 0))
+
+    The offsets and hash tables are in the byte order of the machine that
+    wrote the file, so files from a machine with the other byte order are
+    rejected:
+
+        >>> with open(path, 'rb') as f: data = f.read()
+        >>> header_len = int.from_bytes(data[8:16], 'little')
+        >>> header = list(pickle.loads(data[16:16 + header_len]))
+        >>> header[2] = 'big' if sys.byteorder == 'little' else 'little'
+        >>> header = pickle.dumps(tuple(header))
+        >>> load(Magic + len(header).to_bytes(8, 'little') + header, engine,
+        ...      'x.fbm')                       # doctest: +ELLIPSIS
+        Traceback (most recent call last):
+            ...
+        AssertionError: x.fbm: incorrect byte order: running ..., expected ...
+
+    Facts that marshal can't encode raise ValueError, so that the caller
+    can fall back to a pickle:
+
+        >>> fb.add_universal_fact('bad', (object(),))
+        >>> write(fb, path)
+        Traceback (most recent call last):
+            ...
+        ValueError: unmarshallable object
+'''
+
+import sys
+import array
+import mmap
+import marshal
+import pickle
+import zlib
+
+import pyke
+from pyke import fact_base
+
+Magic = b'PYKEFBM\x01'
+
+def _hash(args):
+    r'''
+    Returns the hash of args for the table: the crc32 of its encoding, with
+    the numbers that are equal to an int (like 1.0 and True) encoded as that
+    int, so that equal facts have the same hash.
+
+    Raises ValueError if args can't be encoded.
+
+        >>> _hash((1, 'a')) == _hash((1.0, 'a')) == _hash((True, 'a'))
+        True
+        >>> _hash((1, 'a')) == _hash((1.5, 'a'))
+        False
+    '''
+    return zlib.crc32(marshal.dumps(_canonical(args), 0))
+
+def _canonical(value):
+    if isinstance(value, tuple): return tuple(map(_canonical, value))
+    if isinstance(value, complex):
+        if value.imag: return value
+        value = value.real
+    if isinstance(value, bool) or \
+       isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+class mapped_facts(object):
+    r'''
+        A read-only sequence of the universal facts for one fact_list,
+        decoded from the buffer as they are used.
+    '''
+    def __init__(self, buffer, offsets_pos, num_facts, table_pos, table_size):
+        self.buffer = buffer
+        self.num_facts = num_facts
+        self.offsets = buffer[offsets_pos:offsets_pos + 8 * (num_facts + 1)] \
+                         .cast('Q')
+        self.table = buffer[table_pos:table_pos + 8 * table_size].cast('Q')
+
+    def __len__(self): return self.num_facts
+
+    def __getitem__(self, row):
+        if row < 0: row += self.num_facts
+        if not 0 <= row < self.num_facts:
+            raise IndexError("mapped_facts index out of range")
+        return marshal.loads(self._encoded(row))
+
+    def __iter__(self):
+        for row in range(self.num_facts): yield self[row]
+
+    def _encoded(self, row):
+        return self.buffer[self.offsets[row]:self.offsets[row + 1]]
+
+    def __contains__(self, args):
+        if not self.num_facts: return False
+        mask = len(self.table) - 1
+        try:
+            slot = _hash(args) & mask
+        except ValueError:
+            return False
+        while self.table[slot]:
+            # The hash only narrows it down, the fact must also be ==.
+            if self[self.table[slot] - 1] == args: return True
+            slot = (slot + 1) & mask
+        return False
+
+    def __reduce__(self):
+        # Pickle (e.g., copy) as a plain list.
+        return list, (list(self),)
+
+class mapped_fact_list(fact_base.fact_list):
+    def add_universal_fact(self, args):
+        if isinstance(self.universal_facts, mapped_facts):
+            self.universal_facts = list(self.universal_facts)
+        super(mapped_fact_list, self).add_universal_fact(args)
+
+    def add_universal_facts(self, facts):
+        if isinstance(self.universal_facts, mapped_facts):
+            self.universal_facts = list(self.universal_facts)
+        return super(mapped_fact_list, self).add_universal_facts(facts)
+
+def write(fb, path):
+    r'''Writes fact_base fb to path in the .fbm format.
+
+    Raises ValueError if any of the facts can't be encoded.
+    '''
+    fact_lists = []     # [(fact_name, [encoded_fact...])]
+    layout = {}
+    pos = 0             # relative to the start of the data
+    for fact_name in sorted(fb.entity_lists.keys()):
+        fl = fb.entity_lists[fact_name]
+        encoded_facts = [(marshal.dumps(args, 0), _hash(args))
+                         for args in fl.universal_facts]
+        table_size = 1
+        while table_size < 2 * len(encoded_facts): table_size <<= 1
+        table_pos = pos + 8 * (len(encoded_facts) + 1)
+        layout[fact_name] = (pos, len(encoded_facts), table_pos, table_size,
+                             fl.declared_indexes)
+        fact_lists.append((fact_name, encoded_facts))
+        pos = table_pos + 8 * table_size + \
+              sum(len(encoded) for encoded, fact_hash in encoded_facts)
+        pos += -pos % 8
+    header = pickle.dumps((pyke.version, pyke.compiler_version,
+                           sys.byteorder, fb.name, layout))
+    with open(path, 'wb') as f:
+        f.write(Magic)
+        f.write(len(header).to_bytes(8, 'little'))
+        f.write(header)
+        f.write(bytes(-f.tell() % 8))
+        data_pos = f.tell()
+        for fact_name, encoded_facts in fact_lists:
+            offsets_pos, num_facts, table_pos, table_size, declared_indexes = \
+              layout[fact_name]
+            offsets = [table_pos + 8 * table_size]
+            for encoded, fact_hash in encoded_facts:
+                offsets.append(offsets[-1] + len(encoded))
+            table = [0] * table_size
+            for row, (encoded, fact_hash) in enumerate(encoded_facts):
+                slot = fact_hash & (table_size - 1)
+                while table[slot]: slot = (slot + 1) & (table_size - 1)
+                table[slot] = row + 1
+            f.write(array.array('Q', offsets).tobytes())
+            f.write(array.array('Q', table).tobytes())
+            for encoded, fact_hash in encoded_facts: f.write(encoded)
+            f.write(bytes(-(f.tell() - data_pos) % 8))
+
+def load(f, engine, filename = None):
+    r'''Loads the .fbm file f and registers its fact_base with engine.
+
+    F may be an open binary file, which is mmap'ed, or a bytes object (when
+    the compiled_krb directory is in a zip file).
+    '''
+    if isinstance(f, (bytes, bytearray)):
+        buffer = memoryview(f)
+    else:
+        buffer = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    if filename is None: filename = getattr(f, 'name', '<bytes>')
+    if buffer[:len(Magic)] != Magic:
+        raise AssertionError("%s: not a .fbm file" % filename)
+    header_pos = len(Magic) + 8
+    header_len = int.from_bytes(buffer[len(Magic):header_pos], 'little')
+    pyke_version, compiler_version, byteorder, name, layout = \
+      pickle.loads(buffer[header_pos:header_pos + header_len])
+    if compiler_version != pyke.compiler_version:
+        raise AssertionError("%s: incorrect pyke version: running "
+                             "%s, expected %s" %
+                               (filename, pyke.version, pyke_version))
+    if byteorder != sys.byteorder:
+        raise AssertionError("%s: incorrect byte order: running "
+                             "%s, expected %s" %
+                               (filename, sys.byteorder, byteorder))
+    data_pos = header_pos + header_len
+    data = buffer[data_pos + -data_pos % 8:]
+    fb = fact_base.fact_base(engine, name)
+    for fact_name, (offsets_pos, num_facts, table_pos, table_size,
+                    declared_indexes) \
+     in layout.items():
+        fl = mapped_fact_list(fact_name)
+        fl.universal_facts = mapped_facts(data, offsets_pos, num_facts,
+                                          table_pos, table_size)
+        fl.declared_indexes = set(declared_indexes)
+        fb.entity_lists[fact_name] = fl
+    return fb
@@ -21,8 +21,173 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
+r'''
+    Patterns are matched without recursing on nested tuples, so terms may
+    be nested far deeper than Python's recursion limit (e.g., long cons
+    style lists):
+
+        >>> from pyke import contexts
+        >>> def cons_list(n, end):
+        ...     for i in range(n):
+        ...         end = pattern_tuple((pattern_literal(i), end))
+        ...     return end
+        >>> def length(data):
+        ...     n = 0
+        ...     while len(data) == 2: n, data = n + 1, data[1]
+        ...     return n, data
+        >>> sys.getrecursionlimit() < 20000
+        True
+
+        >>> a = cons_list(20000, contexts.variable('end'))
+        >>> b = cons_list(20000, pattern_tuple((), contexts.variable('rest')))
+        >>> c, c2 = contexts.simple_context(), contexts.simple_context()
+        >>> a.match_pattern(c, c, b, c2)
+        True
+        >>> c2.bind('rest', c2, ('nil',))
+        True
+        >>> length(c.lookup_data('end')), length(a.as_data(c))
+        ((0, ('nil',)), (20000, ('nil',)))
+
+        >>> c3 = contexts.simple_context()
+        >>> c3.bind('list', c3, a, c)
+        True
+        >>> contexts.variable('list').match_pattern(c3, c3, b, c2)
+        True
+        >>> length(c3.lookup_data('list'))
+        (20000, ('nil',))
+        >>> a.match_pattern(c3, c, cons_list(20000, pattern_literal(None)), c3)
+        False
+
+        >>> c4 = contexts.simple_context()
+        >>> a.match_data(c4, c4, ('nil',))
+        False
+        >>> a.match_data(c4, c4, a.as_data(c))
+        True
+        >>> c4.lookup_data('end')
+        ('nil',)
+'''
+
+import sys
 import types
 import itertools
+import collections.abc
+
+# Rest variables are bound to a tuple_slice of the data, rather than a copy,
+# when at least this many elements are left:
+Min_slice_len = 8
+
+def unify(bindings, pattern_a, a_context, pattern_b, b_context = None):
+    r'''Matches pattern_a in a_context to pattern_b in b_context, or to the
+    data pattern_b if b_context is None.
+
+    This is done with an explicit work stack of (pattern, context, pattern
+    or data, context or None) pairs still to be matched, rather than by
+    recursing into nested tuples.  Each pattern's _match_pattern_step or
+    _match_data_step either finishes its pair or pushes the pairs for its
+    parts (in reverse, so that they are matched in the same order as a
+    recursive match would).
+
+    As with match_pattern, the bindings are done through the bindings
+    context, whose undo_list serves as the trail: the bindings already done
+    are not undone here when the match fails.
+
+    Each pair of a pattern_tuple and a pattern is only matched once, so
+    that matching terms that contain themselves (through their variable
+    bindings) stops, rather than growing the stack forever.
+    '''
+    stack = [(pattern_a, a_context, pattern_b, b_context)]
+    pop = stack.pop
+    tuple_pairs_seen = set()
+    while stack:
+        pattern_a, a_context, pattern_b, b_context = pop()
+        if b_context is None:
+            if not pattern_a._match_data_step(bindings, a_context, pattern_b,
+                                              stack):
+                return False
+            continue
+        if isinstance(pattern_a, pattern_tuple):
+            key = id(pattern_a), id(a_context), id(pattern_b), id(b_context)
+            if key in tuple_pairs_seen: continue
+            tuple_pairs_seen.add(key)
+        if not pattern_a._match_pattern_step(bindings, a_context,
+                                             pattern_b, b_context, stack):
+            return False
+    return True
+
+def open_tuple(arg, arg_context):
+    r'''Used by the generated bc rules to match their tuple head patterns
+    inline.  Returns the elements that arg is, or is bound to, with their
+    context (None for data), or None if arg must be matched by the general
+    match_pattern: it is an unbound variable, a pattern_tuple with a rest
+    variable, or not a tuple at all.
+
+        >>> from pyke import contexts
+        >>> c = contexts.simple_context()
+        >>> open_tuple(pattern_literal((1, 2)), c)
+        ((1, 2), None)
+        >>> pat = pattern_tuple((pattern_literal(1), contexts.variable('b')))
+        >>> open_tuple(pat, c) == (pat.elements, c)
+        True
+        >>> c.bind('a', c, pat, c)
+        True
+        >>> open_tuple(contexts.variable('a'), c) == (pat.elements, c)
+        True
+        >>> open_tuple([1, 2], None), open_tuple('ab', None)
+        (((1, 2), None), None)
+        >>> open_tuple(contexts.variable('b'), c)
+        >>> open_tuple(pattern_tuple((), contexts.variable('b')), c)
+    '''
+    while arg_context is not None:
+        if isinstance(arg, pattern_tuple):
+            if arg.rest_var is not None: return None
+            return arg.elements, arg_context
+        if isinstance(arg, pattern_literal):
+            arg, arg_context = arg.literal, None
+        else:
+            val, val_context = arg_context.lookup(arg, True)
+            if val_context is arg_context and val is arg: return None
+            arg, arg_context = val, val_context
+    if isinstance(arg, (tuple, tuple_slice)): return arg, None
+    if isinstance(arg, str): return None
+    try:
+        return tuple(arg), None
+    except TypeError:
+        return None
+
+def tuple_rest(opened, n):
+    r'''Returns the elements of the opened tuple (from open_tuple) after the
+    first n, for a rest variable to match, with their context (None for
+    data).
+
+        >>> from pyke import contexts
+        >>> tuple_rest(((1, 2, 3), None), 1)
+        ((2, 3), None)
+        >>> rest, rest_context = tuple_rest((tuple(range(20)), None), 1)
+        >>> type(rest).__name__, rest_context
+        ('tuple_slice', None)
+        >>> c = contexts.simple_context()
+        >>> tuple_rest(((pattern_literal(1), pattern_literal(2)), c), 1)
+        ((2,), None)
+        >>> rest, rest_context = \
+        ...   tuple_rest(((pattern_literal(1), contexts.variable('b')), c), 1)
+        >>> rest.elements, rest.rest_var, rest_context is c
+        (($b,), None, True)
+    '''
+    elements, context = opened
+    if context is None:
+        if len(elements) - n < Min_slice_len: return tuple(elements[n:]), None
+        return tuple_slice(elements, n), None
+    rest_elements = elements[n:]
+    if all(isinstance(x, pattern_literal) for x in rest_elements):
+        return tuple(x.literal for x in rest_elements), None
+    return pattern_tuple(rest_elements), context
+
+def match_arg(bindings, pat, my_context, val, val_context):
+    r'''Matches pat to val, which is a pattern in val_context, or data if
+    val_context is None.
+    '''
+    if val_context is None: return pat.match_data(bindings, my_context, val)
+    return pat.match_pattern(bindings, my_context, val, val_context)
 
 class pattern(object):
     def __ne__(self, b): return not (self == b)
@@ -33,6 +198,19 @@ class pattern(object):
     def lookup(self, context, allow_variable_in_ans = False):
         return self
 
+    def _match_data_step(self, bindings, my_context, data, stack):
+        return self.match_data(bindings, my_context, data)
+
+    def _match_pattern_step(self, bindings, my_context, pattern_b, b_context,
+                            stack):
+        return self.match_pattern(bindings, my_context, pattern_b, b_context)
+
+    def _tuple_value(self, my_context, final):
+        r'''Returns the pattern_tuple, context that self is, or is bound to,
+        for as_data to convert without recursing; or None, None.
+        '''
+        return None, None
+
 class pattern_literal(pattern):
     def __init__(self, literal):
         self.literal = literal
@@ -51,6 +229,13 @@ class pattern_literal(pattern):
             return self.literal == pattern_b.literal
         return pattern_b.match_data(bindings, b_context, self.literal)
 
+    def _match_pattern_step(self, bindings, my_context, pattern_b, b_context,
+                            stack):
+        if isinstance(pattern_b, pattern_literal):
+            return self.literal == pattern_b.literal
+        stack.append((pattern_b, b_context, self.literal, None))
+        return True
+
     def as_data(self, my_context, allow_vars = False, final = None):
         return self.literal
 
@@ -70,31 +255,43 @@ class pattern_tuple(pattern):
                self.elements == b.elements and self.rest_var == b.rest_var
 
     def match_data(self, bindings, my_context, data):
-        if isinstance(data, str): return False
-        try:
-            data = tuple(data)
-        except TypeError:
-            return False
-        if len(self.elements) > len(data) or \
-           self.rest_var is None and len(self.elements) < len(data):
+        return unify(bindings, self, my_context, data)
+
+    def _match_data_step(self, bindings, my_context, data, stack):
+        if not isinstance(data, (tuple, tuple_slice)):
+            if isinstance(data, str): return False
+            try:
+                data = tuple(data)
+            except TypeError:
+                return False
+        my_len = len(self.elements)
+        if my_len > len(data) or self.rest_var is None and my_len < len(data):
             return False
-        for x, y in zip(self.elements, data):
-            if not x.match_data(bindings, my_context, y): return False
         if self.rest_var is not None:
-            return self.rest_var.match_data(bindings, my_context,
-                                            tuple(data[len(self.elements):]))
+            if len(data) - my_len < Min_slice_len:
+                rest = tuple(data[my_len:])
+            else:
+                rest = tuple_slice(data, my_len)
+            stack.append((self.rest_var, my_context, rest, None))
+        for x, y in zip(reversed(self.elements), reversed(data[:my_len])):
+            stack.append((x, my_context, y, None))
         return True
 
     def simple_match_pattern(self, bindings, my_context, pattern_b, b_context):
         return self, my_context
 
     def match_pattern(self, bindings, my_context, pattern_b, b_context):
+        return unify(bindings, self, my_context, pattern_b, b_context)
+
+    def _match_pattern_step(self, bindings, my_context, pattern_b, b_context,
+                            stack):
         simple_ans = pattern_b.simple_match_pattern(bindings, b_context,
                                                     self, my_context)
         if isinstance(simple_ans, bool): return simple_ans
         pattern_b, b_context = simple_ans
         if not isinstance(pattern_b, pattern):
-            return self.match_data(bindings, my_context, pattern_b)
+            stack.append((self, my_context, pattern_b, None))
+            return True
         assert isinstance(pattern_b, pattern_tuple), "Internal logic error"
 
         my_len = len(self.elements)
@@ -102,40 +299,59 @@ class pattern_tuple(pattern):
         if pattern_b.rest_var is None and my_len > b_len or \
            self.rest_var is None and my_len < b_len:
             return False
-        for x, y in zip(self.elements, pattern_b.elements):
-            if not x.match_pattern(bindings, my_context, y, b_context):
-                return False
+        # The rest_vars are matched last, so they go on the stack first.
         if my_len <= b_len and self.rest_var is not None:
             # This is where the two rest_vars are bound together if my_len ==
             # b_len.
             tail_val, tail_context = pattern_b._tail(my_len, b_context)
-            if tail_context is None:
-                if not self.rest_var.match_data(bindings, my_context, tail_val):
-                    return False
-            else:
-                if not self.rest_var.match_pattern(bindings, my_context,
-                                                   tail_val, tail_context):
-                    return False
+            stack.append((self.rest_var, my_context, tail_val, tail_context))
         elif pattern_b.rest_var is not None:
             tail_val, tail_context = self._tail(b_len, my_context)
-            if tail_context is None:
-                if not pattern_b.rest_var.match_data(bindings, b_context,
-                                                     tail_val):
-                    return False
-            else:
-                if not pattern_b.rest_var.match_pattern(bindings, b_context,
-                                                        tail_val, tail_context):
-                    return False
+            stack.append((pattern_b.rest_var, b_context, tail_val,
+                          tail_context))
+        n = min(my_len, b_len)
+        for x, y in zip(reversed(self.elements[:n]),
+                        reversed(pattern_b.elements[:n])):
+            stack.append((x, my_context, y, b_context))
         return True
 
+    def _tuple_value(self, my_context, final):
+        return self, my_context
+
     def as_data(self, my_context, allow_vars = False, final = None):
-        ans = tuple(x.as_data(my_context, allow_vars, final)
-                    for x in self.elements)
-        if self.rest_var is None:
-            return ans
-        rest = my_context.lookup_data(self.rest_var.name, allow_vars, final)
-        if isinstance(rest, tuple): return ans + rest
-        return ans + ('*' + rest,)
+        # Each frame is [pattern_tuple, context, [converted parts]], where the
+        # parts are the converted elements followed by the rest_var's value.
+        stack = [[self, my_context, []]]
+        active = set([(id(self), id(my_context))])
+        while True:
+            pat, context, parts = stack[-1]
+            i = len(parts)
+            if i < len(pat.elements):
+                part = pat.elements[i]
+            elif i == len(pat.elements) and pat.rest_var is not None:
+                part = pat.rest_var
+            else:
+                ans = tuple(parts[:len(pat.elements)])
+                if pat.rest_var is not None:
+                    rest = parts[-1]
+                    if isinstance(rest, tuple): ans += rest
+                    else: ans += ('*' + rest,)
+                stack.pop()
+                active.discard((id(pat), id(context)))
+                if not stack: return ans
+                stack[-1][2].append(ans)
+                continue
+            sub_pat, sub_context = part._tuple_value(context, final)
+            if sub_pat is not None:
+                if (id(sub_pat), id(sub_context)) in active:
+                    raise RecursionError("%s is bound to a tuple containing "
+                                           "itself" % repr(part))
+                active.add((id(sub_pat), id(sub_context)))
+                stack.append([sub_pat, sub_context, []])
+            elif i < len(pat.elements):
+                parts.append(part.as_data(context, allow_vars, final))
+            else:
+                parts.append(context.lookup_data(part.name, allow_vars, final))
 
     def _tail(self, n, my_context):
         """ Return a copy of myself with the first n elements removed.
@@ -154,3 +370,113 @@ class pattern_tuple(pattern):
         if not arg_test or self.rest_var is None: return arg_test
         return self.rest_var.is_data(my_context)
 
+class tuple_slice(collections.abc.Sequence):
+    r'''
+        The elements of a tuple from start on, without copying them.  Rest
+        variables are bound to these, so that walking down a long tuple one
+        element at a time doesn't copy the rest of it at each step.  Slicing
+        it to the end gives another tuple_slice of the same tuple.
+
+        It compares, hashes, adds and pickles like a tuple; and the
+        contexts' lookup_data (and so as_data) turns it into a tuple before
+        handing it to user code.
+
+            >>> t = tuple(range(10))
+            >>> s = tuple_slice(t, 3)
+            >>> s
+            (3, 4, 5, 6, 7, 8, 9)
+            >>> len(s), s[0], s[-1], s[1:3], 5 in s
+            (7, 3, 9, (4, 5), True)
+            >>> s2 = s[2:]
+            >>> type(s2).__name__, s2.data is t, s2
+            ('tuple_slice', True, (5, 6, 7, 8, 9))
+            >>> s == t[3:], t[3:] == s, s != t, hash(s) == hash(t[3:])
+            (True, True, True, True)
+            >>> s < (4,), (1, 2) + s2, s2 + (10,)
+            (True, (1, 2, 5, 6, 7, 8, 9), (5, 6, 7, 8, 9, 10))
+            >>> import pickle
+            >>> pickle.loads(pickle.dumps(s))
+            (3, 4, 5, 6, 7, 8, 9)
+            >>> s[7]
+            Traceback (most recent call last):
+                ...
+            IndexError: tuple index out of range
+
+        Rest variables bound to long tuples get tuple_slices:
+
+            >>> from pyke import contexts
+            >>> c = contexts.simple_context()
+            >>> pat = pattern_tuple((contexts.variable('first'),),
+            ...                     contexts.variable('rest'))
+            >>> pat.match_data(c, c, t)
+            True
+            >>> type(c.lookup(contexts.variable('rest'))[0]).__name__
+            'tuple_slice'
+            >>> c.lookup_data('rest')
+            (1, 2, 3, 4, 5, 6, 7, 8, 9)
+            >>> type(c.lookup(contexts.variable('rest'))[0]).__name__
+            'tuple'
+    '''
+    __slots__ = ('data', 'start')
+
+    def __init__(self, data, start):
+        if isinstance(data, tuple_slice):
+            data, start = data.data, data.start + start
+        self.data = data
+        self.start = start
+
+    def __len__(self):
+        return len(self.data) - self.start
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step == 1 and stop == len(self) and start > 0:
+                return tuple_slice(self.data, self.start + start)
+            return tuple(self.data[self.start + j]
+                         for j in range(start, stop, step))
+        if i < 0: i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("tuple index out of range")
+        return self.data[self.start + i]
+
+    def __iter__(self):
+        return itertools.islice(self.data, self.start, None)
+
+    def __reversed__(self):
+        data = self.data
+        return (data[i] for i in range(len(data) - 1, self.start - 1, -1))
+
+    def __eq__(self, b):
+        if not isinstance(b, (tuple, tuple_slice)): return NotImplemented
+        return len(self) == len(b) and all(x == y for x, y in zip(self, b))
+
+    def __ne__(self, b):
+        ans = self.__eq__(b)
+        if ans is NotImplemented: return ans
+        return not ans
+
+    def __hash__(self): return hash(tuple(self))
+
+    def _compare(self, b, op):
+        if not isinstance(b, (tuple, tuple_slice)): return NotImplemented
+        return op(tuple(self), tuple(b))
+
+    def __lt__(self, b): return self._compare(b, tuple.__lt__)
+    def __le__(self, b): return self._compare(b, tuple.__le__)
+    def __gt__(self, b): return self._compare(b, tuple.__gt__)
+    def __ge__(self, b): return self._compare(b, tuple.__ge__)
+
+    def __add__(self, b):
+        if not isinstance(b, (tuple, tuple_slice)): return NotImplemented
+        return tuple(self) + tuple(b)
+
+    def __radd__(self, b):
+        if not isinstance(b, tuple): return NotImplemented
+        return b + tuple(self)
+
+    def __repr__(self): return repr(tuple(self))
+
+    def __reduce__(self):
+        # Pickle (e.g., copy) as a plain tuple.
+        return tuple, (tuple(self),)
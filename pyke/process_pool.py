@@ -0,0 +1,200 @@
+# process_pool.py
+# coding=utf-8
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+r'''
+    Proving many independent goals in a pool of worker processes (see
+    engine.prove_many).
+
+    Each worker process creates its own engine from the compiled_krb
+    packages of the calling engine (without checking the source files), adds
+    the calling engine's case specific facts and activates the same rule
+    bases.  This is only done once per worker.  So the universal facts are
+    the ones in the compiled .kfb files; universal facts added to the calling
+    engine by the program are not seen by the workers.
+
+    The args for each goal are sent to the workers in chunks of chunksize.
+    Each answer is pickled by itself, so an answer that can't be pickled (or
+    unpickled), or a goal that raises some other exception, only spoils that
+    one answer: the exception is returned in place of its (vars, plan), like
+    CanNotProve.
+
+        >>> import os, sys
+        >>> from pyke import knowledge_engine
+        >>> source_dir = os.path.dirname(os.path.dirname(__file__))
+        >>> family_relations_dir = \
+        ...   os.path.join(source_dir, 'examples/family_relations')
+        >>> sys.path.insert(0, family_relations_dir)
+        >>> engine = knowledge_engine.engine(family_relations_dir)
+        >>> engine.add_case_specific_fact('family', 'son_of',
+        ...                               ('tom', 'bruce', 'marilyn'))
+        >>> engine.activate('bc_example')
+
+        >>> people = [{'person1': 'tom', 'person2': person2}
+        ...           for person2 in ('bruce', 'thomas', 'nobody', 'david_b')]
+        >>> for args, ans in engine.prove_many(
+        ...                     'bc_example.how_related($person1, $person2, '
+        ...                                            '$relationship)',
+        ...                     people, workers=2, chunksize=3):
+        ...     if isinstance(ans, knowledge_engine.CanNotProve):
+        ...         print(args['person2'], type(ans).__name__)
+        ...     else:
+        ...         print(args['person2'], ans[0]['relationship'])
+        bruce ('son', 'father')
+        thomas (('grand', 'son'), ('grand', 'father'))
+        nobody CanNotProve
+        david_b ('nephew', 'uncle')
+
+        >>> sorted(args['person2']
+        ...        for args, ans in engine.prove_many(
+        ...                           'bc_example.how_related($person1, '
+        ...                                '$person2, $relationship)',
+        ...                           people, workers=2, ordered=False))
+        ['bruce', 'david_b', 'nobody', 'thomas']
+
+    Plans are returned too.  The worker's plan is unpickled in this process,
+    so it runs here:
+
+        >>> engine.activate('example')
+        >>> for args, ans in engine.prove_many('example.how_related($a, $b)',
+        ...                                    [{'a': 'tom', 'b': 'bruce'},
+        ...                                     {'a': 'tom', 'b': 'nobody'}],
+        ...                                    workers=2):
+        ...     if isinstance(ans, knowledge_engine.CanNotProve):
+        ...         print(args['b'], ans)
+        ...     else:
+        ...         vars, plan = ans
+        ...         print(args['b'], plan())
+        bruce son, father
+        nobody Can not prove example.how_related($a, $b)
+
+    And an exception raised for one set of args is returned for it:
+
+        >>> for args, ans in engine.prove_many('example.how_related($a, $b)',
+        ...                                    [{'a': 'tom', 'b': 'bruce'},
+        ...                                     None]):
+        ...     print(args, type(ans).__name__)
+        {'a': 'tom', 'b': 'bruce'} tuple
+        None TypeError
+'''
+
+import os
+import pickle
+import collections
+import concurrent.futures
+
+from pyke import knowledge_engine, fact_base, rule_base, goal
+
+def prove_many(engine, goal_str, args_list, workers = None, ordered = True,
+               chunksize = 1):
+    if not engine.target_package_names:
+        raise ValueError("prove_many: engine has no compiled_krb packages")
+    if workers is None: workers = os.cpu_count() or 1
+    case_facts = [(kb.name, fact_list.name, list(fact_list.case_specific_facts))
+                  for kb in engine.knowledge_bases.values()
+                   if isinstance(kb, fact_base.fact_base)
+                  for fact_list in kb.entity_lists.values()
+                   if len(fact_list.case_specific_facts)]
+    rb_names = [kb.name for kb in engine.knowledge_bases.values()
+                         if isinstance(kb, rule_base.rule_base)]
+    pool = concurrent.futures.ProcessPoolExecutor(
+             workers, initializer=init_worker,
+             initargs=(engine.target_package_names, case_facts, rb_names))
+    try:
+        chunks = gen_chunks(args_list, chunksize)
+        max_pending = 2 * workers
+        if ordered:
+            pending = collections.deque()
+            for chunk in chunks:
+                pending.append((chunk, pool.submit(prove_chunk, goal_str,
+                                                   chunk)))
+                if len(pending) >= max_pending:
+                    chunk, future = pending.popleft()
+                    for ans in zip(chunk, map(load, future.result())):
+                        yield ans
+            while pending:
+                chunk, future = pending.popleft()
+                for ans in zip(chunk, map(load, future.result())): yield ans
+        else:
+            pending = {}        # {future: chunk}
+            for chunk in chunks:
+                pending[pool.submit(prove_chunk, goal_str, chunk)] = chunk
+                if len(pending) >= max_pending:
+                    done, not_done = concurrent.futures.wait(
+                      pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        for ans in zip(pending.pop(future),
+                                       map(load, future.result())):
+                            yield ans
+            for future in concurrent.futures.as_completed(pending):
+                for ans in zip(pending[future], map(load, future.result())):
+                    yield ans
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+def gen_chunks(args_list, chunksize):
+    chunk = []
+    for args in args_list:
+        chunk.append(args)
+        if len(chunk) >= chunksize:
+            yield chunk
+            chunk = []
+    if chunk: yield chunk
+
+# The engine in each worker process.
+Engine = None
+
+def init_worker(target_package_names, case_facts, rb_names):
+    global Engine
+    Engine = knowledge_engine.engine(*((None, target_package_name)
+                                       for target_package_name
+                                        in target_package_names))
+    for kb_name, fact_name, facts in case_facts:
+        for args in facts:
+            Engine.add_case_specific_fact(kb_name, fact_name, args)
+    Engine.activate(*rb_names)
+
+def prove_chunk(goal_str, chunk):
+    r'''Returns the pickled answer for each args in chunk.
+
+    Any exception raised, by the goal or by pickling its answer, is pickled
+    in place of the answer.
+    '''
+    prover = goal.compile(goal_str)
+    ans = []
+    for args in chunk:
+        try:
+            ans.append(dump(prover.prove_1(Engine, **args)))
+        except Exception as e:
+            ans.append(dump(e))
+    return ans
+
+def dump(ans):
+    try:
+        return pickle.dumps(ans)
+    except Exception as e:
+        return pickle.dumps(e)
+
+def load(data):
+    try:
+        return pickle.loads(data)
+    except Exception as e:
+        return e
@@ -22,7 +22,12 @@
 # THE SOFTWARE.
 
 import itertools
-from pyke import knowledge_base
+import contextlib
+from pyke import knowledge_base, contexts, pattern, fc_rule, startup_profile
+
+# rule_lists with at least this many bc_rules index the heads of their rules,
+# so that prove only tries the rules that could match the goal's arguments.
+Rule_index_threshold = 4
 
 class StopProof(Exception): pass
 
@@ -97,6 +102,11 @@ class rule_base(knowledge_base.knowledge_base):
         self.parent = parent
         self.exclude_set = frozenset(exclude_list)
         self.rules = {}         # {name: rule}
+        self.table_all_goals = False
+        self.tabled_goals = set()       # {goal_name}
+        self.tabled = {}        # {goal_name: bool}, see is_tabled
+        self.tables = {}        # {(goal_name, call_key): answer_table}
+        self.table_stack = []   # answer_tables being filled, outermost first
 
     def add_fc_rule(self, fc_rule):
         if fc_rule.name in self.rules:
@@ -111,21 +121,25 @@ class rule_base(knowledge_base.knowledge_base):
                                  (self.name, bc_rule.name))
         self.rules[bc_rule.name] = bc_rule
         self.get_entity_list(bc_rule.goal_name).add_bc_rule(bc_rule)
+        if self.engine.tabling: self.forget_tabled()
 
     def init2(self):
         if not self.initialized:
-            self.initialized = True
-            if self.parent:
-                parent = self.engine.rule_bases.get(self.parent)
-                if parent is None:
-                    raise KeyError("rule_base %s: parent %s not found" % \
-                                   (self.name, self.parent))
-                self.parent = parent
-                self.parent.init2()
-                self.root_name = self.parent.root_name
-            else:
-                self.root_name = self.name
-            self.reset()
+            with startup_profile.phase('init2', self.name):
+                self.initialized = True
+                if self.parent:
+                    parent = self.engine.rule_bases.get(self.parent)
+                    if parent is None and self.engine.load_kb(self.parent):
+                        parent = self.engine.rule_bases.get(self.parent)
+                    if parent is None:
+                        raise KeyError("rule_base %s: parent %s not found" % \
+                                       (self.name, self.parent))
+                    self.parent = parent
+                    self.parent.init2()
+                    self.root_name = self.parent.root_name
+                else:
+                    self.root_name = self.name
+                self.reset()
 
     def derived_from(self, rb):
         parent = self.parent
@@ -134,29 +148,42 @@ class rule_base(knowledge_base.knowledge_base):
             parent = parent.parent
         return False
 
-    def register_fc_rules(self, stop_at_rb):
+    def register_fc_rules(self, stop_at_rb, network = None, reorder = False):
         rb = self
         while rb is not stop_at_rb:
-            for fc_rule in rb.fc_rules: fc_rule.register_rule()
+            for fc_rule in rb.fc_rules: fc_rule.register_rule(network, reorder)
             if not rb.parent: break
             rb = rb.parent
 
-    def run_fc_rules(self, stop_at_rb):
+    def run_fc_rules(self, stop_at_rb, semi_naive = False):
+        if semi_naive:
+            batch = fc_rule.delta_batch(self)
+            self.engine.fc_batch = batch
+            try:
+                self.run_fc_rules(stop_at_rb)
+                batch.run()
+            finally:
+                self.engine.fc_batch = None
+            return
         rb = self
         while rb is not stop_at_rb:
-            for fc_rule in rb.fc_rules: fc_rule.run()
+            for rule in rb.fc_rules: rule.run()
             if not rb.parent: break
             rb = rb.parent
 
-    def activate(self):
+    def activate(self, fc_network = False, semi_naive = False,
+                 reorder = False):
         current_rb = self.engine.knowledge_bases.get(self.root_name)
         if current_rb:
             assert self.derived_from(current_rb), \
                    "%s.activate(): not derived from current rule_base, %s" % \
                    (self.name, current_rb.name)
         self.engine.knowledge_bases[self.root_name] = self
-        self.register_fc_rules(current_rb)
-        self.run_fc_rules(current_rb)
+        self.register_fc_rules(current_rb,
+                               self.engine.get_fc_network()
+                                 if fc_network else None,
+                               reorder)
+        self.run_fc_rules(current_rb, semi_naive)
 
     def reset(self):
         if self.root_name in self.engine.knowledge_bases:
@@ -164,10 +191,55 @@ class rule_base(knowledge_base.knowledge_base):
         for fc_rule in self.fc_rules: fc_rule.reset()
         self.num_fc_rules_triggered = 0
         self.num_fc_rules_rerun = 0
+        self.num_fc_rounds = 0
+        self.num_fc_delta_facts = 0
         self.num_prove_calls = 0
         self.num_bc_rules_matched = 0
         self.num_bc_rule_successes = 0
         self.num_bc_rule_failures = 0
+        self.num_table_hits = 0
+        self.clear_tables()
+
+    def table(self, *goal_names):
+        r'''Tables (memoizes) the answers to goal_names, or to all of the
+        goals in this rule_base (and the rule_bases derived from it) if no
+        goal_names are given.
+
+        The answers to each call are kept, by goal and call pattern, until
+        the engine is reset or facts are added.  Left recursive goals are
+        evaluated to a fixpoint rather than looping.
+
+        Goals with rules that return plans, and calls whose answers aren't
+        ground, are proven as usual.
+        '''
+        if goal_names: self.tabled_goals.update(goal_names)
+        else: self.table_all_goals = True
+        self.engine.tabling = True
+        self.forget_tabled()
+
+    def clear_tables(self):
+        self.tables.clear()
+
+    def forget_tabled(self):
+        r'''
+        Forgets the is_tabled decisions of all of the rule_bases, since they
+        also depend on the rules and tabled goals of their parents.
+        '''
+        for rb in self.engine.rule_bases.values(): rb.tabled.clear()
+
+    def is_tabled(self, goal_name):
+        r'''Decides whether goal_name is tabled.  This is only called once for
+        each goal (see prove), until rules are added or goals are tabled.
+        '''
+        rb = self
+        while isinstance(rb, rule_base):
+            if rb.table_all_goals or goal_name in rb.tabled_goals:
+                return not any(bc_rule.plan_fn is not None
+                               for rl in self.gen_rule_lists_for(goal_name)
+                               for bc_rule in rl.bc_rules)
+            if goal_name in rb.exclude_set: break
+            rb = rb.parent
+        return False
 
     def gen_rule_lists_for(self, goal_name):
         rule_base = self
@@ -181,15 +253,108 @@ class rule_base(knowledge_base.knowledge_base):
 
     def prove(self, bindings, pat_context, goal_name, patterns):
         self.num_prove_calls += 1
+        if self.engine.tabling:
+            tabled = self.tabled.get(goal_name)
+            if tabled is None:
+                tabled = self.tabled[goal_name] = self.is_tabled(goal_name)
+            if tabled:
+                return contextlib.closing(
+                           self.prove_tabled(bindings, pat_context, goal_name,
+                                             patterns))
+        return self.prove_untabled(bindings, pat_context, goal_name, patterns)
+
+    def prove_untabled(self, bindings, pat_context, goal_name, patterns):
         return stopIteratorContext(self,
                    chain_context(
                        rl.prove(bindings, pat_context, patterns)
                        for rl in self.gen_rule_lists_for(goal_name)))
 
+    def prove_tabled(self, bindings, pat_context, goal_name, patterns):
+        r'''Generator that yields None for each tabled answer.
+
+        A new call fills its answer_table by running the rules until no new
+        answers are found by the recursive calls made along the way, which
+        only see the answers found so far.  Calls that used the answers of
+        an enclosing call which was still being filled are not complete, so
+        their tables are thrown away afterwards.
+        '''
+        key = goal_name, call_key(patterns, pat_context)
+        table = self.tables.get(key)
+        if table is not None and table.untabled:
+            with self.prove_untabled(bindings, pat_context, goal_name,
+                                     patterns) \
+              as gen:
+                for plan in gen: yield plan
+            return
+        if table is None:
+            table = answer_table(len(self.table_stack))
+            self.tables[key] = table
+            self.engine.tables_filled = True
+            self.table_stack.append(table)
+            try:
+                while True:
+                    table.consumed = False
+                    num_answers = len(table.answers)
+                    with self.prove_untabled(bindings, pat_context, goal_name,
+                                             patterns) \
+                      as gen:
+                        for plan in gen:
+                            try:
+                                table.add(tuple(pat.as_data(pat_context)
+                                                for pat in patterns))
+                            except KeyError:
+                                # Answer has unbound variables.
+                                table.untabled = True
+                                break
+                    if table.untabled or not table.consumed or \
+                       len(table.answers) == num_answers:
+                        break
+                table.complete = not table.untabled and \
+                                 table.leader_depth >= table.depth
+            finally:
+                self.table_stack.pop()
+                if not table.complete and not table.untabled and \
+                   self.tables.get(key) is table:
+                    del self.tables[key]
+            if table.untabled:
+                with self.prove_untabled(bindings, pat_context, goal_name,
+                                         patterns) \
+                  as gen:
+                    for plan in gen: yield plan
+                return
+            answers = table.answers
+        elif table.complete:
+            self.num_table_hits += 1
+            answers = table.answers
+        else:
+            # A recursive call: use the answers found so far.
+            table.consumed = True
+            for t in self.table_stack[table.depth + 1:]:
+                t.leader_depth = min(t.leader_depth, table.depth)
+            answers = list(table.answers)
+        for args in answers:
+            mark = bindings.mark(True)
+            end_done = False
+            try:
+                if all(map(lambda pat, arg:
+                               pat.match_data(bindings, pat_context, arg),
+                           patterns,
+                           args)):
+                    bindings.end_save_all_undo()
+                    end_done = True
+                    yield None
+            finally:
+                if not end_done: bindings.end_save_all_undo()
+                bindings.undo_to_mark(mark)
+
     def print_stats(self, f):
         f.write("%s: %d fc_rules, %d triggered, %d rerun\n" %
                 (self.name, len(self.fc_rules), self.num_fc_rules_triggered,
                  self.num_fc_rules_rerun))
+        if self.num_fc_rounds:
+            f.write("%s  %d semi-naive rounds, %d delta facts\n" %
+                    (' ' * len(self.name), self.num_fc_rounds,
+                     self.num_fc_delta_facts))
         num_bc_rules = sum(rule_list.num_bc_rules()
                              for rule_list in self.entity_lists.values())
         f.write("%s: %d bc_rules, %d goals, %d rules matched\n" %
@@ -210,13 +375,139 @@ class rule_base(knowledge_base.knowledge_base):
             if rule_list.untrace(rule_name): return
         raise KeyError("untrace: rule %s not found" % rule_name)
 
+class answer_table(object):
+    r'''
+        The answers found for one tabled call, in the order found.
+    '''
+    def __init__(self, depth):
+        self.depth = depth              # index in rule_base.table_stack
+        self.leader_depth = depth       # lowest depth of the incomplete
+                                        # tables used while filling this one
+        self.answers = []               # [(arg...)...]
+        self.answer_set = set()
+        self.complete = False
+        self.untabled = False
+        self.consumed = False   # used by a recursive call while being filled
+
+    def add(self, args):
+        if args not in self.answer_set:
+            self.answer_set.add(args)
+            self.answers.append(args)
+
+class _var_key(object):
+    r'''
+        Stands for the n-th distinct unbound variable in a call_key.
+    '''
+    def __init__(self, n): self.n = n
+
+    def __repr__(self): return '$%d' % self.n
+
+    def __eq__(self, b):
+        return isinstance(b, _var_key) and type(self) is type(b) and \
+               self.n == b.n
+
+    def __ne__(self, b): return not (self == b)
+
+    def __hash__(self): return hash((type(self), self.n))
+
+class _rest_key(_var_key):
+    def __repr__(self): return '*$%d' % self.n
+
+def call_key(patterns, context):
+    r'''Returns a hashable key for patterns, as bound in context, that is
+    the same for variant calls (calls that only differ in the names of
+    their unbound variables).
+
+        >>> x, y = contexts.variable('x'), contexts.variable('y')
+        >>> c = contexts.simple_context()
+        >>> call_key((x, pattern.pattern_literal(1), y, x), c)
+        ($0, 1, $1, $0)
+        >>> c.bind('y', c, 'b')
+        True
+        >>> call_key((x, pattern.pattern_literal(1), y, x), c)
+        ($0, 1, 'b', $0)
+        >>> call_key((pattern.pattern_tuple((y,), x),), c)
+        (('b', *$0),)
+        >>> call_key((contexts.anonymous('_a'), contexts.anonymous('_a')), c)
+        ($0, $1)
+    '''
+    var_numbers = {}
+    def key(pat, context):
+        if isinstance(pat, contexts.anonymous):
+            var_numbers[object()] = len(var_numbers)
+            return _var_key(len(var_numbers) - 1)
+        if isinstance(pat, contexts.variable):
+            val, val_context = context.lookup(pat, True)
+            if isinstance(val, contexts.variable):
+                if isinstance(val, contexts.anonymous):
+                    return key(val, val_context)
+                n = var_numbers.setdefault((val.name, id(val_context)),
+                                           len(var_numbers))
+                return _var_key(n)
+            if val_context is None: return val
+            pat, context = val, val_context
+        if isinstance(pat, pattern.pattern_tuple):
+            ans = tuple(key(element, context) for element in pat.elements)
+            if pat.rest_var is None: return ans
+            rest = key(pat.rest_var, context)
+            if isinstance(rest, _var_key): return ans + (_rest_key(rest.n),)
+            return ans + tuple(rest)
+        if isinstance(pat, pattern.pattern_literal): return pat.literal
+        return pat
+    return tuple(key(pat, context) for pat in patterns)
+
 class rule_list(knowledge_base.knowledge_entity_list):
+    r'''
+        The rule index is a set of bit masks over the positions of the rules
+        in bc_rules.  For each number of arguments and each argument
+        position, it records which rules have a variable there, which have
+        each literal there and which have a tuple there (and how long).  A
+        goal's bound arguments then select the rules to try by and'ing
+        these masks together, which keeps the rules in order.
+
+            >>> class dummy_rule(object):
+            ...     def __init__(self, name, *patterns):
+            ...         self.name, self.patterns = name, patterns
+            ...     def goal_arg_patterns(self): return self.patterns
+            ...     def __repr__(self): return self.name
+            >>> x, y = contexts.variable('x'), contexts.variable('y')
+            >>> rl = rule_list('goal')
+            >>> for rule in (dummy_rule('r0', pattern.pattern_literal(1), x),
+            ...              dummy_rule('r1', x, pattern.pattern_literal(2)),
+            ...              dummy_rule('r2', pattern.pattern_literal(3), x),
+            ...              dummy_rule('r3', pattern.pattern_tuple((x,), y),
+            ...                               x),
+            ...              dummy_rule('r4', pattern.pattern_tuple((x, y)),
+            ...                               x),
+            ...              dummy_rule('r5', x)):
+            ...     rl.add_bc_rule(rule)
+            >>> c = contexts.simple_context()
+            >>> def rules(*args):
+            ...     return list(rl.gen_candidate_rules(c,
+            ...                   tuple(pattern.pattern_literal(arg)
+            ...                         if arg is not None else y
+            ...                         for arg in args)))
+            >>> rules(1, 2)
+            [r0, r1]
+            >>> rules(3, None)
+            [r1, r2]
+            >>> rules((1, 2), None)
+            [r1, r3, r4]
+            >>> rules((1,), 4)
+            [r3]
+            >>> rules(None, None)
+            [r0, r1, r2, r3, r4]
+            >>> rules('a')
+            [r5]
+    '''
     def __init__(self, name):
         self.name = name
         self.bc_rules = []
+        self.index = None       # {num_args: rule_index}
 
     def add_bc_rule(self, bc_rule):
         self.bc_rules.append(bc_rule)
+        self.index = None
 
     def prove(self, bindings, pat_context, patterns):
         """ Returns a context manager for a generator that binds patterns to
@@ -226,7 +517,41 @@ class rule_list(knowledge_base.knowledge_entity_list):
         """
         return chain_context(
                    bc_rule.bc_fn(bc_rule, patterns, pat_context)
-                   for bc_rule in self.bc_rules)
+                   for bc_rule in self.gen_candidate_rules(pat_context,
+                                                           patterns))
+
+    def gen_candidate_rules(self, pat_context, patterns):
+        r'''Generates the bc_rules, in order, whose goal_arg_patterns could
+        match patterns.
+        '''
+        if len(self.bc_rules) < Rule_index_threshold:
+            return iter(self.bc_rules)
+        if self.index is None: self.build_index()
+        index = self.index.get(len(patterns))
+        if index is None: return iter(())
+        mask = index.all_rules
+        for i, pat in enumerate(patterns):
+            if pat.is_data(pat_context):
+                if isinstance(pat, contexts.variable):
+                    # Not lookup_data, which would copy a tuple_slice.
+                    data, data_context = pat_context.lookup(pat)
+                    if data_context is not None:
+                        data = data.as_data(data_context)
+                else:
+                    data = pat.as_data(pat_context)
+                mask &= index.select(i, data)
+                if not mask: break
+        return (self.bc_rules[i]
+                for i in range(mask.bit_length()) if mask & (1 << i))
+
+    def build_index(self):
+        self.index = {}
+        for i, bc_rule in enumerate(self.bc_rules):
+            heads = bc_rule.goal_arg_patterns()
+            index = self.index.get(len(heads))
+            if index is None:
+                index = self.index[len(heads)] = rule_index(len(heads))
+            index.add(1 << i, heads)
 
     def num_bc_rules(self):
         return len(self.bc_rules)
@@ -245,3 +570,58 @@ class rule_list(knowledge_base.knowledge_entity_list):
                 return True
         return False
 
+class rule_index(object):
+    r'''
+        The masks for the rules in a rule_list with num_args arguments.
+    '''
+    def __init__(self, num_args):
+        self.all_rules = 0
+        self.any_masks = [0] * num_args         # variables
+        self.literal_masks = [{} for i in range(num_args)]
+                                                # {literal: mask}
+        self.tuple_masks = [{} for i in range(num_args)]
+                                                # {(len, has_rest): mask}
+        self.literal_tuple_lens = [set() for i in range(num_args)]
+
+    def add(self, bit, heads):
+        self.all_rules |= bit
+        for i, head in enumerate(heads):
+            if isinstance(head, pattern.pattern_literal):
+                try:
+                    literals = self.literal_masks[i]
+                    literals[head.literal] = literals.get(head.literal, 0) | bit
+                    if isinstance(head.literal, tuple):
+                        self.literal_tuple_lens[i].add(len(head.literal))
+                    continue
+                except TypeError:
+                    # unhashable
+                    pass
+            elif isinstance(head, pattern.pattern_tuple):
+                key = len(head.elements), head.rest_var is not None
+                self.tuple_masks[i][key] = self.tuple_masks[i].get(key, 0) | bit
+                continue
+            self.any_masks[i] |= bit
+
+    def select(self, i, data):
+        r'''Returns the mask of rules that could match data as argument i.
+        '''
+        mask = self.any_masks[i]
+        if isinstance(data, pattern.tuple_slice):
+            # Hashing it would copy it, so only do that if there's a literal
+            # that it could be equal to.
+            if len(data) in self.literal_tuple_lens[i]:
+                mask |= self.literal_masks[i].get(data, 0)
+        else:
+            try:
+                mask |= self.literal_masks[i].get(data, 0)
+            except TypeError:
+                # unhashable data, can't tell
+                return self.all_rules
+        if isinstance(data, (tuple, pattern.tuple_slice)):
+            for (length, has_rest), tuple_mask in self.tuple_masks[i].items():
+                if length == len(data) or has_rest and length <= len(data):
+                    mask |= tuple_mask
+        elif not isinstance(data, (str, int, float, type(None))):
+            # Might still be an iterable that a tuple pattern matches.
+            for tuple_mask in self.tuple_masks[i].values(): mask |= tuple_mask
+        return mask
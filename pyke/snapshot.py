@@ -0,0 +1,206 @@
+# snapshot.py
+# coding=utf-8
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+r'''
+    Snapshots of an engine, for a cheap reset between cases.
+
+    Engine.reset erases all of the case specific facts and fact_list indexes
+    and deactivates all of the rule bases, so each case then has to rerun
+    all of the forward-chaining rules and rebuild the indexes.  When the
+    rule bases can be activated once, before the facts for each case are
+    added, an engine snapshot may be taken right after that.  Engine.restore
+    then returns the engine to the snapshot, only undoing what has changed
+    since.
+
+    Nothing is copied when the snapshot is taken.  Each fact_list (and each
+    node of the fc_network) saves its state just before it's first changed
+    after the snapshot.  Restore undoes the changes to these in the
+    reverse order that they were made, and forgets them.  The same snapshot
+    may be restored any number of times, until the engine is reset or
+    another snapshot is taken.
+
+        >>> import os, sys, io
+        >>> from pyke import knowledge_engine
+        >>> source_dir = os.path.dirname(os.path.dirname(__file__))
+        >>> family_relations_dir = \
+        ...   os.path.join(source_dir, 'examples/family_relations')
+        >>> sys.path.insert(0, family_relations_dir)
+        >>> engine = knowledge_engine.engine(family_relations_dir)
+
+        >>> def facts():
+        ...     out = io.StringIO()
+        ...     stdout, sys.stdout = sys.stdout, out
+        ...     try:
+        ...         engine.get_kb('family').dump_specific_facts()
+        ...     finally:
+        ...         sys.stdout = stdout
+        ...     return sorted(out.getvalue().split('\n'))
+
+        >>> engine.activate('fc_example')
+        >>> before = facts()
+        >>> snapshot = engine.snapshot()
+
+    Facts added after the snapshot trigger the rules as usual:
+
+        >>> engine.add_case_specific_fact('family', 'son_of',
+        ...                               ('tom', 'arthur2', 'kathleen'))
+        >>> len(facts()) > len(before)
+        True
+        >>> engine.activate('bc_example')
+
+    And are gone after the restore, along with the activation of bc_example:
+
+        >>> engine.restore(snapshot)
+        >>> facts() == before
+        True
+        >>> engine.get_kb('bc_example')
+        Traceback (most recent call last):
+            ...
+        KeyError: 'knowledge_base bc_example not found'
+        >>> engine.get_kb('fc_example')
+        <rule_base fc_example>
+
+    The same is true with the fc_network:
+
+        >>> engine.reset()
+        >>> engine.activate('fc_example', fc_network=True)
+        >>> snapshot = engine.snapshot()
+        >>> stats = engine.fc_network.get_stats()
+        >>> engine.add_case_specific_fact('family', 'son_of',
+        ...                               ('tom', 'arthur2', 'kathleen'))
+        >>> with_tom = facts()
+        >>> engine.fc_network.get_stats() == stats
+        False
+        >>> engine.restore(snapshot)
+        >>> facts() == before, engine.fc_network.get_stats() == stats
+        (True, True)
+        >>> engine.add_case_specific_fact('family', 'son_of',
+        ...                               ('tom', 'arthur2', 'kathleen'))
+        >>> facts() == with_tom
+        True
+
+    A snapshot can't be restored after the engine is reset:
+
+        >>> engine.reset()
+        >>> engine.restore(snapshot)                    # doctest: +ELLIPSIS
+        Traceback (most recent call last):
+            ...
+        AssertionError: snapshot.restore: the engine has been reset or ...
+
+    The answers to the questions asked before the snapshot are kept, and
+    those asked since are forgotten:
+
+        >>> from pyke import question_base
+        >>> class user_question(object):
+        ...     def set_question_base(self, question_base): pass
+        ...     def ask(self, format_params):
+        ...         print("asked:", format_params['meal'])
+        ...         return True
+        >>> questions = question_base.question_base('questions')
+        >>> questions.add_question(
+        ...   question_base.question('ate', ('meal', 'ans'), 'ans',
+        ...                          user_question()))
+        >>> questions.register(engine)
+        >>> engine.prove_1_goal('questions.ate(lunch, $ans)')
+        asked: lunch
+        ({'ans': True}, None)
+        >>> snapshot = engine.snapshot()
+        >>> engine.prove_1_goal('questions.ate(dinner, $ans)')
+        asked: dinner
+        ({'ans': True}, None)
+        >>> engine.restore(snapshot)
+        >>> engine.prove_1_goal('questions.ate(lunch, $ans)')
+        ({'ans': True}, None)
+        >>> engine.prove_1_goal('questions.ate(dinner, $ans)')
+        asked: dinner
+        ({'ans': True}, None)
+'''
+
+from pyke import fact_base, rule_base, question_base
+
+# The rule_base statistics, which are also restored.
+Rb_counters = ('num_fc_rules_triggered', 'num_fc_rules_rerun',
+               'num_fc_rounds', 'num_fc_delta_facts', 'num_prove_calls',
+               'num_bc_rules_matched', 'num_bc_rule_successes',
+               'num_bc_rule_failures', 'num_table_hits')
+
+class snapshot(object):
+    def __init__(self, engine):
+        self.engine = engine
+        self.active_rbs = dict((name, kb)
+                               for name, kb in engine.knowledge_bases.items()
+                                if isinstance(kb, rule_base.rule_base))
+        self.counters = dict((rb, tuple(getattr(rb, name)
+                                        for name in Rb_counters))
+                             for rb in engine.rule_bases.values())
+        self.fc_network = engine.fc_network
+        if self.fc_network is not None: self.fc_network.start_saving()
+        self.justifications = engine.justifications
+        self.answers = dict((question, dict(question.cache))
+                            for kb in engine.knowledge_bases.values()
+                             if isinstance(kb, question_base.question_base)
+                            for question in kb.entity_lists.values())
+        self.saved = {}         # {fact_list: mark}, of those changed since
+
+    def save(self, fact_list):
+        if fact_list not in self.saved:
+            self.saved[fact_list] = fact_list.mark()
+
+    def restore(self):
+        engine = self.engine
+        if engine.cur_snapshot is not self:
+            raise AssertionError("snapshot.restore: the engine has been "
+                                 "reset or snapshot again")
+
+        # Deactivate the rule bases activated since the snapshot.
+        for name, kb in tuple(engine.knowledge_bases.items()):
+            if isinstance(kb, rule_base.rule_base):
+                old_rb = self.active_rbs.get(name)
+                rb = kb
+                while rb is not None and rb is not old_rb:
+                    for fc_rule in rb.fc_rules: fc_rule.reset()
+                    rb = rb.parent
+                if old_rb is None: del engine.knowledge_bases[name]
+                else: engine.knowledge_bases[name] = old_rb
+            elif not isinstance(kb, (fact_base.fact_base,
+                                     question_base.question_base)):
+                kb.reset()
+
+        for question, answers in self.answers.items():
+            question.cache.clear()
+            question.cache.update(answers)
+
+        if engine.fc_network is not self.fc_network:
+            engine.fc_network = self.fc_network
+        elif self.fc_network is not None:
+            self.fc_network.restore()
+
+        # The justifications of the facts removed are left; they are only
+        # used while all of their premises are there.
+        engine.justifications = self.justifications
+
+        saved, self.saved = self.saved, {}
+        for fact_list, mark in saved.items(): fact_list.undo_to(mark)
+
+        for rb, counters in self.counters.items():
+            for name, value in zip(Rb_counters, counters):
+                setattr(rb, name, value)
+        engine.clear_tables()
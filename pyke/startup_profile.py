@@ -0,0 +1,226 @@
+# startup_profile.py
+# coding=utf-8
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+r'''
+    Profiling where the time (and memory) goes when engines are created.
+
+    While a profile is active, each phase of creating an engine is timed:
+
+        find_sources    finding the source files for each search path
+                        (engine._create_target_pkg)
+        compile         compiling the sources of each compiled_krb package
+        write           writing its compiled_pyke_files.py
+        load_module     importing (and populating) each generated module
+        load_pickle     loading each .fbc or .qbc file
+        load_fbm        loading each .fbm file
+        load_goal_cache loading the goals saved in each compiled_krb package
+        init2           initializing each rule base
+
+    Phases that happen within other phases (for example, the compiler's own
+    engine is created within the first compile) are recorded with a greater
+    depth.  The phase totals only include the outermost phases.
+
+        >>> import os, json
+        >>> from pyke import knowledge_engine
+        >>> source_dir = os.path.dirname(os.path.dirname(__file__))
+        >>> family_relations_dir = \
+        ...   os.path.join(source_dir, 'examples/family_relations')
+        >>> engine = knowledge_engine.engine(family_relations_dir)  # compile
+        >>> with profile() as prof:
+        ...     engine = knowledge_engine.engine(family_relations_dir)
+        >>> sorted(set(entry['phase'] for entry in prof.entries))
+        ... # doctest: +NORMALIZE_WHITESPACE
+        ['compile', 'find_sources', 'init2', 'load_fbm', 'load_goal_cache',
+         'load_module', 'write']
+        >>> sorted(prof.by_kb())
+        ['bc2_example', 'bc_example', 'example', 'family', 'fc_example']
+        >>> report = json.loads(prof.as_json())
+        >>> sorted(report)
+        ... # doctest: +NORMALIZE_WHITESPACE
+        ['entries', 'knowledge_bases', 'phases', 'total_memory',
+         'total_seconds']
+        >>> report['phases']['load_module']['count']
+        6
+        >>> prof.print_table()                          # doctest: +ELLIPSIS
+        phase                 count    seconds     memory
+        find_sources              1     ...
+        compile                   1     ...
+        ...
+        knowledge base                 seconds     memory
+        bc2_example                    ...
+        ...
+
+    Each engine can also profile its own creation, by setting the
+    PYKE_STARTUP_PROFILE environment variable (see Env_var).
+'''
+
+import os
+import sys
+import time
+import json
+import contextlib
+import tracemalloc
+
+# The profile currently recording, if any.
+Current = None
+
+# The environment variable that has each engine profile its own creation (if
+# no profile is active).  If its value ends in '.json', a line of JSON is
+# appended to that file for each engine; otherwise the table is printed to
+# stderr.
+Env_var = 'PYKE_STARTUP_PROFILE'
+
+Not_profiling = contextlib.nullcontext()
+
+class profile(object):
+    r'''Records the phases of creating engines while the profile is active
+    (used as a context manager).
+
+    If memory is True, the net memory allocated by each phase is also
+    recorded, with tracemalloc (which slows everything down).
+    '''
+    def __init__(self, memory = True):
+        self.memory = memory
+        self.entries = []   # [{'phase', 'name', 'seconds', 'memory', 'depth'}]
+        self.depth = 0
+        self.seconds = 0.0
+        self.started_tracing = False
+
+    def __enter__(self):
+        global Current
+        assert Current is None, "startup_profile: profile already active"
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        Current = self
+        self.start_memory = self.get_memory()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, type, value, tb):
+        global Current
+        self.seconds += time.perf_counter() - self.start
+        self.total_memory = self.get_memory() - self.start_memory
+        Current = None
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def get_memory(self):
+        if not self.memory: return 0
+        return tracemalloc.get_traced_memory()[0]
+
+    @contextlib.contextmanager
+    def phase(self, phase, name):
+        entry = {'phase': phase, 'name': name, 'depth': self.depth}
+        self.entries.append(entry)
+        self.depth += 1
+        start_memory = self.get_memory()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry['seconds'] = time.perf_counter() - start
+            entry['memory'] = self.get_memory() - start_memory
+            self.depth -= 1
+
+    def by_phase(self):
+        r'''Returns {phase: {'count', 'seconds', 'memory'}} of the outermost
+        phases.
+        '''
+        ans = {}
+        for entry in self.entries:
+            if entry['depth'] == 0:
+                totals = ans.setdefault(entry['phase'],
+                                        {'count': 0, 'seconds': 0.0,
+                                         'memory': 0})
+                totals['count'] += 1
+                totals['seconds'] += entry['seconds']
+                totals['memory'] += entry['memory']
+        return ans
+
+    def by_kb(self):
+        r'''Returns {kb_name: {'seconds', 'memory'}} of the outermost load
+        and init2 phases for each knowledge base (or rule base).
+        '''
+        ans = {}
+        for entry in self.entries:
+            if entry['depth'] == 0 and \
+               entry['phase'].startswith(('load_', 'init2')) and \
+               entry['phase'] != 'load_goal_cache':
+                totals = ans.setdefault(entry['name'],
+                                        {'seconds': 0.0, 'memory': 0})
+                totals['seconds'] += entry['seconds']
+                totals['memory'] += entry['memory']
+        return ans
+
+    def as_json(self):
+        return json.dumps({'total_seconds': self.seconds,
+                           'total_memory': self.total_memory,
+                           'phases': self.by_phase(),
+                           'knowledge_bases': self.by_kb(),
+                           'entries': self.entries},
+                          sort_keys = True)
+
+    def print_table(self, f = None):
+        if f is None: f = sys.stdout
+        f.write("%-20s %6s %10s %10s\n" % ('phase', 'count', 'seconds',
+                                          'memory'))
+        for phase, totals in self.by_phase().items():
+            f.write("%-20s %6d %10.4f %10d\n" %
+                      (phase, totals['count'], totals['seconds'],
+                       totals['memory']))
+        f.write("%-20s %6s %10.4f %10d\n" % ('total', '', self.seconds,
+                                            self.total_memory))
+        f.write("\n")
+        f.write("%-27s %10s %10s\n" % ('knowledge base', 'seconds', 'memory'))
+        for kb_name, totals in sorted(self.by_kb().items()):
+            f.write("%-27s %10.4f %10d\n" %
+                      (kb_name, totals['seconds'], totals['memory']))
+
+    def report_to(self, destination):
+        r'''Reports to the destination named by Env_var.
+        '''
+        if destination.endswith('.json'):
+            with open(destination, 'a') as f:
+                f.write(self.as_json() + '\n')
+        else:
+            self.print_table(sys.stderr)
+
+def phase(phase, name):
+    r'''Returns a context manager timing phase for name, if a profile is
+    active.
+    '''
+    if Current is None: return Not_profiling
+    return Current.phase(phase, name)
+
+@contextlib.contextmanager
+def from_environ():
+    r'''Profiles the engine creation within it if Env_var is set, and no
+    profile is already active.
+    '''
+    destination = os.environ.get(Env_var)
+    if not destination or Current is not None:
+        yield
+    else:
+        with profile() as prof:
+            yield
+        prof.report_to(destination)
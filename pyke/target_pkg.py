@@ -31,11 +31,34 @@ import os, os.path
 import time
 import sys
 import imp
+import importlib.machinery
 import re
+import hashlib
+import contextlib
 import pyke
+from pyke import startup_profile
+
+try:
+    import fcntl
+except ImportError:
+    # No locking on this platform (see target_pkg.compile_lock).
+    fcntl = None
 
 debug = False
 
+# Compile .kfb files into mmap'ed .fbm files (see pyke.mapped_fact_base),
+# rather than .fbc pickles.  Fact bases that can't be stored as .fbm files
+# are still pickled.
+Mapped_fact_bases = True
+
+# The number of processes to compile the source files that need compiling
+# with.  With 1, they are compiled one at a time in this process.  None uses
+# one process per cpu.
+Compile_workers = 1
+
+# The file in the compiled_krb directory that is locked while compiling.
+Lock_filename = 'compiled_pyke_files.lock'
+
 Name_test = re.compile(r'[a-zA-Z_][a-zA-Z0-9_]*$')
 
 class target_pkg(object):
@@ -50,10 +73,17 @@ class target_pkg(object):
 
     This maintains the following information for each compiled target file:
         source_package, source_filepath, compile_time, target_filename.
+
+    And for each source file, the mtime, size and hash of its contents when
+    it was compiled.  A source file is only recompiled when its contents
+    have changed, so touching it (or checking it out again) doesn't cause a
+    recompile.  The file is only hashed again when its mtime or size has
+    changed.
     '''
     def __init__(self, module_name, filename = None,
                        pyke_version = pyke.version,
-                       loader = None, sources = None, compiler_version = 0):
+                       loader = None, sources = None, compiler_version = 0,
+                       source_hashes = None):
         r'''
 
         The parameters are:
@@ -72,6 +102,10 @@ class target_pkg(object):
             compiler_version:
                           the version of the pyke compiler used to compile all
                           of the targets in this compiled_krb directory.
+            source_hashes:
+                          {(source_package_name, path_from_package,
+                            source_filepath):
+                           (mtime, size, hash)}
 
         This class is instantiated in two different circumstances:
 
@@ -138,7 +172,11 @@ class target_pkg(object):
                     if debug:
                         print("target_pkg: mkdir", \
                                              target_package_dir, file=sys.stderr)
-                    os.mkdir(target_package_dir)
+                    try:
+                        os.mkdir(target_package_dir)
+                    except FileExistsError:
+                        # Another process beat us to it.
+                        pass
 
                 # Does __init__.py file exist?
                 init_filepath = \
@@ -162,15 +200,23 @@ class target_pkg(object):
         self.directory = os.path.dirname(self.filename)
         if debug:
             print("target_pkg:", self.package_name, self.filename, file=sys.stderr)
+        if isinstance(loader, (importlib.machinery.SourceFileLoader,
+                               importlib.machinery.SourcelessFileLoader)):
+            # Python 3 sets __loader__ for every module; only a loader for a
+            # zipped compiled_krb directory matters here.
+            loader = None
         self.loader = loader
 
         if compiler_version == pyke.compiler_version:
             # {(source_package_name, source_filepath):
             #  [compile_time, target_filename, ...]}
             self.sources = sources if sources is not None else {}
+            self.source_hashes = \
+                source_hashes if source_hashes is not None else {}
         elif self.loader is None:
             # Force recompile of everything
             self.sources = {}
+            self.source_hashes = {}
         else:
             # Loading incorrect pyke.compiler_version from zip file.
             # Can't recompile to zip file...
@@ -221,8 +267,7 @@ class target_pkg(object):
                             os.path.join(dirpath[len(source_dir)+1:],
                                          filename)
                         self.add_source(source_package_name, path_from_package,
-                                        source_relpath,
-                                        os.path.getmtime(source_abspath))
+                                        source_relpath, source_abspath)
                         sources.add(source_relpath)
 
             # Delete old source file info for files that are no longer present
@@ -237,9 +282,53 @@ class target_pkg(object):
                     print("del:", source_package_name, filepath, file=sys.stderr)
                 del self.sources[source_package_name, path_from_package,
                                  deleted_filepath]
+                self.source_hashes.pop((source_package_name, path_from_package,
+                                        deleted_filepath),
+                                       None)
 
     def add_source(self, source_package_name, path_from_package,
-                         source_filepath, source_mtime):
+                         source_filepath, source_abspath):
+        r'''Notes whether the source file needs to be compiled.
+
+            >>> import os, tempfile
+            >>> source_dir = tempfile.mkdtemp()
+            >>> source_path = os.path.join(source_dir, 'rules.krb')
+            >>> with open(source_path, 'w') as f: f.write('# rules\n')
+            8
+            >>> tp = target_pkg('compiled_krb.compiled_pyke_files',
+            ...                 os.path.join(source_dir, 'compiled_krb',
+            ...                              'compiled_pyke_files.py'),
+            ...                 sources = {},
+            ...                 compiler_version = pyke.compiler_version)
+            >>> tp.reset()
+            >>> tp.add_source('', '', 'rules.krb', source_path)
+            >>> tp.sources
+            {('', '', 'rules.krb'): []}
+            >>> tp.sources['', '', 'rules.krb'] = [1.0, 'rules_bc.py']
+
+        Touching it doesn't cause a recompile:
+
+            >>> os.utime(source_path, (10.0, 10.0))
+            >>> tp.reset()
+            >>> tp.add_source('', '', 'rules.krb', source_path)
+            >>> tp.sources, tp.dirty
+            ({('', '', 'rules.krb'): [1.0, 'rules_bc.py']}, True)
+            >>> tp.reset()
+            >>> tp.add_source('', '', 'rules.krb', source_path)
+            >>> tp.dirty
+            False
+
+        But changing it does:
+
+            >>> with open(source_path, 'a') as f: f.write('# more\n')
+            7
+            >>> tp.reset()
+            >>> tp.add_source('', '', 'rules.krb', source_path)
+            >>> tp.sources
+            {('', '', 'rules.krb'): []}
+            >>> os.remove(source_path)
+            >>> os.rmdir(source_dir)
+        '''
         if debug:
             print("target_pkg.add_source:", \
                                  source_package_name, path_from_package, \
@@ -254,43 +343,168 @@ class target_pkg(object):
         self.rb_names.add(rb_name)
         key = source_package_name, path_from_package, source_filepath
         if debug: print("key:", key, file=sys.stderr)
-        if self.sources.get(key, (0,))[0] < source_mtime:
+        stat = os.stat(source_abspath)
+        mtime_size = stat.st_mtime, stat.st_size
+        old_hash = self.source_hashes.get(key)
+        if old_hash is not None and old_hash[:2] == mtime_size and \
+           self.sources.get(key):
+            # Unchanged since it was compiled, without reading it.
+            return
+        new_hash = mtime_size + (hash_file(source_abspath),)
+        if old_hash is None:
+            # No hash recorded, fall back on the compile time.
+            changed = self.sources.get(key, (0,))[0] < stat.st_mtime
+        else:
+            changed = old_hash[2] != new_hash[2]
+        if changed or not self.sources.get(key):
             if debug:
                 print(source_filepath, "needs to be compiled", file=sys.stderr)
             self.sources[key] = []
-            self.dirty = True
+        self.source_hashes[key] = new_hash
+        self.dirty = True
 
     def do_by_ext(self, prefix, filename, *args):
         ext = os.path.splitext(filename)[1][1:]
         return getattr(self, "%s_%s" % (prefix, ext))(filename, *args)
 
+    @contextlib.contextmanager
+    def compile_lock(self):
+        r'''Holds a lock on the compiled_krb directory while something needs
+        to be compiled (or written), so that only one process at a time
+        compiles into it.
+
+        The other processes wait, and then pick up the targets that were
+        compiled while they waited (see merge_written), rather than
+        compiling them again.
+        '''
+        if not self.dirty or not self.check_sources or self.loader or \
+           fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, Lock_filename), 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                self.merge_written()
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def merge_written(self):
+        r'''Uses the targets in the compiled_pyke_files.py file now on disk
+        for the sources that still need to be compiled, if they were compiled
+        from the same contents.  Clears self.dirty if nothing is left to be
+        written.
+        '''
+        if not os.path.exists(self.filename): return
+        namespace = {'__name__': self.package_name + '.compiled_pyke_files',
+                     '__file__': self.filename}
+        try:
+            with open(self.filename) as f:
+                exec(compile(f.read(), self.filename, 'exec'), namespace)
+        except Exception:
+            # Not readable, so compile everything.
+            return
+        if namespace.get('target_pkg_version') != pyke.target_pkg_version or \
+           namespace.get('compiler_version') != pyke.compiler_version:
+            return
+        written = namespace['get_target_pkg']()
+        keys = [key for key in self.sources
+                    if (key[0], key[1]) in self.source_packages]
+        for key in keys:
+            if not self.sources[key] and written.sources.get(key) and \
+               key in self.source_hashes and \
+               written.source_hashes.get(key, (None,) * 3)[2] == \
+                 self.source_hashes[key][2]:
+                if debug:
+                    print("merge_written: already compiled:", key,
+                          file=sys.stderr)
+                self.sources[key] = written.sources[key]
+        if all(self.sources[key] == written.sources.get(key) and
+               self.source_hashes.get(key) == written.source_hashes.get(key)
+               for key in keys) and \
+           len(keys) == len(written.sources):
+            self.dirty = False
+
     def compile(self, engine):
+        r'''Compiles the source files that are out of date.
+
+        If more than one needs compiling and Compile_workers is not 1, they
+        are compiled by a pool of worker processes (see _compile_source).
+        The compiled_pyke_files.py file is still only written once, by
+        write.
+
+            >>> import os, sys, shutil, tempfile
+            >>> from pyke import knowledge_engine
+            >>> source_dir = os.path.dirname(os.path.dirname(__file__))
+            >>> temp_dir = tempfile.mkdtemp()
+            >>> package_dir = os.path.join(temp_dir, 'parallel_compile_test')
+            >>> shutil.copytree(os.path.join(source_dir,
+            ...                              'examples/family_relations'),
+            ...                 package_dir) == package_dir
+            True
+            >>> open(os.path.join(package_dir, '__init__.py'), 'w').close()
+            >>> sys.path.insert(0, temp_dir)
+            >>> import pyke.target_pkg
+            >>> pyke.target_pkg.Compile_workers = 2
+            >>> engine = knowledge_engine.engine(package_dir)
+            >>> pyke.target_pkg.Compile_workers = 1
+            >>> sorted(engine.rule_bases.keys())
+            ['bc2_example', 'bc_example', 'example', 'fc_example']
+            >>> engine.activate('bc_example')
+            >>> engine.prove_1_goal(
+            ...   'bc_example.how_related(bruce, thomas, $ans)')[0]['ans']
+            ('son', 'father')
+            >>> del sys.path[0]
+            >>> shutil.rmtree(temp_dir)
+        '''
         if debug: print("%s.compile:" % self.package_name, file=sys.stderr)
         global krb_compiler
         if self.check_sources and not self.loader:
-            initialized = False
-            for (source_package_name, path_from_package, source_filename), \
-                value \
-             in self.sources.items():
-                if not value and \
-                   (source_package_name, path_from_package) in \
-                     self.source_packages:
-                    if not initialized:
-                        try:
-                            krb_compiler
-                        except NameError:
-                            from pyke import krb_compiler
-                        initialized = True
-                    target_files = \
-                        self.do_by_ext('compile',
-                            os.path.join(
-                                self.source_packages[source_package_name,
-                                                     path_from_package],
-                                source_filename))
-                    if debug: print("target_files:", target_files, file=sys.stderr)
-                    value.append(time.time())
-                    value.extend(target_files)
-                    self.compiled_targets.update(target_files)
+            to_compile = [(value,
+                           os.path.join(
+                             self.source_packages[source_package_name,
+                                                  path_from_package],
+                             source_filename))
+                          for (source_package_name, path_from_package,
+                               source_filename), value
+                           in self.sources.items()
+                          if not value and
+                             (source_package_name, path_from_package) in
+                               self.source_packages]
+            if not to_compile: return
+            workers = Compile_workers or os.cpu_count() or 1
+            if workers > 1 and len(to_compile) > 1:
+                self.compile_in_pool(to_compile, min(workers, len(to_compile)))
+                return
+            try:
+                krb_compiler
+            except NameError:
+                from pyke import krb_compiler
+            for value, source_path in to_compile:
+                self.compiled(value, self.do_by_ext('compile', source_path))
+
+    def compile_in_pool(self, to_compile, workers):
+        import concurrent.futures
+        first_exc = None
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            futures = [executor.submit(_compile_source, self.package_name,
+                                       self.filename, source_path)
+                       for value, source_path in to_compile]
+            for (value, source_path), future in zip(to_compile, futures):
+                try:
+                    target_files = future.result()
+                except Exception as e:
+                    # Report the first error, but keep the other results.
+                    if first_exc is None: first_exc = e
+                else:
+                    self.compiled(value, target_files)
+        if first_exc is not None: raise first_exc
+
+    def compiled(self, value, target_files):
+        if debug: print("target_files:", target_files, file=sys.stderr)
+        value.append(time.time())
+        value.extend(target_files)
+        self.compiled_targets.update(target_files)
 
     def compile_krb(self, source_filename):
         if debug: print("compile_krb:", source_filename, file=sys.stderr)
@@ -299,11 +513,32 @@ class target_pkg(object):
                                         self.directory, source_filename)
 
     def compile_kfb(self, source_filename):
+        global mapped_fact_base
         if debug: print("compile_kfb:", source_filename, file=sys.stderr)
+        base_name = os.path.basename(source_filename)[:-4]
+        fb = krb_compiler.compile_kfb(source_filename)
+        if Mapped_fact_bases:
+            try:
+                mapped_fact_base
+            except NameError:
+                from pyke import mapped_fact_base
+            fbm_name = base_name + '.fbm'
+            fbm_path = os.path.join(self.directory, fbm_name)
+            try:
+                sys.stderr.write("writing [%s]/%s\n" %
+                                   (self.package_name, fbm_name))
+                mapped_fact_base.write(fb, fbm_path)
+                return (fbm_name,)
+            except ValueError:
+                # Some fact can't be stored in a .fbm file, pickle it instead.
+                if os.path.lexists(fbm_path): os.remove(fbm_path)
+            except:
+                if os.path.lexists(fbm_path): os.remove(fbm_path)
+                raise
         try:
-            fbc_name = os.path.basename(source_filename)[:-4] + '.fbc'
+            fbc_name = base_name + '.fbc'
             fbc_path = os.path.join(self.directory, fbc_name)
-            self.pickle_it(krb_compiler.compile_kfb(source_filename), fbc_path)
+            self.pickle_it(fb, fbc_path)
             return (fbc_name,)
         except:
             if os.path.lexists(fbc_path): os.remove(fbc_path)
@@ -326,7 +561,8 @@ class target_pkg(object):
             sys.stderr.write('writing [%s]/%s\n' % 
                                (self.package_name,
                                 os.path.basename(self.filename)))
-            with open(self.filename, 'w') as f:
+            temp_filename = '%s.%d.tmp' % (self.filename, os.getpid())
+            with open(temp_filename, 'w') as f:
                 f.write("# compiled_pyke_files.py\n\n")
                 f.write("from pyke import target_pkg\n\n")
                 f.write("pyke_version = %r\n" % pyke.version)
@@ -346,7 +582,14 @@ class target_pkg(object):
                         f.write("         %r:\n" % (key,))
                         f.write("           %r,\n" % (value,))
                 f.write("        },\n")
-                f.write("        compiler_version)\n\n")
+                f.write("        compiler_version, {\n")
+                for key, value in self.source_hashes.items():
+                    if (key[0], key[1]) in self.source_packages:
+                        f.write("         %r:\n" % (key,))
+                        f.write("           %r,\n" % (value,))
+                f.write("        })\n\n")
+            # Other processes may be importing it without the lock.
+            os.replace(temp_filename, self.filename)
             if os.path.exists(self.filename + 'c'):
                 os.remove(self.filename + 'c')
             if os.path.exists(self.filename + 'o'):
@@ -357,13 +600,44 @@ class target_pkg(object):
         load_flags = {'load_fc': load_fc, 'load_bc': load_bc,
                       'load_fb': load_fb, 'load_qb': load_qb}
         if debug: print("target_pkg.load:", load_flags, file=sys.stderr)
+        for target_filename in self.gen_target_filenames():
+            if debug: print("load:", target_filename, file=sys.stderr)
+            self.do_by_ext('load', target_filename, engine, load_flags)
+
+    def gen_target_filenames(self):
         for (source_package_name, path_from_package, source_filename), value \
          in self.sources.items():
             if not self.check_sources or self.loader or \
                (source_package_name, path_from_package) in self.source_packages:
                 for target_filename in value[1:]:
-                    if debug: print("load:", target_filename, file=sys.stderr)
-                    self.do_by_ext('load', target_filename, engine, load_flags)
+                    yield target_filename
+
+    def manifest(self):
+        r'''Returns {kb_name: [target_filename...]} of the files that load
+        would load, by the name of the knowledge base (or rule base) that
+        each file creates.
+
+        This is taken from the sources listed in compiled_pyke_files.py,
+        without importing or reading any of the target files.
+
+            >>> tp = target_pkg('pyke.compiled_krb.compiled_pyke_files',
+            ...                 'compiled_krb/compiled_pyke_files.py',
+            ...                 sources = {('', 'src', 'src/family.kfb'):
+            ...                              [1, 'family.fbm'],
+            ...                            ('', 'src', 'src/rules.krb'):
+            ...                              [1, 'rules_fc.py',
+            ...                               'rules_plans.py', 'rules_bc.py']},
+            ...                 compiler_version = pyke.compiler_version)
+            >>> tp.reset(check_sources = False)
+            >>> sorted(tp.manifest().items())
+            ... # doctest: +NORMALIZE_WHITESPACE
+            [('family', ['family.fbm']),
+             ('rules', ['rules_fc.py', 'rules_plans.py', 'rules_bc.py'])]
+        '''
+        ans = {}
+        for target_filename in self.gen_target_filenames():
+            ans.setdefault(kb_name(target_filename), []).append(target_filename)
+        return ans
 
     def load_py(self, target_filename, engine, flags):
         if debug: print("load_py:", target_filename, file=sys.stderr)
@@ -388,38 +662,75 @@ class target_pkg(object):
         if flags['load_fb']:
             self.load_pickle(target_filename, engine)
 
+    def load_fbm(self, target_filename, engine, flags):
+        global mapped_fact_base
+        if debug: print("load_fbm:", target_filename, file=sys.stderr)
+        if flags['load_fb']:
+            try:
+                mapped_fact_base
+            except NameError:
+                from pyke import mapped_fact_base
+            full_path = os.path.join(self.directory, target_filename)
+            name = kb_name(target_filename)
+            if self.loader:
+                with startup_profile.phase('load_fbm', name):
+                    mapped_fact_base.load(self.loader.get_data(full_path),
+                                          engine, full_path)
+            else:
+                with open(full_path, 'rb') as f, \
+                     startup_profile.phase('load_fbm', name):
+                    mapped_fact_base.load(f, engine)
+
     def load_qbc(self, target_filename, engine, flags):
         if debug: print("load_qbc:", target_filename, file=sys.stderr)
         if flags['load_qb']:
             self.load_pickle(target_filename, engine)
 
+    def load_goal_cache(self):
+        r'''Loads the goals saved by engine.save_goal_cache, if any, into
+        goal.Cache.
+        '''
+        global goal
+        try:
+            goal
+        except NameError:
+            from pyke import goal
+        full_path = os.path.join(self.directory, goal.Cache_filename)
+        if self.loader:
+            import io
+            try:
+                data = self.loader.get_data(full_path)
+            except IOError:
+                return
+            goal.load_cache(io.BytesIO(data))
+        elif os.path.exists(full_path):
+            if debug: print("load_goal_cache:", full_path, file=sys.stderr)
+            goal.load_cache(full_path)
+
     def load_module(self, module_path, filename, engine, do_import = True):
         if debug: print("load_module:", module_path, filename, file=sys.stderr)
-        module = None
-        if module_path in sys.modules:
-            if debug: print("load_module: already imported", file=sys.stderr)
-            module = sys.modules[module_path]
-            if filename in self.compiled_targets:
-                if debug: print("load_module: reloading", file=sys.stderr)
-                module = imp.reload(module)
-        elif do_import:
-            if debug: print("load_module: importing", file=sys.stderr)
-            module = import_(module_path)
-        if module is not None and \
-           getattr(module, 'compiler_version', 0) != pyke.compiler_version:
-            raise AssertionError("%s: incorrect pyke version: running "
-                                 "%s, expected %s" %
-                                   (filename, pyke.version,
-                                    module.pyke_version))
-        if do_import: module.populate(engine)
+        with startup_profile.phase('load_module', kb_name(filename)):
+            module = None
+            if module_path in sys.modules:
+                if debug:
+                    print("load_module: already imported", file=sys.stderr)
+                module = sys.modules[module_path]
+                if filename in self.compiled_targets:
+                    if debug: print("load_module: reloading", file=sys.stderr)
+                    module = imp.reload(module)
+            elif do_import:
+                if debug: print("load_module: importing", file=sys.stderr)
+                module = import_(module_path)
+            if module is not None and \
+               getattr(module, 'compiler_version', 0) != pyke.compiler_version:
+                raise AssertionError("%s: incorrect pyke version: running "
+                                     "%s, expected %s" %
+                                       (filename, pyke.version,
+                                        module.pyke_version))
+            if do_import: engine.populate(module)
 
     def load_pickle(self, filename, engine):
-        global pickle
         if debug: print("load_pickle:", filename, file=sys.stderr)
-        try:
-            pickle
-        except NameError:
-            import pickle as pickle
         full_path = os.path.join(self.directory, filename)
         if self.loader:
             import contextlib
@@ -428,17 +739,9 @@ class target_pkg(object):
                 contextlib.closing(io.BytesIO(self.loader.get_data(full_path)))
         else:
             ctx_lib = open(full_path, 'rb')
-        with ctx_lib as f:
-            versions = pickle.load(f)
-            if isinstance(versions, tuple):
-                pyke_version, compiler_version = versions
-            else:
-                pyke_version, compiler_version = versions, 0
-            if compiler_version != pyke.compiler_version:
-                raise AssertionError("%s: incorrect pyke version: running "
-                                     "%s, expected %s" %
-                                       (filename, pyke.version, pyke_version))
-            pickle.load(f).register(engine)
+        with ctx_lib as f, \
+             startup_profile.phase('load_pickle', kb_name(filename)):
+            load_pickled(f, filename, engine)
 
     def pickle_it(self, obj, path):
         global pickle
@@ -456,6 +759,59 @@ class target_pkg(object):
 
 def _raise_exc(exc): raise exc
 
+def kb_name(target_filename):
+    r'''Returns the name of the knowledge base (or rule base) that
+    target_filename creates.
+
+        >>> kb_name('family.fbm'), kb_name('fc_example_fc.py')
+        ('family', 'fc_example')
+    '''
+    name, ext = os.path.splitext(target_filename)
+    if ext == '.py': name = name.rsplit('_', 1)[0]
+    return name
+
+def load_pickled(f, filename, engine):
+    r'''Registers the knowledge base pickled by target_pkg.pickle_it in the
+    open binary file f with engine.
+    '''
+    global pickle
+    try:
+        pickle
+    except NameError:
+        import pickle as pickle
+    versions = pickle.load(f)
+    if isinstance(versions, tuple):
+        pyke_version, compiler_version = versions
+    else:
+        pyke_version, compiler_version = versions, 0
+    if compiler_version != pyke.compiler_version:
+        raise AssertionError("%s: incorrect pyke version: running "
+                             "%s, expected %s" %
+                               (filename, pyke.version, pyke_version))
+    pickle.load(f).register(engine)
+
+def hash_file(path):
+    r'''Returns the hash of the contents of the file at path.
+    '''
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(65536), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def _compile_source(package_name, filename, source_filename):
+    r'''Compiles source_filename in a worker process for
+    target_pkg.compile_in_pool, returning the target files.
+    '''
+    global krb_compiler
+    try:
+        krb_compiler
+    except NameError:
+        from pyke import krb_compiler
+    tp = target_pkg(package_name + '.compiled_pyke_files', filename,
+                    sources = {}, compiler_version = pyke.compiler_version)
+    return tuple(tp.do_by_ext('compile', source_filename))
+
 def import_(modulename):
     ''' modulepath does not include .py
     '''
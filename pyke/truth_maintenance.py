@@ -0,0 +1,155 @@
+# truth_maintenance.py
+# coding=utf-8
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+r'''
+    Truth maintenance for the facts asserted by forward-chaining rules.
+
+    When rule bases are activated with truth_maintenance=True, each fact
+    asserted by an fc_rule is recorded with its justification: the facts
+    matched by the rule's premises.  A fact has as many justifications as
+    there are ways that the rules have derived it.  Facts added by the
+    program are justified by ().  Retracting a fact removes that
+    justification; the fact is only removed if it has no others left.
+
+    Retracting facts (see engine.retract) then also retracts the facts that
+    are no longer justified.  This is done by deleting and rederiving: first
+    all of the facts that were derived (directly or indirectly) from the
+    retracted facts are marked for deletion; then those of them that still
+    have a justification whose premises are all still there are kept, until
+    no more can be kept.  This works for recursive rules too, where a fact
+    may end up justifying itself.
+
+        >>> from pyke import fact_base
+        >>> fl = fact_base.fact_list('f')
+        >>> j = justifications()
+        >>> def add(args, *premises):
+        ...     j.matched = [(fl, premise) for premise in premises] \
+        ...                 if premises else None
+        ...     j.add(fl, args)
+        ...     fl.add_case_specific_fact(args)
+        >>> add((1,)); add((2,))
+        >>> add((3,), (1,)); add((3,), (2,))
+        >>> add((4,), (3,)); add((3,), (4,))
+        >>> j.matched = None
+        >>> sorted(j.retract(((fl, (1,)),))[fl])
+        [(1,)]
+        >>> fl.retract_facts({(1,)})
+        [(1,)]
+        >>> sorted(j.retract(((fl, (2,)),))[fl])
+        [(2,), (3,), (4,)]
+
+    Facts with unhashable args are found by == (see fact_base.fact_set):
+
+        >>> add(([5],)); add((6,), ([5],))
+        >>> j.matched = None
+        >>> list(j.retract(((fl, ([5],)),))[fl])
+        [(6,), ([5],)]
+'''
+
+from pyke.fact_base import fact_set, fact_dict
+
+class justifications(object):
+    r'''
+        The justifications of the facts asserted by the fc_rules.
+    '''
+    def __init__(self):
+        self.supports = fact_dict()     # {(fact_list, args): {justification}},
+                                        #   where each justification is a
+                                        #   tuple of (fact_list, args)
+                                        #   premises.
+        self.dependents = fact_dict()   # {(fact_list, args):
+                                        #   {(fact_list, args)}} of the facts
+                                        #   that it justifies.
+        self.matched = None     # [(fact_list, args)] matched so far by the
+                                #   premises of the fc_rule running, if any.
+
+    def add(self, fact_list, args):
+        r'''Called just before args is asserted into fact_list.
+        '''
+        key = fact_list, args
+        supports = self.supports.get(key)
+        if self.matched is None:
+            # Added by the program, rather than by an fc_rule.
+            if supports is not None: supports.add(())
+            return
+        if supports is None:
+            supports = self.supports[key] = fact_set()
+            # A fact that's already there was added by the program, or
+            # before truth_maintenance was turned on.
+            if fact_list.has_fact(args): supports.add(())
+        justification = tuple(self.matched)
+        if justification not in supports:
+            supports.add(justification)
+            for premise in justification:
+                dependents = self.dependents.get(premise)
+                if dependents is None:
+                    dependents = self.dependents[premise] = fact_set()
+                dependents.add(key)
+
+    def adding(self, fact_list, facts):
+        r'''Generates facts, calling add for each of them.
+        '''
+        for args in facts:
+            self.add(fact_list, args)
+            yield args
+
+    def retract(self, facts):
+        r'''Returns {fact_list: {args}} of facts (an iterable of (fact_list,
+        args)) along with the facts derived from them that are no longer
+        justified, and forgets their justifications.
+        '''
+        supports = self.supports
+        deleted = fact_set(facts)
+        for fact in deleted:
+            # No longer added by the program, but the rules may still
+            # derive it.
+            if fact in supports: supports[fact].discard(())
+        todo = list(deleted)
+        while todo:
+            for fact in self.dependents.get(todo.pop(), ()):
+                if fact not in deleted and () not in supports.get(fact, ()):
+                    deleted.add(fact)
+                    todo.append(fact)
+
+        # Rederive those that are still justified.  Each fact that's kept
+        # may justify its dependents, so they are checked again.
+        def alive(premise):
+            return premise not in deleted and premise[0].has_fact(premise[1])
+        todo = [fact for fact in deleted if fact in supports]
+        while todo:
+            fact = todo.pop()
+            if fact in deleted and \
+               any(all(alive(premise) for premise in justification)
+                   for justification in supports[fact]):
+                deleted.remove(fact)
+                todo.extend(dependent
+                            for dependent in self.dependents.get(fact, ())
+                             if dependent in deleted and dependent in supports)
+
+        ans = {}
+        for fact in deleted:
+            supports.pop(fact, None)
+            self.dependents.pop(fact, None)
+            fact_list, args = fact
+            facts = ans.get(fact_list)
+            if facts is None: facts = ans[fact_list] = fact_set()
+            facts.add(args)
+        return ans